@@ -0,0 +1,667 @@
+import argparse
+import asyncio
+import dataclasses
+import enum
+import json
+import re
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+import config
+from database import EngineRegistry, registry as default_registry
+from errors import BusyError, ConflictError, NotFoundError
+from metrics import metrics
+from migrations import upgrade
+from models import TimeBlock, WeekDay
+from projections import Page
+from services import RoomRequest, SchedulerService, SessionSpec
+from timeslots import from_minutes, restricted_slots
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: Dict[str, str]
+    # Decoded JSON body; an empty dict when there was none
+    body: Any
+
+
+class Route(NamedTuple):
+    method: str
+    # Path template such as /professors/{professor_id}, also the metrics name
+    template: str
+    pattern: Pattern
+    handler: Callable
+    status: int
+
+
+# Every endpoint, in the order they are matched
+ROUTES: List[Route] = []
+
+
+def route(method: str, template: str, status: int = 200) -> Callable:
+    """Register handler(db, request, **path_ids) for a method and path; path parameters are integer ids."""
+    pattern = re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>\\d+)", template) + "$")
+
+    def register(handler: Callable) -> Callable:
+        ROUTES.append(Route(method, template, pattern, handler, status))
+        return handler
+
+    return register
+
+
+def to_json(value: Any) -> Any:
+    """Service results as JSON values: rows become objects, enums their value, times HH:MM and dates ISO 8601."""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, time):
+        return value.isoformat(timespec="minutes")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "_asdict"):
+        return {key: to_json(item) for key, item in value._asdict().items()}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {field.name: to_json(getattr(value, field.name)) for field in dataclasses.fields(value)}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if hasattr(value, "__mapper__"):
+        return {attr.key: to_json(getattr(value, attr.key)) for attr in inspect(value).mapper.column_attrs}
+    return value
+
+
+# Request parsing; bad input raises ValueError like the service does
+
+def _int(value: Any, name: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer") from None
+
+
+def _optional_int(query: Dict[str, str], name: str) -> Optional[int]:
+    return _int(query[name], name) if query.get(name) not in (None, "") else None
+
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+def _time(value: Any, name: str) -> time:
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a time of day as HH:MM") from None
+
+
+def _required(body: Dict, name: str) -> Any:
+    if body.get(name) is None:
+        raise ValueError(f"{name} is required")
+    return body[name]
+
+
+def _body_int(body: Dict, name: str, default: Optional[int] = None) -> Optional[int]:
+    return default if body.get(name) is None else _int(body[name], name)
+
+
+def _body_number(body: Dict, name: str) -> Optional[float]:
+    value = body.get(name)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number")
+    return float(value)
+
+
+def _body_flag(body: Dict, name: str, default: Optional[bool] = None) -> Optional[bool]:
+    return default if body.get(name) is None else _flag(body[name])
+
+
+def _session_fields(item: Any, names: Tuple[str, ...] = SessionSpec._fields) -> Dict:
+    """A session spec (or room request, with RoomRequest._fields) from JSON, every field parsed."""
+    if not isinstance(item, dict):
+        raise ValueError("Every session must be a JSON object")
+    unknown = set(item) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown session fields: {', '.join(sorted(unknown))}")
+    fields = {
+        name: _int(_required(item, name), name)
+        for name in ("course_id", "professor_id", "classroom_id")
+        if name in names
+    }
+    if "students" in names and item.get("students") is not None:
+        fields["students"] = _int(item["students"], "students")
+    fields["weekday"] = WeekDay(_required(item, "weekday"))
+    for name in ("start_time", "end_time"):
+        fields[name] = _time(_required(item, name), name)
+    return fields
+
+
+def _page(request: Request, load: Callable[[Optional[int], int], Page]) -> Dict:
+    """One keyset page: ?after=<id of the last row seen>&limit=<rows>."""
+    limit = _optional_int(request.query, "limit")
+    limit = config.API_PAGE_SIZE if limit is None else limit
+    if not 0 < limit <= config.API_MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {config.API_MAX_PAGE_SIZE}")
+    page = load(_optional_int(request.query, "after"), limit)
+    return {"items": page.rows, "next_after": page.next_after}
+
+
+def _schedules_page(db: Session, request: Request, **filters) -> Dict:
+    return _page(request, lambda after, limit: SchedulerService.page_schedules(db, after, limit, **filters))
+
+
+def _deleted(deleted: bool, entity: str, entity_id: int) -> None:
+    if not deleted:
+        raise NotFoundError(f"{entity} with ID {entity_id} not found")
+
+
+# Professors
+
+@route("GET", "/professors")
+def list_professors(db: Session, request: Request):
+    return _page(request, lambda after, limit: SchedulerService.page_professors(db, after, limit))
+
+
+@route("POST", "/professors", status=201)
+def create_professor(db: Session, request: Request):
+    return SchedulerService.add_professor(db, request.body.get("name"), request.body.get("document_id"))
+
+
+@route("GET", "/professors/{professor_id}")
+def get_professor(db: Session, request: Request, professor_id: int):
+    return SchedulerService.get_professor_by_id(db, professor_id)
+
+
+@route("PATCH", "/professors/{professor_id}")
+def update_professor(db: Session, request: Request, professor_id: int):
+    return SchedulerService.update_professor(
+        db, professor_id, request.body.get("name"), request.body.get("document_id")
+    )
+
+
+@route("DELETE", "/professors/{professor_id}", status=204)
+def delete_professor(db: Session, request: Request, professor_id: int):
+    _deleted(SchedulerService.delete_professor(db, professor_id), "Professor", professor_id)
+
+
+@route("POST", "/professors/{professor_id}/courses", status=201)
+def assign_course(db: Session, request: Request, professor_id: int):
+    course_id = _int(_required(request.body, "course_id"), "course_id")
+    SchedulerService.assign_course_to_professor(db, professor_id, course_id)
+    return {"professor_id": professor_id, "course_id": course_id}
+
+
+@route("DELETE", "/professors/{professor_id}/courses/{course_id}", status=204)
+def unassign_course(db: Session, request: Request, professor_id: int, course_id: int):
+    SchedulerService.remove_course_from_professor(db, professor_id, course_id)
+
+
+@route("POST", "/professors/{professor_id}/restrictions", status=201)
+def add_restriction(db: Session, request: Request, professor_id: int):
+    return SchedulerService.add_professor_restriction(
+        db, professor_id,
+        WeekDay(_required(request.body, "weekday")), TimeBlock(_required(request.body, "time_block"))
+    )
+
+
+def _restriction_slots(items: Any) -> List[Tuple[WeekDay, TimeBlock]]:
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError("restrictions must be a list of objects")
+    return [
+        (WeekDay(_required(item, "weekday")), TimeBlock(_required(item, "time_block")))
+        for item in items
+    ]
+
+
+def _restriction_items(mask: int) -> List[Dict]:
+    return [{"weekday": weekday, "time_block": time_block} for weekday, time_block in restricted_slots(mask)]
+
+
+@route("GET", "/professors/{professor_id}/restrictions")
+def list_restrictions(db: Session, request: Request, professor_id: int):
+    return _restriction_items(SchedulerService.get_professor_by_id(db, professor_id).restriction_mask)
+
+
+@route("PUT", "/professors/{professor_id}/restrictions")
+def replace_restrictions(db: Session, request: Request, professor_id: int):
+    slots = _restriction_slots(_required(request.body, "restrictions"))
+    masks = SchedulerService.set_professor_restrictions(db, {professor_id: slots})
+    return _restriction_items(masks[professor_id])
+
+
+@route("PUT", "/restrictions")
+def set_restrictions(db: Session, request: Request):
+    """Body {"professors": [{"professor_id", "restrictions": [...]}], "replace": true}."""
+    professors = _required(request.body, "professors")
+    if not isinstance(professors, list):
+        raise ValueError("professors must be a list")
+    wanted = {
+        _int(_required(item, "professor_id"), "professor_id"): _restriction_slots(_required(item, "restrictions"))
+        for item in professors
+    }
+    replace = request.body.get("replace")
+    masks = SchedulerService.set_professor_restrictions(db, wanted, True if replace is None else _flag(replace))
+    return [
+        {"professor_id": professor_id, "restrictions": _restriction_items(mask)}
+        for professor_id, mask in masks.items()
+    ]
+
+
+@route("GET", "/professors/{professor_id}/schedule")
+def professor_schedule(db: Session, request: Request, professor_id: int):
+    return _schedules_page(db, request, professor_id=professor_id)
+
+
+@route("GET", "/professors/{professor_id}/available-slots")
+def available_slots(db: Session, request: Request, professor_id: int):
+    course_id = _int(request.query.get("course_id"), "course_id")
+    return SchedulerService.find_available_slots(
+        db, course_id, professor_id,
+        _optional_int(request.query, "step_minutes") or 60,
+        _optional_int(request.query, "limit") or config.API_PAGE_SIZE,
+        _flag(request.query.get("skip_taught_days", True))
+    )
+
+
+# Courses
+
+@route("GET", "/courses")
+def list_courses(db: Session, request: Request):
+    return _page(request, lambda after, limit: SchedulerService.page_courses(db, after, limit))
+
+
+@route("POST", "/courses", status=201)
+def create_course(db: Session, request: Request):
+    body = request.body
+    return SchedulerService.add_course(
+        db, body.get("code"), body.get("name"), _body_int(body, "weekly_hours", 4),
+        _body_flag(body, "requires_equipment", False)
+    )
+
+
+@route("GET", "/courses/{course_id}")
+def get_course(db: Session, request: Request, course_id: int):
+    return SchedulerService.get_course_by_id(db, course_id)
+
+
+@route("PATCH", "/courses/{course_id}")
+def update_course(db: Session, request: Request, course_id: int):
+    body = request.body
+    return SchedulerService.update_course(
+        db, course_id, body.get("code"), body.get("name"), _body_int(body, "weekly_hours"),
+        _body_flag(body, "requires_equipment")
+    )
+
+
+@route("DELETE", "/courses/{course_id}", status=204)
+def delete_course(db: Session, request: Request, course_id: int):
+    _deleted(SchedulerService.delete_course(db, course_id), "Course", course_id)
+
+
+@route("GET", "/courses/{course_id}/schedule")
+def course_schedule(db: Session, request: Request, course_id: int):
+    return _schedules_page(db, request, course_id=course_id)
+
+
+@route("GET", "/courses/{course_id}/validation")
+def validate_course(db: Session, request: Request, course_id: int):
+    return {"course_id": course_id, "valid": SchedulerService.validate_course_scheduling(db, course_id)}
+
+
+# Classrooms
+
+@route("GET", "/classrooms")
+def list_classrooms(db: Session, request: Request):
+    return _page(request, lambda after, limit: SchedulerService.page_classrooms(db, after, limit))
+
+
+@route("POST", "/classrooms", status=201)
+def create_classroom(db: Session, request: Request):
+    body = request.body
+    return SchedulerService.add_classroom(
+        db, body.get("name"), _body_flag(body, "has_equipment", False), _body_int(body, "capacity", 30)
+    )
+
+
+@route("GET", "/classrooms/{classroom_id}")
+def get_classroom(db: Session, request: Request, classroom_id: int):
+    return SchedulerService.get_classroom_by_id(db, classroom_id)
+
+
+@route("PATCH", "/classrooms/{classroom_id}")
+def update_classroom(db: Session, request: Request, classroom_id: int):
+    body = request.body
+    return SchedulerService.update_classroom(
+        db, classroom_id, body.get("name"), _body_flag(body, "has_equipment"), _body_int(body, "capacity")
+    )
+
+
+@route("DELETE", "/classrooms/{classroom_id}", status=204)
+def delete_classroom(db: Session, request: Request, classroom_id: int):
+    _deleted(SchedulerService.delete_classroom(db, classroom_id), "Classroom", classroom_id)
+
+
+@route("GET", "/classrooms/{classroom_id}/schedule")
+def classroom_schedule(db: Session, request: Request, classroom_id: int):
+    return _schedules_page(db, request, classroom_id=classroom_id)
+
+
+# Schedules
+
+@route("GET", "/schedules")
+def list_schedules(db: Session, request: Request):
+    weekday = request.query.get("weekday")
+    return _schedules_page(
+        db, request,
+        weekday=WeekDay(weekday) if weekday else None,
+        professor_id=_optional_int(request.query, "professor_id"),
+        classroom_id=_optional_int(request.query, "classroom_id"),
+        course_id=_optional_int(request.query, "course_id")
+    )
+
+
+@route("POST", "/schedules", status=201)
+def create_schedule(db: Session, request: Request):
+    fields = _session_fields(request.body)
+    schedule = SchedulerService.schedule_course_session(
+        db, fields["course_id"], fields["professor_id"], fields["classroom_id"],
+        fields["weekday"], fields["start_time"], fields["end_time"]
+    )
+    return SchedulerService.get_schedule_row(db, schedule.id)
+
+
+@route("POST", "/schedules/bulk")
+def create_schedules(db: Session, request: Request):
+    sessions = _required(request.body, "sessions")
+    if not isinstance(sessions, list):
+        raise ValueError("sessions must be a list")
+    return SchedulerService.schedule_course_sessions_bulk(
+        db, [_session_fields(item) for item in sessions], _flag(request.body.get("dry_run"))
+    )
+
+
+@route("POST", "/schedules/assign-classrooms")
+def assign_classrooms(db: Session, request: Request):
+    sessions = _required(request.body, "sessions")
+    if not isinstance(sessions, list):
+        raise ValueError("sessions must be a list")
+    return SchedulerService.assign_classrooms(
+        db, [_session_fields(item, RoomRequest._fields) for item in sessions], _flag(request.body.get("dry_run"))
+    )
+
+
+@route("GET", "/schedules/{schedule_id}")
+def get_schedule(db: Session, request: Request, schedule_id: int):
+    return SchedulerService.get_schedule_row(db, schedule_id)
+
+
+@route("DELETE", "/schedules/{schedule_id}", status=204)
+def delete_schedule(db: Session, request: Request, schedule_id: int):
+    SchedulerService.remove_course_session(db, schedule_id)
+
+
+@route("POST", "/auto-schedule")
+def auto_schedule(db: Session, request: Request):
+    body = request.body
+    professor_ids = body.get("professor_ids")
+    if professor_ids is not None and not isinstance(professor_ids, list):
+        raise ValueError("professor_ids must be a list")
+    dry_run = _flag(body.get("dry_run"))
+    schedules, unplaced = SchedulerService.auto_schedule(
+        db,
+        [_int(value, "professor_ids") for value in professor_ids] if professor_ids is not None else None,
+        _body_int(body, "step_minutes", 60),
+        dry_run=dry_run
+    )
+    if not dry_run:
+        # The commit expired the new rows; read them back in one query rather than one refresh each
+        schedules = SchedulerService.get_schedule_rows(db, [inspect(schedule).identity[0] for schedule in schedules])
+    return {
+        "scheduled": schedules,
+        "unplaced": [
+            {"professor_id": professor_id, "course_id": course_id, "reason": reason}
+            for professor_id, course_id, reason in unplaced
+        ],
+    }
+
+
+@route("POST", "/optimize")
+def optimize(db: Session, request: Request):
+    body = request.body
+    result = SchedulerService.optimize_timetable(
+        db,
+        _body_int(body, "max_iterations", 20000),
+        _body_number(body, "time_limit_seconds"),
+        step_minutes=_body_int(body, "step_minutes", 60),
+        seed=_body_int(body, "seed"),
+        dry_run=_flag(body.get("dry_run"))
+    )
+    return {
+        "moves": [
+            {
+                "schedule_id": schedule_id, "weekday": weekday, "start_time": from_minutes(start),
+                "end_time": from_minutes(end), "classroom_id": classroom_id,
+            }
+            for schedule_id, (weekday, start, end, classroom_id) in result.moves
+        ],
+        "initial_cost": result.initial_cost,
+        "final_cost": result.final_cost,
+        "iterations": result.iterations,
+        "accepted": result.accepted,
+    }
+
+
+@route("GET", "/validation")
+def validate_courses(db: Session, request: Request):
+    return SchedulerService.validate_all_courses(db, _flag(request.query.get("only_invalid", "")))
+
+
+def _status_of(exc: ValueError) -> int:
+    """HTTP status of a service ValueError."""
+    if isinstance(exc, NotFoundError):
+        return 404
+    if isinstance(exc, BusyError):
+        return 503
+    if isinstance(exc, ConflictError):
+        return 409
+    return 422
+
+
+class SchedulerApi:
+    """
+    ASGI application exposing SchedulerService as a JSON API. Handlers run on
+    a bounded thread pool, each with its own session, so the event loop only
+    parses requests and sends responses. Requests beyond workers + max_pending
+    are answered 503 at once rather than queued without limit.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[EngineRegistry] = None,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        migrate: bool = True
+    ):
+        self.registry = registry or default_registry
+        self.workers = workers or config.API_WORKERS
+        self.max_pending = config.API_MAX_PENDING if max_pending is None else max_pending
+        self.migrate = migrate
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        # Requests wait on the lock until startup has finished, migrations included
+        self._start_lock = asyncio.Lock()
+        self._started = False
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def startup(self) -> None:
+        """Create the worker pool and, unless disabled, bring the schema up to date. Runs once."""
+        async with self._start_lock:
+            if self._started:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="scheduler-api")
+                self._slots = asyncio.Semaphore(self.workers + self.max_pending)
+            if self.migrate:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self._executor, lambda: upgrade(self.registry.get_engine()))
+                await loop.run_in_executor(self._executor, self.registry.warm)
+            self._started = True
+
+    async def shutdown(self) -> None:
+        self._started = False
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.registry.dispose()
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await self.startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send) -> None:
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        if not self._started:
+            # Servers without lifespan support; concurrent first requests all wait for the one startup
+            await self.startup()
+        if path == "/health":
+            return await self._send(send, 200, {"status": "ok"})
+        if path == "/metrics":
+            return await self._send(send, 200, metrics.to_prometheus().encode(), "text/plain; version=0.0.4")
+
+        matched, allowed = None, []
+        for candidate in ROUTES:
+            found = candidate.pattern.match(path)
+            if found:
+                allowed.append(candidate.method)
+                if candidate.method == method:
+                    matched = candidate, {key: int(value) for key, value in found.groupdict().items()}
+                    break
+        if matched is None:
+            if allowed:
+                return await self._send(send, 405, {"error": f"{method} is not allowed on {path}"},
+                                        headers=[(b"allow", ", ".join(allowed).encode())])
+            return await self._send(send, 404, {"error": f"No endpoint at {path}"})
+
+        body = await self._read_body(receive)
+        if body is None:
+            return await self._send(send, 413, {"error": f"Request bodies are limited to {config.API_MAX_BODY_BYTES} bytes"})
+        try:
+            decoded = json.loads(body) if body else {}
+        except ValueError:
+            return await self._send(send, 400, {"error": "The request body is not valid JSON"})
+        if method in ("POST", "PATCH") and not isinstance(decoded, dict):
+            return await self._send(send, 400, {"error": "The request body must be a JSON object"})
+
+        if self._slots.locked():
+            return await self._send(send, 503, {"error": "The server is busy, try again"},
+                                    headers=[(b"retry-after", b"1")])
+        query = dict(parse_qsl(scope.get("query_string", b"").decode()))
+        request = Request(method, path, query, decoded)
+        route_, ids = matched
+        async with self._slots:
+            status, payload = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._handle, route_, request, ids
+            )
+        await self._send(send, status, payload)
+
+    def _handle(self, route_: Route, request: Request, ids: Dict[str, int]) -> Tuple[int, Optional[bytes]]:
+        """Run a handler on a worker thread with its own session; the result is encoded there too."""
+        with metrics.timed(f"api.{route_.method} {route_.template}"):
+            db = self.registry.get_session()
+            try:
+                result = route_.handler(db, request, **ids)
+                status = route_.status
+                payload = None if status == 204 else to_json(result)
+            except ValueError as exc:
+                db.rollback()
+                status, payload = _status_of(exc), {"error": str(exc)}
+            except IntegrityError as exc:
+                # A unique index refused a row the service did not check for first
+                db.rollback()
+                status, payload = 409, {"error": f"The change conflicts with stored data: {exc.orig}"}
+            except OperationalError as exc:
+                db.rollback()
+                status, payload = 503, {"error": f"The database is unavailable: {exc.orig}"}
+            except Exception:
+                db.rollback()
+                traceback.print_exc()
+                status, payload = 500, {"error": "Internal server error"}
+            finally:
+                db.close()
+        return status, None if payload is None else json.dumps(payload, separators=(",", ":")).encode()
+
+    @staticmethod
+    async def _read_body(receive) -> Optional[bytes]:
+        """The request body, or None when it is larger than API_MAX_BODY_BYTES."""
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > config.API_MAX_BODY_BYTES:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    @staticmethod
+    async def _send(send, status: int, payload: Any, content_type: str = "application/json", headers=()) -> None:
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload, separators=(",", ":")).encode()
+        body = payload or b""
+        response_headers = [(b"content-length", str(len(body)).encode()), *headers]
+        if body:
+            response_headers.append((b"content-type", content_type.encode()))
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+# The application served by `python api.py` (or any ASGI server as api:app)
+app = SchedulerApi()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the scheduler JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--database", help="Database URL (defaults to DATABASE_URL)")
+    parser.add_argument("--workers", type=int, help="Threads running database work (defaults to API_WORKERS)")
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Serving the API needs uvicorn: pip install uvicorn") from None
+
+    application = SchedulerApi(EngineRegistry(args.database) if args.database else None, args.workers)
+    uvicorn.run(application, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
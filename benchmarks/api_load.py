@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time as clock
+from typing import Any, Dict, List, Optional, Tuple
+
+from api import SchedulerApi
+from benchmarks.generator import generate_university
+from benchmarks.stress import find_overlaps
+from database import EngineRegistry
+from models import CourseModel, WeekDay
+from services import SchedulerService
+from timeslots import block_hours
+
+
+async def call(app: SchedulerApi, method: str, path: str, body: Any = None) -> Tuple[int, Any]:
+    """Send one request straight to the ASGI app and return (status, decoded JSON body or None)."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "method": method, "path": path, "query_string": query.encode(),
+        "headers": [(b"content-type", b"application/json")],
+    }
+    encoded = b"" if body is None else json.dumps(body).encode()
+    messages = [{"type": "http.request", "body": encoded, "more_body": False}]
+    response: Dict[str, Any] = {}
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        else:
+            response["body"] = message.get("body", b"")
+
+    await app(scope, receive, send)
+    content = response.get("body", b"")
+    return response["status"], json.loads(content) if content else None
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return round(ordered[round(fraction * (len(ordered) - 1))] * 1000, 3) if ordered else 0.0
+
+
+def load_test(
+    clients: int = 32,
+    requests: int = 2000,
+    professors: int = 60,
+    seed: int = 0,
+    workers: Optional[int] = None
+) -> Dict:
+    """
+    Drive the API with concurrent clients against a temporary SQLite file,
+    without an HTTP server in between. Clients mostly read pages and
+    per-entity schedules and sometimes book a session. Returns request
+    counts by endpoint and status, latencies, throughput and the double
+    bookings found afterwards.
+    """
+    handle, path = tempfile.mkstemp(prefix="scheduler-api-", suffix=".db")
+    os.close(handle)
+    registry = EngineRegistry(f"sqlite:///{path}")
+    app = SchedulerApi(registry, workers)
+    SchedulerService.drop_occupancy_index()
+
+    async def run() -> Dict:
+        await app.startup()
+        with registry.get_session() as db:
+            university = generate_university(db, professors, seed)
+            SchedulerService.auto_schedule(db, university.professor_ids[: professors // 2])
+            hours = dict(db.query(CourseModel.id, CourseModel.weekly_hours))
+        rnd = random.Random(seed)
+
+        def next_request() -> Tuple[str, str, str, Any]:
+            """(name, method, path, body) of a random request."""
+            roll = rnd.random()
+            if roll < 0.2:
+                return "GET /schedules", "GET", f"/schedules?limit=100&after={rnd.randrange(200)}", None
+            if roll < 0.4:
+                professor_id = rnd.choice(university.professor_ids)
+                return "GET /professors/{id}/schedule", "GET", f"/professors/{professor_id}/schedule", None
+            if roll < 0.55:
+                classroom_id = rnd.choice(university.classroom_ids)
+                return "GET /classrooms/{id}/schedule", "GET", f"/classrooms/{classroom_id}/schedule", None
+            if roll < 0.7:
+                return "GET /professors", "GET", f"/professors?after={rnd.randrange(professors)}&limit=50", None
+            if roll < 0.75:
+                return "GET /validation", "GET", "/validation?only_invalid=true", None
+            professor_id, course_id = rnd.choice(university.assignments)
+            start = rnd.randrange(8, 19)
+            return "POST /schedules", "POST", "/schedules", {
+                "course_id": course_id, "professor_id": professor_id,
+                "classroom_id": rnd.choice(university.classroom_ids), "weekday": rnd.choice(list(WeekDay)).value,
+                "start_time": f"{start:02d}:00", "end_time": f"{start + block_hours(hours[course_id]):02d}:00",
+            }
+
+        plan = [next_request() for _ in range(requests)]
+        latencies: Dict[str, List[float]] = {}
+        statuses: Dict[str, Dict[int, int]] = {}
+
+        async def client(number: int) -> None:
+            for name, method, request_path, body in plan[number::clients]:
+                started = clock.perf_counter()
+                status, _ = await call(app, method, request_path, body)
+                latencies.setdefault(name, []).append(clock.perf_counter() - started)
+                counts = statuses.setdefault(name, {})
+                counts[status] = counts.get(status, 0) + 1
+
+        started = clock.perf_counter()
+        await asyncio.gather(*(client(number) for number in range(clients)))
+        seconds = clock.perf_counter() - started
+        with registry.get_session() as db:
+            overlaps = find_overlaps(db)
+        await app.shutdown()
+        return {
+            "clients": clients,
+            "requests": requests,
+            "seconds": round(seconds, 3),
+            "requests_per_second": round(requests / seconds, 1),
+            "overlaps": overlaps,
+            "endpoints": {
+                name: {
+                    "statuses": dict(sorted(statuses[name].items())),
+                    "p50_ms": _percentile(sorted(values), 0.5),
+                    "p95_ms": _percentile(sorted(values), 0.95),
+                    "max_ms": _percentile(sorted(values), 1.0),
+                }
+                for name, values in sorted(latencies.items())
+            },
+        }
+
+    try:
+        return asyncio.run(run())
+    finally:
+        SchedulerService.drop_occupancy_index()
+        registry.dispose()
+        os.unlink(path)
@@ -0,0 +1,262 @@
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from benchmarks.generator import University, generate_university, sqlite_engine
+from models import CourseModel, ProfessorRestrictionModel, ScheduleModel, TimeBlock, WeekDay
+from services import SchedulerService
+
+# (professors, (fewest, most) courses per professor) of the worlds every budget is
+# checked in; later worlds are larger, so a count that grows between them scales with the data
+WORLDS = [(12, (1, 2)), (60, (4, 6))]
+
+
+@dataclass
+class World:
+    db: Session
+    university: University
+    # Courses given to each professor made by assignment()
+    courses_per_professor: int
+    rnd: random.Random
+
+    def unique(self, prefix: str) -> str:
+        return f"{prefix}-{self.rnd.getrandbits(48):x}"
+
+    def busiest(self, column, *criteria) -> int:
+        """Id of the professor, course or classroom with the most sessions."""
+        query = self.db.query(column).filter(*criteria).group_by(column)
+        return query.order_by(func.count().desc(), column).first()[0]
+
+    def busiest_restricted_professor(self) -> int:
+        """The professor with the most sessions among those with restrictions, so every cascade has rows."""
+        return self.busiest(
+            ScheduleModel.professor_id,
+            ScheduleModel.professor_id.in_(select(ProfessorRestrictionModel.professor_id))
+        )
+
+    def schedule_id(self) -> int:
+        return self.db.query(ScheduleModel.id).order_by(ScheduleModel.id).first()[0]
+
+    def newcomer(self) -> int:
+        """A professor without courses."""
+        return SchedulerService.add_professor(self.db, "Budget newcomer", self.unique("BUDGET")).id
+
+    def assignment(self) -> Tuple[int, int]:
+        """(professor_id, course_id) of a new professor given courses_per_professor courses, none scheduled."""
+        professor_id, course_ids = self._new_professor_with_courses()
+        return professor_id, course_ids[0]
+
+    def free_session(self, weekday: WeekDay = WeekDay.MONDAY) -> tuple:
+        """
+        (course_id, professor_id, classroom_id, weekday, start_time, end_time)
+        that can be scheduled; sessions on different weekdays never collide.
+        """
+        professor_id, course_ids = self._new_professor_with_courses()
+        for course_id in course_ids:
+            for slot in SchedulerService.find_available_slots(self.db, course_id, professor_id):
+                if slot.weekday == weekday:
+                    return course_id, professor_id, slot.classroom_id, slot.weekday, slot.start_time, slot.end_time
+        raise RuntimeError(f"No free {weekday.value} slot for professor {professor_id}")
+
+    def room_request(self, weekday: WeekDay = WeekDay.MONDAY) -> tuple:
+        """A free session without its classroom, as assign_classrooms takes it."""
+        course_id, professor_id, _, weekday, start_time, end_time = self.free_session(weekday)
+        return course_id, professor_id, weekday, start_time, end_time
+
+    def _new_professor_with_courses(self) -> Tuple[int, List[int]]:
+        professor_id = self.newcomer()
+        # Small worlds may have no equipped classroom, so only courses any room can host
+        existing = [
+            row.id for row in
+            self.db.query(CourseModel.id).filter(CourseModel.requires_equipment.is_(False)).order_by(CourseModel.id)
+        ]
+        course_ids = self.rnd.sample(existing, self.courses_per_professor)
+        for course_id in course_ids:
+            SchedulerService.assign_course_to_professor(self.db, professor_id, course_id)
+        return professor_id, course_ids
+
+
+class Budget(NamedTuple):
+    # Most SQL statements one call may execute, however large the world
+    statements: int
+    # Positional arguments of the call, built before counting starts
+    arguments: Callable[[World], tuple]
+
+
+_BATCH_DAYS = [WeekDay.MONDAY, WeekDay.TUESDAY, WeekDay.WEDNESDAY]
+
+
+def _no_arguments(world: World) -> tuple:
+    return ()
+
+
+def _db(world: World) -> tuple:
+    return (world.db,)
+
+
+# Statement budget of every public SchedulerService method. Writes count their
+# refresh() or re-read, so an extra round-trip after a commit shows up here too,
+# and bookings their booking lock read and claim (an UPDATE, plus an INSERT for
+# resource-days booked for the first time).
+BUDGETS: Dict[str, Budget] = {
+    "load_occupancy_index": Budget(2, _db),
+    "drop_occupancy_index": Budget(0, _no_arguments),
+    "enable_reference_cache": Budget(0, _no_arguments),
+    "disable_reference_cache": Budget(0, _no_arguments),
+    "add_professor": Budget(2, lambda w: (w.db, "Budget professor", w.unique("BUDGET"))),
+    "update_professor": Budget(3, lambda w: (w.db, w.busiest(ScheduleModel.professor_id), "Renamed professor")),
+    "delete_professor": Budget(8, lambda w: (w.db, w.busiest_restricted_professor())),
+    "get_professors_course": Budget(1, _db),
+    "get_professors": Budget(1, _db),
+    "get_schedules": Budget(1, _db),
+    "list_professors": Budget(1, _db),
+    "list_courses": Budget(1, _db),
+    "list_classrooms": Budget(1, _db),
+    "list_schedules": Budget(1, _db),
+    "table_versions": Budget(1, _db),
+    "page_professors": Budget(1, lambda w: (w.db, None, 20)),
+    "page_courses": Budget(1, lambda w: (w.db, None, 20)),
+    "page_classrooms": Budget(1, lambda w: (w.db, None, 20)),
+    "page_schedules": Budget(1, lambda w: (w.db, None, 20)),
+    "iter_professors": Budget(1, lambda w: (w.db, 7)),
+    "iter_courses": Budget(1, lambda w: (w.db, 7)),
+    "iter_classrooms": Budget(1, lambda w: (w.db, 7)),
+    "iter_schedules": Budget(1, lambda w: (w.db, 7)),
+    "iter_entity_schedules": Budget(1, lambda w: (w.db, "professor", 7)),
+    "get_schedule_row": Budget(1, lambda w: (w.db, w.schedule_id())),
+    "get_schedule_rows": Budget(1, lambda w: (w.db, [w.schedule_id()])),
+    "get_professor_by_id": Budget(1, lambda w: (w.db, w.busiest(ScheduleModel.professor_id))),
+    "get_professor_by_name": Budget(1, lambda w: (w.db, "Professor 1")),
+    "add_professor_restriction": Budget(3, lambda w: (w.db, w.newcomer(), WeekDay.SATURDAY, TimeBlock.EVENING)),
+    "set_professor_restrictions": Budget(4, lambda w: (w.db, {
+        w.busiest_restricted_professor(): [(WeekDay.MONDAY, TimeBlock.MORNING)],
+        w.newcomer(): [(WeekDay.FRIDAY, TimeBlock.EVENING), (WeekDay.SATURDAY, TimeBlock.MORNING)],
+    })),
+    "update_course": Budget(3, lambda w: (w.db, w.busiest(ScheduleModel.course_id), None, "Renamed course")),
+    "delete_course": Budget(6, lambda w: (w.db, w.busiest(ScheduleModel.course_id))),
+    "get_courses": Budget(1, _db),
+    "get_course_by_id": Budget(1, lambda w: (w.db, w.busiest(ScheduleModel.course_id))),
+    "add_course": Budget(2, lambda w: (w.db, w.unique("BUDGET"), "Budget course")),
+    "add_classroom": Budget(2, lambda w: (w.db, w.unique("Budget room"))),
+    "update_classroom": Budget(3, lambda w: (w.db, w.busiest(ScheduleModel.classroom_id), None, None, 45)),
+    "delete_classroom": Budget(4, lambda w: (w.db, w.busiest(ScheduleModel.classroom_id))),
+    "get_classrooms": Budget(1, _db),
+    "get_classroom_by_id": Budget(1, lambda w: (w.db, w.busiest(ScheduleModel.classroom_id))),
+    "assign_course_to_professor": Budget(4, lambda w: (w.db, w.newcomer(), w.busiest(ScheduleModel.course_id))),
+    "remove_course_from_professor": Budget(5, lambda w: (w.db, *w.assignment())),
+    "schedule_course_session": Budget(12, lambda w: (w.db, *w.free_session())),
+    # SQLite cannot sort multi-row RETURNING, so each of the three sessions is its own INSERT there
+    "schedule_course_sessions_bulk": Budget(12, lambda w: (w.db, [w.free_session(day) for day in _BATCH_DAYS])),
+    "assign_classrooms": Budget(15, lambda w: (w.db, [w.room_request(day) for day in _BATCH_DAYS])),
+    "auto_schedule": Budget(6, lambda w: (w.db, None, 60, 1000, True)),
+    "optimize_timetable": Budget(8, lambda w: (w.db, 2000, None, None, 60, 0)),
+    "remove_course_session": Budget(2, lambda w: (w.db, w.schedule_id())),
+    "find_available_slots": Budget(6, lambda w: (w.db, *reversed(w.assignment()))),
+    "get_professor_schedule": Budget(1, lambda w: (w.db, w.busiest(ScheduleModel.professor_id))),
+    "get_classroom_schedule": Budget(1, lambda w: (w.db, w.busiest(ScheduleModel.classroom_id))),
+    "get_course_schedule": Budget(1, lambda w: (w.db, w.busiest(ScheduleModel.course_id))),
+    "validate_all_courses": Budget(1, _db),
+    "validate_course_scheduling": Budget(1, lambda w: (w.db, w.busiest(ScheduleModel.course_id))),
+}
+
+
+def public_methods() -> List[str]:
+    return sorted(
+        name for name, member in vars(SchedulerService).items()
+        if isinstance(member, staticmethod) and not name.startswith("_")
+    )
+
+
+@contextmanager
+def count_statements(engine: Engine) -> Iterator[List[int]]:
+    """Count the statements executed on an engine inside the block; the count is the list's only item."""
+    counter = [0]
+
+    def count(*args) -> None:
+        counter[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+
+def measure_world(
+    professors: int,
+    courses_per_professor: Tuple[int, int],
+    seed: int,
+    use_occupancy_index: bool = False,
+    use_reference_cache: bool = False
+) -> Dict[str, int]:
+    """Statements of one call of every budgeted method in a freshly generated world."""
+    engine = sqlite_engine()
+    db = sessionmaker(bind=engine)()
+    rnd = random.Random(seed)
+    SchedulerService.drop_occupancy_index()
+    SchedulerService.disable_reference_cache()
+    counts: Dict[str, int] = {}
+    try:
+        # A room per two professors leaves free slots for the scheduling calls
+        university = generate_university(db, professors, seed, courses_per_professor, professors_per_classroom=2)
+        SchedulerService.auto_schedule(db)
+        world = World(db, university, courses_per_professor[1], rnd)
+
+        for name, budget in BUDGETS.items():
+            if use_occupancy_index:
+                SchedulerService.load_occupancy_index(db)
+            if use_reference_cache:
+                SchedulerService.enable_reference_cache()
+            arguments = budget.arguments(world)
+            # Start from an empty identity map so lazy loads and refreshes are counted
+            db.expunge_all()
+            with count_statements(engine) as counter:
+                result = getattr(SchedulerService, name)(*arguments)
+                if isinstance(result, Iterator):
+                    for _ in result:
+                        pass
+            counts[name] = counter[0]
+            SchedulerService.drop_occupancy_index()
+            SchedulerService.disable_reference_cache()
+    finally:
+        SchedulerService.drop_occupancy_index()
+        SchedulerService.disable_reference_cache()
+        db.close()
+        engine.dispose()
+    return counts
+
+
+def check(
+    seed: int = 0,
+    use_occupancy_index: bool = False,
+    use_reference_cache: bool = False,
+    worlds: Optional[List[Tuple[int, Tuple[int, int]]]] = None
+) -> Tuple[Dict[str, List[int]], List[str]]:
+    """
+    Measure every budget in each world. Returns the counts per method (one per
+    world) and the failures: methods without a budget, counts over budget and
+    counts that grow with the world.
+    """
+    worlds = worlds or WORLDS
+    failures = [
+        f"{name}: no statement budget declared in benchmarks/budgets.py"
+        for name in public_methods() if name not in BUDGETS
+    ]
+    per_world = [
+        measure_world(professors, courses, seed, use_occupancy_index, use_reference_cache)
+        for professors, courses in worlds
+    ]
+    counts = {name: [world[name] for world in per_world] for name in BUDGETS}
+    for name, measured in counts.items():
+        budget = BUDGETS[name].statements
+        if max(measured) > budget:
+            failures.append(f"{name}: {max(measured)} statements, budget is {budget}")
+        if any(count > measured[0] for count in measured[1:]):
+            sizes = ", ".join(f"{count} at {world[0]} professors" for count, world in zip(measured, worlds))
+            failures.append(f"{name}: statement count grows with the data ({sizes})")
+    return counts, failures
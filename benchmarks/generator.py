@@ -0,0 +1,117 @@
+import random
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from sqlalchemy import bindparam, create_engine, insert, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from migrations import upgrade
+from models import (
+    ClassroomModel,
+    CourseModel,
+    ProfessorModel,
+    ProfessorRestrictionModel,
+    TimeBlock,
+    WeekDay,
+    professor_course_association,
+)
+from timeslots import restriction_mask
+
+RESTRICTABLE_BLOCKS = [TimeBlock.MORNING, TimeBlock.AFTERNOON, TimeBlock.EVENING]
+
+
+@dataclass
+class University:
+    professor_ids: List[int] = field(default_factory=list)
+    course_ids: List[int] = field(default_factory=list)
+    classroom_ids: List[int] = field(default_factory=list)
+    assignments: List[Tuple[int, int]] = field(default_factory=list)
+
+
+def sqlite_engine() -> Engine:
+    """In-memory SQLite stand-in for MySQL, migrated to the current schema."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    upgrade(engine)
+    return engine
+
+
+def generate_university(
+    db: Session,
+    professors: int,
+    seed: int = 0,
+    courses_per_professor: Tuple[int, int] = (2, 5),
+    professors_per_classroom: int = 3,
+    equipment_ratio: float = 0.25,
+    max_restrictions: int = 4,
+) -> University:
+    """
+    Insert a reproducible synthetic university: professors, courses (about
+    1.5 per professor), classrooms, restrictions and professor/course
+    assignments. Rows are written with batched inserts.
+    """
+    rnd = random.Random(seed)
+    courses = max(1, professors * 3 // 2)
+    classrooms = max(1, professors // professors_per_classroom)
+
+    db.execute(insert(ProfessorModel), [
+        {"name": f"Professor {i}", "document_id": f"BENCH-{seed}-{i}"} for i in range(professors)
+    ])
+    db.execute(insert(CourseModel), [
+        {
+            "code": f"B{seed}-{i}",
+            "name": f"Course {i}",
+            "weekly_hours": rnd.choice([3, 4]),
+            "requires_equipment": rnd.random() < equipment_ratio,
+        }
+        for i in range(courses)
+    ])
+    db.execute(insert(ClassroomModel), [
+        {
+            "name": f"Room {seed}-{i}",
+            "has_equipment": rnd.random() < equipment_ratio * 1.5,
+            "capacity": rnd.choice([20, 30, 40, 60]),
+        }
+        for i in range(classrooms)
+    ])
+    university = University(
+        professor_ids=[row[0] for row in db.query(ProfessorModel.id).order_by(ProfessorModel.id)],
+        course_ids=[row[0] for row in db.query(CourseModel.id).order_by(CourseModel.id)],
+        classroom_ids=[row[0] for row in db.query(ClassroomModel.id).order_by(ClassroomModel.id)],
+    )
+
+    restrictions = []
+    masks = []
+    for professor_id in university.professor_ids:
+        count = min(len(university.course_ids), rnd.randint(*courses_per_professor))
+        for course_id in rnd.sample(university.course_ids, count):
+            university.assignments.append((professor_id, course_id))
+        slots = {
+            (rnd.choice(list(WeekDay)), rnd.choice(RESTRICTABLE_BLOCKS))
+            for _ in range(rnd.randint(0, max_restrictions))
+        }
+        restrictions.extend(
+            {"professor_id": professor_id, "weekday": weekday, "time_block": time_block}
+            for weekday, time_block in slots
+        )
+        if slots:
+            masks.append({"professor_id": professor_id, "mask": restriction_mask(slots)})
+    db.execute(insert(professor_course_association), [
+        {"professor_id": professor_id, "course_id": course_id}
+        for professor_id, course_id in university.assignments
+    ])
+    if restrictions:
+        db.execute(insert(ProfessorRestrictionModel), restrictions)
+        db.execute(
+            update(ProfessorModel.__table__)
+            .where(ProfessorModel.id == bindparam("professor_id"))
+            .values(restriction_mask=bindparam("mask")),
+            masks
+        )
+    db.commit()
+    return university
@@ -0,0 +1,117 @@
+import random
+import sys
+import threading
+from typing import Callable, Dict, List
+
+from models import WeekDay
+from occupancy import OccupancyIndex
+from refcache import ReferenceCache
+
+RaceCheck = Callable[[int, int], List[str]]
+
+
+def _hammer(threads: int, work: Callable[[int], None]) -> List[str]:
+    """Run work(number) on every thread at once; returns the exceptions raised, one line each."""
+    errors: List[str] = []
+    start_line = threading.Barrier(threads)
+
+    def run(number: int) -> None:
+        start_line.wait()
+        try:
+            work(number)
+        except Exception as exc:
+            errors.append(f"thread {number}: {type(exc).__name__}: {exc}")
+
+    pool = [threading.Thread(target=run, args=(number,)) for number in range(threads)]
+    # Switch threads as often as possible so unguarded iteration gets interrupted
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    return errors
+
+
+def occupancy_race(threads: int = 8, rounds: int = 3000) -> List[str]:
+    """
+    Half the threads book and cancel sessions in one shared OccupancyIndex
+    while the other half run conflict checks, free-classroom searches,
+    discard_where and items() against the same few professors and rooms.
+    """
+    index = OccupancyIndex()
+    weekdays = list(WeekDay)
+
+    def work(number: int) -> None:
+        rnd = random.Random(number)
+        for step in range(rounds):
+            weekday = rnd.choice(weekdays)
+            start = rnd.randrange(8 * 60, 20 * 60, 5)
+            if number % 2 == 0:
+                entry_id = (number, step % 50)
+                if rnd.random() < 0.6:
+                    index.add(entry_id, rnd.randrange(3), rnd.randrange(3), weekday, start, start + 120, rnd.randrange(3))
+                else:
+                    index.remove(entry_id)
+            else:
+                index.professor_conflict(rnd.randrange(3), weekday, start, start + 60, ignore=(0, 1))
+                index.classroom_conflict(rnd.randrange(3), weekday, start, start + 60)
+                list(index.free_classrooms(range(3), weekday, start, start + 60))
+                sum(1 for _ in index.items())
+                if step % 100 == 0:
+                    index.discard_where(course_id=rnd.randrange(3))
+
+    return _hammer(threads, work)
+
+
+def refcache_race(threads: int = 8, rounds: int = 3000) -> List[str]:
+    """
+    A reader thread loads a row while the writer changes it and invalidates
+    the cache (by key, by kind or all of it), the write landing between the
+    load and its store. The cache must then serve the written row, not the
+    one loaded before it.
+    """
+    cache = ReferenceCache()
+    stored = {"mask": 0}
+    invalidations = [
+        lambda: cache.invalidate("professor", 1),
+        lambda: cache.invalidate("professor"),
+        cache.clear,
+    ]
+    errors: List[str] = []
+    for step in range(max(1, rounds // 100)):
+        loading, written = threading.Event(), threading.Event()
+
+        def slow_load():
+            value = stored["mask"]
+            loading.set()
+            written.wait(5)
+            return value
+
+        cache.invalidate("professor", 1)
+        reader = threading.Thread(target=cache.get_or_load, args=("professor", 1, slow_load))
+        reader.start()
+        if not loading.wait(5):
+            return errors + ["the reader never started loading"]
+        stored["mask"] += 1
+        invalidations[step % len(invalidations)]()
+        written.set()
+        reader.join()
+        cached = cache.get_or_load("professor", 1, lambda: stored["mask"])
+        if cached != stored["mask"]:
+            errors.append(f"round {step}: cached mask {cached}, stored {stored['mask']}")
+    return errors
+
+
+CHECKS: Dict[str, RaceCheck] = {
+    "occupancy": occupancy_race,
+    "refcache": refcache_race,
+}
+
+
+def check(threads: int = 8, rounds: int = 3000) -> Dict[str, List[str]]:
+    """Errors of every race check by name; empty lists when all passed."""
+    return {name: race(threads, rounds) for name, race in CHECKS.items()}
@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import time as clock
+from datetime import datetime, time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import sqlalchemy
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks import api_load, budgets, races, stress
+from benchmarks.generator import generate_university, sqlite_engine
+from columnar import TimetableColumns
+from models import ProfessorModel, WeekDay
+from services import SchedulerService
+
+DEFAULT_SIZES = [50, 200, 1000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _stats(durations: List[float], errors: int) -> Dict[str, float]:
+    """Summarise per-call durations (seconds) in milliseconds."""
+    ordered = sorted(durations) or [0.0]
+
+    def percentile(fraction: float) -> float:
+        return round(ordered[round(fraction * (len(ordered) - 1))] * 1000, 4)
+
+    return {
+        "calls": len(durations),
+        "errors": errors,
+        "total_ms": round(sum(ordered) * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "max_ms": percentile(1.0),
+    }
+
+
+def _time_calls(call: Callable, arguments: Iterable[tuple]) -> Dict[str, float]:
+    """Time every call; ValueError is a rule rejection and still counts as a call."""
+    durations: List[float] = []
+    errors = 0
+    for args in arguments:
+        started = clock.perf_counter()
+        try:
+            call(*args)
+        except ValueError:
+            errors += 1
+        durations.append(clock.perf_counter() - started)
+    return _stats(durations, errors)
+
+
+def _time_once(call: Callable, *args) -> Dict[str, float]:
+    return _time_calls(call, [args])
+
+
+def benchmark_size(
+    professors: int,
+    calls: int,
+    seed: int,
+    use_occupancy_index: bool,
+    use_reference_cache: bool = False
+) -> Dict[str, Dict]:
+    """Build a fresh university of the given size and time the service hot paths."""
+    engine = sqlite_engine()
+    db = sessionmaker(bind=engine)()
+    rnd = random.Random(seed)
+    results: Dict[str, Dict] = {}
+    SchedulerService.drop_occupancy_index()
+    SchedulerService.disable_reference_cache()
+    try:
+        started = clock.perf_counter()
+        university = generate_university(db, professors, seed)
+        results["generate_university"] = _stats([clock.perf_counter() - started], 0)
+
+        # Leave a tenth of the professors unscheduled for schedule_course_session
+        held_out = set(rnd.sample(university.professor_ids, max(1, len(university.professor_ids) // 10)))
+        scheduled = [p for p in university.professor_ids if p not in held_out]
+        results["auto_schedule"] = _time_once(SchedulerService.auto_schedule, db, scheduled)
+        if use_occupancy_index:
+            results["load_occupancy_index"] = _time_once(SchedulerService.load_occupancy_index, db)
+        if use_reference_cache:
+            SchedulerService.enable_reference_cache()
+
+        pending = [(p, c) for p, c in university.assignments if p in held_out]
+
+        def session_args():
+            for _ in range(calls):
+                professor_id, course_id = rnd.choice(pending)
+                hours = rnd.choice([2, 3])
+                start = rnd.randrange(8, 22 - hours)
+                yield (
+                    db, course_id, professor_id, rnd.choice(university.classroom_ids),
+                    rnd.choice(list(WeekDay)), time(start, 0), time(start + hours, 0)
+                )
+
+        results["schedule_course_session"] = _time_calls(SchedulerService.schedule_course_session, session_args())
+
+        def conflict_args():
+            for _ in range(calls):
+                start = rnd.randrange(8, 20)
+                yield (
+                    db, rnd.choice(university.professor_ids), rnd.choice(university.classroom_ids),
+                    rnd.choice(list(WeekDay)), time(start, 0), time(start + 2, 0)
+                )
+
+        results["_check_scheduling_conflicts"] = _time_calls(
+            SchedulerService._check_scheduling_conflicts, conflict_args()
+        )
+        results["validate_course_scheduling"] = _time_calls(
+            SchedulerService.validate_course_scheduling,
+            ((db, rnd.choice(university.course_ids)) for _ in range(calls))
+        )
+        results["find_available_slots"] = _time_calls(
+            SchedulerService.find_available_slots,
+            ((db, course_id, professor_id) for professor_id, course_id in rnd.sample(pending, min(calls, len(pending))))
+        )
+        results["validate_all_courses"] = _time_once(SchedulerService.validate_all_courses, db)
+
+        def room_requests():
+            for professor_id, course_id in pending:
+                start = rnd.randrange(8, 19)
+                yield (course_id, professor_id, rnd.choice(list(WeekDay)), time(start, 0), time(start + 2, 0))
+
+        results["assign_classrooms (dry run)"] = _time_once(
+            SchedulerService.assign_classrooms, db, list(room_requests()), True
+        )
+        results["optimize_timetable (5000 moves, dry run)"] = _time_once(
+            lambda: SchedulerService.optimize_timetable(db, max_iterations=5000, seed=seed, dry_run=True)
+        )
+
+        # Fresh professors so most assignments succeed instead of hitting the six-course cap
+        newcomers = [
+            SchedulerService.add_professor(db, f"Newcomer {i}", f"BENCH-NEW-{seed}-{i}").id
+            for i in range(max(1, calls // 4))
+        ]
+        results["assign_course_to_professor"] = _time_calls(
+            SchedulerService.assign_course_to_professor,
+            ((db, rnd.choice(newcomers), rnd.choice(university.course_ids)) for _ in range(calls))
+        )
+
+        list_calls = max(1, calls // 20)
+        for name in (
+            "get_schedules", "get_professors", "get_courses", "get_classrooms",
+            "list_schedules", "list_professors", "list_courses", "list_classrooms",
+        ):
+            method = getattr(SchedulerService, name)
+
+            def fresh_call(method=method):
+                # Start from an empty identity map so ORM hydration is measured too
+                db.expunge_all()
+                return method(db)
+
+            results[name] = _time_calls(fresh_call, (() for _ in range(list_calls)))
+
+        def walk_pages():
+            page = SchedulerService.page_schedules(db, limit=500)
+            while page.next_after is not None:
+                page = SchedulerService.page_schedules(db, after_id=page.next_after, limit=500)
+
+        results["page_schedules (all pages)"] = _time_once(walk_pages)
+        results["iter_schedules"] = _time_once(lambda: sum(1 for _ in SchedulerService.iter_schedules(db)))
+        results["TimetableColumns.load"] = _time_once(TimetableColumns.load, db)
+        results["row_counts"] = {
+            "professors": db.query(ProfessorModel).count(),
+            "schedules": len(SchedulerService.list_schedules(db)),
+            "assignments": len(university.assignments),
+        }
+    finally:
+        SchedulerService.drop_occupancy_index()
+        SchedulerService.disable_reference_cache()
+        db.close()
+        engine.dispose()
+    return results
+
+
+def run(sizes: List[int], calls: int, seed: int, use_occupancy_index: bool, use_reference_cache: bool = False) -> Dict:
+    """Benchmark every size and return a JSON-serialisable report."""
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "seed": seed,
+        "calls": calls,
+        "occupancy_index": use_occupancy_index,
+        "reference_cache": use_reference_cache,
+        "sizes": {},
+    }
+    for size in sizes:
+        report["sizes"][str(size)] = benchmark_size(size, calls, seed, use_occupancy_index, use_reference_cache)
+    return report
+
+
+def compare(baseline: Dict, candidate: Dict) -> List[str]:
+    """Mean latency ratio (candidate / baseline) for every shared size and operation."""
+    lines = []
+    for size, operations in candidate["sizes"].items():
+        for name, stats in operations.items():
+            before = baseline["sizes"].get(size, {}).get(name)
+            if not before or "mean_ms" not in stats or not before.get("mean_ms"):
+                continue
+            ratio = stats["mean_ms"] / before["mean_ms"]
+            lines.append(f"{size:>6} {name:<30} {before['mean_ms']:>10.3f} ms -> {stats['mean_ms']:>10.3f} ms  x{ratio:.2f}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="SchedulerService benchmarks")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and save a JSON report")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Professor counts")
+    run_parser.add_argument("--calls", type=int, default=200, help="Calls per timed operation")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--occupancy-index", action="store_true", help="Check conflicts with OccupancyIndex")
+    run_parser.add_argument("--reference-cache", action="store_true", help="Cache reference rows in SchedulerService")
+    run_parser.add_argument("--output", help="Report path (defaults to benchmarks/results/<timestamp>.json)")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two saved reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+
+    budgets_parser = subparsers.add_parser("budgets", help="Check the SQL statement budget of every service method")
+    budgets_parser.add_argument("--seed", type=int, default=0)
+    budgets_parser.add_argument("--occupancy-index", action="store_true", help="Check conflicts with OccupancyIndex")
+    budgets_parser.add_argument("--reference-cache", action="store_true", help="Cache reference rows in SchedulerService")
+
+    stress_parser = subparsers.add_parser("stress", help="Book sessions from many threads and check for double bookings")
+    stress_parser.add_argument("--threads", type=int, default=16)
+    stress_parser.add_argument("--bookings", type=int, default=800, help="Booking calls across all threads")
+    stress_parser.add_argument("--seed", type=int, default=0)
+    stress_parser.add_argument("--url", help="Database to book into (defaults to a temporary SQLite file)")
+    stress_parser.add_argument("--occupancy-index", action="store_true", help="Check conflicts with OccupancyIndex")
+
+    api_parser = subparsers.add_parser("api", help="Load test the HTTP API in-process against a temporary SQLite file")
+    api_parser.add_argument("--clients", type=int, default=32, help="Concurrent clients")
+    api_parser.add_argument("--requests", type=int, default=2000, help="Requests across all clients")
+    api_parser.add_argument("--professors", type=int, default=60)
+    api_parser.add_argument("--workers", type=int, help="API worker threads (defaults to API_WORKERS)")
+    api_parser.add_argument("--seed", type=int, default=0)
+
+    races_parser = subparsers.add_parser("races", help="Share in-memory structures between threads and report errors")
+    races_parser.add_argument("--threads", type=int, default=8)
+    races_parser.add_argument("--rounds", type=int, default=3000, help="Operations per thread")
+
+    args = parser.parse_args(argv)
+    if args.command == "races":
+        failed = False
+        for name, errors in races.check(args.threads, args.rounds).items():
+            print(f"{name:<12} {'ok' if not errors else f'{len(errors)} errors, e.g. {errors[0]}'}")
+            failed = failed or bool(errors)
+        if failed:
+            raise SystemExit(1)
+        return
+    if args.command == "api":
+        report = api_load.load_test(args.clients, args.requests, args.professors, args.seed, args.workers)
+        print(f"{report['requests']} requests from {report['clients']} clients in {report['seconds']:.2f} s "
+              f"({report['requests_per_second']:.0f} requests/s)")
+        for name, stats in report["endpoints"].items():
+            statuses = ", ".join(f"{status}: {count}" for status, count in stats["statuses"].items())
+            print(f"  {name:<32} p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  ({statuses})")
+        if report["overlaps"]:
+            print(f"{len(report['overlaps'])} double bookings, e.g. schedules {report['overlaps'][:5]}")
+            raise SystemExit(1)
+        return
+    if args.command == "stress":
+        report = stress.stress(args.threads, args.bookings, args.seed, args.url, args.occupancy_index)
+        print(
+            f"{report.threads} threads: {report.attempts} sessions requested, {report.booked} booked, "
+            f"{report.rejected} rejected, {report.busy} gave up after retries in {report.seconds:.2f} s "
+            f"({report.booked / report.seconds:.0f} bookings/s)"
+        )
+        if report.overlaps:
+            print(f"{len(report.overlaps)} double bookings, e.g. schedules {report.overlaps[:5]}")
+            raise SystemExit(1)
+        print("No double bookings")
+        return
+    if args.command == "budgets":
+        counts, failures = budgets.check(args.seed, args.occupancy_index, args.reference_cache)
+        sizes = " / ".join(str(professors) for professors, _ in budgets.WORLDS)
+        print(f"{'method':<30} {'budget':>6}  statements at {sizes} professors")
+        for name, measured in counts.items():
+            print(f"{name:<30} {budgets.BUDGETS[name].statements:>6}  {' / '.join(map(str, measured))}")
+        if failures:
+            print("\n".join(["", "Over budget:", *failures]))
+            raise SystemExit(1)
+        return
+    if args.command == "compare":
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        with open(args.candidate) as handle:
+            candidate = json.load(handle)
+        print("\n".join(compare(baseline, candidate)))
+        return
+    if args.command is None:
+        args = parser.parse_args(["run"])
+
+    report = run(args.sizes, args.calls, args.seed, args.occupancy_index, args.reference_cache)
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(report, handle, indent=2)
+
+    for size, operations in report["sizes"].items():
+        print(f"professors={size}")
+        for name, stats in operations.items():
+            if "mean_ms" in stats:
+                print(f"  {name:<30} {stats['calls']:>6} calls  mean {stats['mean_ms']:>9.3f} ms  p95 {stats['p95_ms']:>9.3f} ms")
+    print(f"Saved {output}")
@@ -0,0 +1,142 @@
+import os
+import random
+import tempfile
+import threading
+import time as clock
+from datetime import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, create_engine, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased, sessionmaker
+
+from benchmarks.generator import generate_university
+from errors import BusyError
+from migrations import upgrade
+from models import CourseModel, ScheduleModel, WeekDay
+from services import SchedulerService
+from timeslots import block_hours
+
+# Few rooms and a narrow window of start hours, so most bookings compete for the same resource-days
+CONTESTED_STARTS = [8, 9, 10, 11]
+
+
+class StressReport(NamedTuple):
+    threads: int
+    attempts: int
+    booked: int
+    # Refused by a scheduling rule, conflicts included
+    rejected: int
+    # Gave up after every retry (booking.with_retries)
+    busy: int
+    seconds: float
+    # (schedule id, schedule id) pairs sharing a professor or a classroom at the same time
+    overlaps: List[Tuple[int, int]]
+
+
+def _engine(url: Optional[str], threads: int) -> Tuple[Engine, Optional[str]]:
+    """The engine under test; without a URL a temporary SQLite file, returned so it can be removed."""
+    path = None
+    if url is None:
+        handle, path = tempfile.mkstemp(prefix="scheduler-stress-", suffix=".db")
+        os.close(handle)
+        url = f"sqlite:///{path}"
+    if url.startswith("sqlite"):
+        engine = create_engine(
+            url, connect_args={"check_same_thread": False, "timeout": 30}, pool_size=threads, max_overflow=0
+        )
+    else:
+        engine = create_engine(url, pool_size=threads, max_overflow=0)
+    upgrade(engine)
+    return engine, path
+
+
+def find_overlaps(db) -> List[Tuple[int, int]]:
+    """Every pair of sessions that double-books a professor or a classroom."""
+    first, second = aliased(ScheduleModel), aliased(ScheduleModel)
+    return [tuple(row) for row in db.execute(
+        select(first.id, second.id).join(second, and_(
+            first.id < second.id,
+            first.weekday == second.weekday,
+            or_(first.professor_id == second.professor_id, first.classroom_id == second.classroom_id),
+            first.start_time < second.end_time,
+            first.end_time > second.start_time
+        ))
+    )]
+
+
+def stress(
+    threads: int = 16,
+    bookings: int = 800,
+    seed: int = 0,
+    url: Optional[str] = None,
+    use_occupancy_index: bool = False
+) -> StressReport:
+    """
+    Book sessions from many threads at once, each with its own session, and
+    count the double bookings left in the schedules table. One call in four
+    books three sessions through schedule_course_sessions_bulk.
+    """
+    engine, path = _engine(url, threads)
+    make_session = sessionmaker(bind=engine)
+    SchedulerService.drop_occupancy_index()
+    try:
+        with make_session() as db:
+            university = generate_university(db, 12, seed, (3, 5), professors_per_classroom=3)
+            hours = dict(db.query(CourseModel.id, CourseModel.weekly_hours))
+            if use_occupancy_index:
+                SchedulerService.load_occupancy_index(db)
+
+        counts = {"attempts": 0, "booked": 0, "rejected": 0, "busy": 0}
+        counts_lock = threading.Lock()
+        start_line = threading.Barrier(threads)
+
+        def random_session(rnd: random.Random) -> tuple:
+            professor_id, course_id = rnd.choice(university.assignments)
+            start = rnd.choice(CONTESTED_STARTS)
+            return (
+                course_id, professor_id, rnd.choice(university.classroom_ids), rnd.choice(list(WeekDay)),
+                time(start, 0), time(start + block_hours(hours[course_id]), 0)
+            )
+
+        def worker(number: int) -> None:
+            rnd = random.Random(seed * 1000 + number)
+            tally = dict.fromkeys(counts, 0)
+            with make_session() as db:
+                start_line.wait()
+                for _ in range(bookings // threads):
+                    try:
+                        if rnd.random() < 0.25:
+                            report = SchedulerService.schedule_course_sessions_bulk(
+                                db, [random_session(rnd) for _ in range(3)]
+                            )
+                            booked = sum(item.accepted for item in report)
+                            tally["attempts"] += len(report)
+                            tally["booked"] += booked
+                            tally["rejected"] += len(report) - booked
+                        else:
+                            tally["attempts"] += 1
+                            SchedulerService.schedule_course_session(db, *random_session(rnd))
+                            tally["booked"] += 1
+                    except ValueError as exc:
+                        tally["busy" if isinstance(exc, BusyError) else "rejected"] += 1
+            with counts_lock:
+                for key, value in tally.items():
+                    counts[key] += value
+
+        pool = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+        started = clock.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        seconds = clock.perf_counter() - started
+
+        with make_session() as db:
+            overlaps = find_overlaps(db)
+        return StressReport(threads, seconds=round(seconds, 3), overlaps=overlaps, **counts)
+    finally:
+        SchedulerService.drop_occupancy_index()
+        engine.dispose()
+        if path is not None:
+            os.unlink(path)
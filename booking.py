@@ -0,0 +1,154 @@
+import random
+import time
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Set, Tuple, TypeVar
+
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session
+
+import config
+from errors import BusyError
+from models import BookingLockModel, WeekDay
+
+T = TypeVar("T")
+
+
+class ResourceDay(NamedTuple):
+    # "professor" or "classroom"
+    resource: str
+    resource_id: int
+    weekday: WeekDay
+
+
+def booking_keys(professor_id: int, classroom_id: int, weekday: WeekDay) -> Tuple[ResourceDay, ResourceDay]:
+    """The resource-days a session occupies."""
+    return ResourceDay("professor", professor_id, weekday), ResourceDay("classroom", classroom_id, weekday)
+
+
+class StaleBooking(Exception):
+    """Another writer booked one of the resource-days after they were read; the attempt must start over."""
+
+
+class BookingVersions:
+    """
+    Versions of the booking_locks rows of some resource-days, read before the
+    conflict checks of a booking. claim() bumps them in the booking's own
+    transaction only if they are still the versions read (compare-and-set), so
+    of two writers that checked one resource-day against the same state only
+    the first to claim it can commit. Writers on other resource-days never wait
+    for each other.
+    """
+
+    def __init__(self, rows: Dict[ResourceDay, Tuple[int, int]], keys: Optional[Set[ResourceDay]] = None):
+        # Resource-day -> (lock row id, version); keys is None when every row was read
+        self._rows = rows
+        self._keys = keys
+
+    @classmethod
+    def read(cls, db: Session, keys: Optional[Iterable[ResourceDay]] = None) -> "BookingVersions":
+        """Read the lock rows of the given resource-days, or of every resource-day."""
+        stmt = select(
+            BookingLockModel.id,
+            BookingLockModel.resource,
+            BookingLockModel.resource_id,
+            BookingLockModel.weekday,
+            BookingLockModel.version
+        )
+        if keys is not None:
+            keys = set(keys)
+            if not keys:
+                return cls({}, keys)
+            # One IN per (resource, weekday) rather than a row-value IN, which SQLite
+            # cannot serve from the index; at most a dozen branches however many keys
+            ids_by_day = _group(keys, lambda key: (key.resource, key.weekday), lambda key: key.resource_id)
+            stmt = stmt.where(or_(*(
+                and_(
+                    BookingLockModel.resource == resource,
+                    BookingLockModel.weekday == weekday,
+                    BookingLockModel.resource_id.in_(ids)
+                )
+                for (resource, weekday), ids in ids_by_day.items()
+            )))
+        rows = {
+            ResourceDay(row.resource, row.resource_id, row.weekday): (row.id, row.version)
+            for row in db.execute(stmt)
+        }
+        return cls(rows, keys)
+
+    def version(self, key: ResourceDay) -> int:
+        """Version read for a resource-day; 0 when it had no lock row yet."""
+        row = self._rows.get(key)
+        return 0 if row is None else row[1]
+
+    def versions(self) -> Dict[ResourceDay, int]:
+        return {key: version for key, (_, version) in self._rows.items()}
+
+    def claim(self, db: Session, keys: Iterable[ResourceDay]) -> Dict[ResourceDay, int]:
+        """
+        Bump the lock rows of keys (creating missing ones) in the current
+        transaction and return their new versions. Raises StaleBooking when a
+        row changed or appeared since read(); the caller rolls back and retries.
+        """
+        keys = set(keys)
+        if self._keys is not None and not keys <= self._keys:
+            raise ValueError("Only resource-days that were read can be claimed")
+        existing = [key for key in keys if key in self._rows]
+        missing = [key for key in keys if key not in self._rows]
+        if existing:
+            ids_by_version = _group(existing, lambda key: self._rows[key][1], lambda key: self._rows[key][0])
+            result = db.execute(
+                update(BookingLockModel)
+                .where(or_(*(
+                    and_(BookingLockModel.version == version, BookingLockModel.id.in_(ids))
+                    for version, ids in ids_by_version.items()
+                )))
+                .values(version=BookingLockModel.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != len(existing):
+                raise StaleBooking("A resource-day was booked by someone else")
+        if missing:
+            try:
+                db.execute(insert(BookingLockModel), [
+                    {"resource": key.resource, "resource_id": key.resource_id, "weekday": key.weekday, "version": 1}
+                    for key in missing
+                ])
+            except IntegrityError as exc:
+                # Someone else booked the resource-day first
+                raise StaleBooking("A resource-day was booked by someone else") from exc
+        claimed = {key: self._rows[key][1] + 1 for key in existing}
+        claimed.update(dict.fromkeys(missing, 1))
+        return claimed
+
+
+def _group(keys: Iterable[ResourceDay], by: Callable, value: Callable) -> Dict:
+    groups: Dict = {}
+    for key in keys:
+        groups.setdefault(by(key), []).append(value(key))
+    return groups
+
+
+def _is_lock_error(exc: OperationalError) -> bool:
+    # SQLite "database is locked", MySQL deadlocks (1213) and lock wait timeouts (1205)
+    return "lock" in str(exc.orig).lower()
+
+
+def with_retries(db: Session, attempt: Callable[[], T], attempts: Optional[int] = None) -> T:
+    """
+    Run attempt() until it returns. A lost race (StaleBooking) or a lock
+    error rolls the session back and starts over after a short jittered
+    backoff; after the last attempt the caller gets a ValueError.
+    """
+    attempts = config.BOOKING_ATTEMPTS if attempts is None else attempts
+    if attempts <= 0:
+        raise ValueError("Attempts must be a positive integer")
+    for number in range(1, attempts + 1):
+        try:
+            return attempt()
+        except (StaleBooking, OperationalError) as exc:
+            if isinstance(exc, OperationalError) and not _is_lock_error(exc):
+                raise
+            db.rollback()
+            if number == attempts:
+                raise BusyError("The timetable is busy with other changes, try again") from exc
+            time.sleep(random.uniform(0, config.BOOKING_BACKOFF_SECONDS * 2 ** number))
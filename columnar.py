@@ -0,0 +1,174 @@
+from datetime import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from sqlalchemy import extract, select
+from sqlalchemy.orm import Session
+
+from models import ScheduleModel, WeekDay
+from timeslots import DAY_START_MINUTES, from_minutes, to_minutes
+
+WEEKDAYS = list(WeekDay)
+_DAY_INDEX = {day: index for index, day in enumerate(WEEKDAYS)}
+
+# Column name -> dtype; times are minutes from opening (08:00)
+COLUMNS = {
+    "schedule_id": np.int32,
+    "course_id": np.int32,
+    "professor_id": np.int32,
+    "classroom_id": np.int32,
+    "weekday": np.int8,
+    "start": np.int16,
+    "end": np.int16,
+}
+
+
+def _minutes_from_opening(column):
+    return extract("hour", column) * 60 + extract("minute", column) - DAY_START_MINUTES
+
+
+class TimetableColumns:
+    """
+    The timetable as parallel NumPy arrays, one per column of COLUMNS (about
+    20 bytes per session). weekday holds the position in WeekDay; start and end
+    are minutes from 08:00. Arrays of the right dtype are used as given, so
+    from_numpy() and to_numpy() never copy. Filters return a new instance.
+    """
+
+    def __init__(self, **columns: np.ndarray):
+        if set(columns) != set(COLUMNS):
+            raise ValueError(f"Columns must be exactly {', '.join(COLUMNS)}")
+        arrays = {name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()}
+        lengths = {len(array) for array in arrays.values()}
+        if len(lengths) > 1 or any(array.ndim != 1 for array in arrays.values()):
+            raise ValueError("Columns must be one-dimensional and of equal length")
+        self.schedule_id = arrays["schedule_id"]
+        self.course_id = arrays["course_id"]
+        self.professor_id = arrays["professor_id"]
+        self.classroom_id = arrays["classroom_id"]
+        self.weekday = arrays["weekday"]
+        self.start = arrays["start"]
+        self.end = arrays["end"]
+
+    @classmethod
+    def load(cls, db: Session, *criteria) -> "TimetableColumns":
+        """Build from one SELECT of the schedule columns, optionally filtered by SQL criteria."""
+        stmt = select(
+            ScheduleModel.id,
+            ScheduleModel.course_id,
+            ScheduleModel.professor_id,
+            ScheduleModel.classroom_id,
+            ScheduleModel.weekday,
+            _minutes_from_opening(ScheduleModel.start_time),
+            _minutes_from_opening(ScheduleModel.end_time)
+        ).order_by(ScheduleModel.id)
+        if criteria:
+            stmt = stmt.where(*criteria)
+        rows = db.execute(stmt).all()
+        if not rows:
+            return cls.empty()
+        ids, courses, professors, classrooms, weekdays, starts, ends = zip(*rows)
+        return cls(
+            schedule_id=ids,
+            course_id=courses,
+            professor_id=professors,
+            classroom_id=classrooms,
+            weekday=np.fromiter((_DAY_INDEX[day] for day in weekdays), dtype=np.int8, count=len(rows)),
+            start=starts,
+            end=ends
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, Optional[int], int, int, WeekDay, int, int]]) -> "TimetableColumns":
+        """
+        Build from (schedule_id, course_id, professor_id, classroom_id, weekday,
+        start, end) tuples with minutes since midnight, as OccupancyIndex keeps
+        them. A missing course id becomes -1.
+        """
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        ids, courses, professors, classrooms, weekdays, starts, ends = zip(*rows)
+        return cls(
+            schedule_id=ids,
+            course_id=[-1 if course is None else course for course in courses],
+            professor_id=professors,
+            classroom_id=classrooms,
+            weekday=[_DAY_INDEX[day] for day in weekdays],
+            start=np.array(starts) - DAY_START_MINUTES,
+            end=np.array(ends) - DAY_START_MINUTES
+        )
+
+    @classmethod
+    def from_numpy(cls, arrays: Dict[str, np.ndarray]) -> "TimetableColumns":
+        """Wrap existing arrays (no copy when they already have the COLUMNS dtypes)."""
+        return cls(**arrays)
+
+    @classmethod
+    def empty(cls) -> "TimetableColumns":
+        return cls(**{name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()})
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """The column arrays themselves, by name."""
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.schedule_id)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.to_numpy().values())
+
+    def take(self, selector: np.ndarray) -> "TimetableColumns":
+        """Rows picked by a boolean mask or an index array."""
+        return TimetableColumns(**{name: array[selector] for name, array in self.to_numpy().items()})
+
+    def mask(
+        self,
+        course_id: Optional[int] = None,
+        professor_id: Optional[int] = None,
+        classroom_id: Optional[int] = None,
+        weekday: Optional[WeekDay] = None
+    ) -> np.ndarray:
+        """Boolean mask of the rows matching every given value."""
+        selected = np.ones(len(self), dtype=bool)
+        for column, value in (
+            (self.course_id, course_id),
+            (self.professor_id, professor_id),
+            (self.classroom_id, classroom_id),
+            (self.weekday, None if weekday is None else _DAY_INDEX[weekday]),
+        ):
+            if value is not None:
+                selected &= column == value
+        return selected
+
+    def where(self, **equals: Union[int, WeekDay]) -> "TimetableColumns":
+        """Rows matching every given column value, e.g. where(professor_id=3, weekday=WeekDay.MONDAY)."""
+        return self.take(self.mask(**equals))
+
+    def overlapping(self, weekday: WeekDay, start_time: time, end_time: time) -> np.ndarray:
+        """Boolean mask of the sessions overlapping [start_time, end_time) on weekday."""
+        start = to_minutes(start_time) - DAY_START_MINUTES
+        end = to_minutes(end_time) - DAY_START_MINUTES
+        return (self.weekday == _DAY_INDEX[weekday]) & (self.start < end) & (self.end > start)
+
+    def count_by(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(distinct values of a column, number of sessions for each)."""
+        keys, inverse = np.unique(getattr(self, column), return_inverse=True)
+        return keys, np.bincount(inverse, minlength=len(keys))
+
+    def minutes_by(self, column: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(distinct values of a column, scheduled minutes for each)."""
+        keys, inverse = np.unique(getattr(self, column), return_inverse=True)
+        minutes = (self.end.astype(np.int32) - self.start).astype(np.int64)
+        return keys, np.bincount(inverse, weights=minutes, minlength=len(keys)).astype(np.int64)
+
+    def rows(self) -> Iterator[Tuple[int, int, int, int, WeekDay, time, time]]:
+        """Rows back as (schedule_id, course_id, professor_id, classroom_id, weekday, start_time, end_time)."""
+        for schedule_id, course, professor, classroom, day, start, end in zip(
+            *(array.tolist() for array in self.to_numpy().values())
+        ):
+            yield (
+                schedule_id, course, professor, classroom, WEEKDAYS[day],
+                from_minutes(start + DAY_START_MINUTES), from_minutes(end + DAY_START_MINUTES)
+            )
@@ -0,0 +1,13 @@
+class NotFoundError(ValueError):
+    """A professor, course, classroom or schedule ID that does not exist."""
+
+
+class ConflictError(ValueError):
+    """
+    The change clashes with what is stored: a duplicate, a double booking or
+    a concurrent change to the same rows.
+    """
+
+
+class BusyError(ValueError):
+    """Every booking attempt lost a race with other writers (booking.with_retries)."""
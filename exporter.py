@@ -0,0 +1,311 @@
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import time as clock
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import WeekDay
+from projections import ScheduleRow
+from services import SchedulerService
+
+FORMATS = ("csv", "json", "ical")
+ENTITIES = ("professors", "classrooms")
+
+CSV_COLUMNS = [
+    "id", "course_id", "course", "professor_id", "professor", "classroom_id", "classroom",
+    "weekday", "start_time", "end_time",
+]
+WEEKDAYS = list(WeekDay)
+_RRULE_DAYS = {day: day.value[:2].upper() for day in WeekDay}
+
+
+@dataclass
+class Term:
+    """First and last day of the term; iCalendar events repeat weekly between them."""
+    start: date
+    end: date
+
+    def first(self, weekday: WeekDay) -> date:
+        """First date of the term falling on weekday."""
+        return self.start + timedelta(days=(WEEKDAYS.index(weekday) - self.start.weekday()) % 7)
+
+
+@dataclass
+class ExportReport:
+    directory: str
+    formats: Tuple[str, ...]
+    # Rows of the master CSV
+    sessions: int = 0
+    files: int = 0
+    # Files per entity kind ("professors", "classrooms", "master")
+    per_entity: Dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+ProgressCallback = Callable[[ExportReport], None]
+
+
+def _row_values(row: ScheduleRow) -> list:
+    return [*row[:7], row.weekday.value, row.start_time.isoformat("minutes"), row.end_time.isoformat("minutes")]
+
+
+def _session_order(row: ScheduleRow) -> tuple:
+    return WEEKDAYS.index(row.weekday), row.start_time, row.id
+
+
+def render_csv(rows: Iterable[ScheduleRow]) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    writer.writerows(_row_values(row) for row in rows)
+    return out.getvalue()
+
+
+def render_json(rows: Iterable[ScheduleRow], title: str) -> str:
+    return json.dumps(
+        {"title": title, "sessions": [dict(zip(CSV_COLUMNS, _row_values(row))) for row in rows]},
+        ensure_ascii=False, indent=1
+    )
+
+
+def _ical_text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets as RFC 5545 requires, never inside a UTF-8 sequence."""
+    parts, current, size = [], "", 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            parts.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    parts.append(current)
+    return "\r\n".join(parts)
+
+
+def render_ical(rows: Iterable[ScheduleRow], title: str, term: Term, stamp: Optional[datetime] = None) -> str:
+    """
+    A calendar with one weekly event per session, repeating until the end of
+    the term. Times are floating (the local time of the university).
+    """
+    stamp = (stamp or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+    until = term.end.strftime("%Y%m%dT235959")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//timetable-scheduler//export//EN",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ical_text(title)}",
+    ]
+    for row in rows:
+        day = term.first(row.weekday)
+        if day > term.end:
+            continue
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:schedule-{row.id}@timetable-scheduler",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{datetime.combine(day, row.start_time):%Y%m%dT%H%M%S}",
+            f"DTEND:{datetime.combine(day, row.end_time):%Y%m%dT%H%M%S}",
+            f"RRULE:FREQ=WEEKLY;BYDAY={_RRULE_DAYS[row.weekday]};UNTIL={until}",
+            f"SUMMARY:{_ical_text(row.course_name)}",
+            f"LOCATION:{_ical_text(row.classroom_name)}",
+            f"DESCRIPTION:{_ical_text(f'Professor: {row.professor_name}')}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-").lower()[:60] or "unnamed"
+
+
+def write_entity(
+    directory: str,
+    kind: str,
+    entity_id: int,
+    name: str,
+    rows: List[ScheduleRow],
+    formats: Sequence[str],
+    term: Term
+) -> int:
+    """Write the files of one professor or classroom; runs in the worker processes. Returns the files written."""
+    rows = sorted(rows, key=_session_order)
+    base = os.path.join(directory, kind, f"{entity_id}-{_slug(name)}")
+    title = f"{name} ({kind[:-1]} {entity_id})"
+    for fmt in formats:
+        if fmt == "csv":
+            content = render_csv(rows)
+        elif fmt == "json":
+            content = render_json(rows, title)
+        else:
+            content = render_ical(rows, title, term)
+        # iCalendar lines already end in CRLF
+        with open(f"{base}.{'ics' if fmt == 'ical' else fmt}", "w", encoding="utf-8", newline="") as handle:
+            handle.write(content)
+    return len(formats)
+
+
+def write_entities(
+    directory: str,
+    kind: str,
+    groups: List[Tuple[int, str, List[ScheduleRow]]],
+    formats: Sequence[str],
+    term: Term
+) -> int:
+    """write_entity for a chunk of (entity id, name, sessions); one pool task per chunk."""
+    return sum(write_entity(directory, kind, entity_id, name, rows, formats, term) for entity_id, name, rows in groups)
+
+
+class TimetableExporter:
+    """
+    Writes one file per format for every professor and classroom with
+    sessions, plus a master CSV of every session. Rows are streamed from
+    SchedulerService.iter_entity_schedules / iter_schedules with the names
+    joined in, so nothing is lazy loaded and only one entity's sessions are
+    held in memory per pool task. Entities are rendered and written by a
+    process pool in chunks of about CHUNK_SESSIONS sessions, with at most a
+    few chunks per worker in flight.
+    """
+
+    # Sessions per pool task; one task per entity spends more time pickling than rendering
+    CHUNK_SESSIONS = 500
+
+    def __init__(
+        self,
+        db: Session,
+        directory: str,
+        term: Term,
+        formats: Sequence[str] = FORMATS,
+        workers: Optional[int] = None,
+        batch_size: int = 1000,
+        progress: Optional[ProgressCallback] = None
+    ):
+        unknown = set(formats) - set(FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown export formats: {', '.join(sorted(unknown))}")
+        if term.end < term.start:
+            raise ValueError("The term must end after it starts")
+        self.db = db
+        self.directory = directory
+        self.term = term
+        self.formats = tuple(formats)
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def export(self, entities: Sequence[str] = ENTITIES, master: bool = True) -> ExportReport:
+        started = clock.perf_counter()
+        report = ExportReport(self.directory, self.formats)
+        os.makedirs(self.directory, exist_ok=True)
+        if master:
+            report.sessions = self.write_master(os.path.join(self.directory, "schedules.csv"))
+            report.files += 1
+            report.per_entity["master"] = 1
+
+        # workers <= 1 renders in this process, which is quicker for small exports
+        pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            for kind in entities:
+                os.makedirs(os.path.join(self.directory, kind), exist_ok=True)
+                written = self._export_entities(kind, pool)
+                report.files += written
+                report.per_entity[kind] = written
+                if self.progress:
+                    self.progress(report)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        report.seconds = round(clock.perf_counter() - started, 3)
+        return report
+
+    def write_master(self, path: str) -> int:
+        """Stream every session into one CSV; returns the rows written."""
+        count = 0
+        with open(path, "w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(CSV_COLUMNS)
+            for row in SchedulerService.iter_schedules(self.db, self.batch_size):
+                writer.writerow(_row_values(row))
+                count += 1
+        return count
+
+    def _export_entities(self, kind: str, pool: Optional[ProcessPoolExecutor]) -> int:
+        written = 0
+        pending: Deque[Future] = deque()
+        for chunk in self._chunks(kind):
+            if pool is None:
+                written += write_entities(self.directory, kind, chunk, self.formats, self.term)
+                continue
+            # Bound the sessions waiting in the pool's queue
+            if len(pending) >= self.workers * 4:
+                written += pending.popleft().result()
+            pending.append(pool.submit(write_entities, self.directory, kind, chunk, self.formats, self.term))
+        while pending:
+            written += pending.popleft().result()
+        return written
+
+    def _chunks(self, kind: str) -> Iterator[List[Tuple[int, str, List[ScheduleRow]]]]:
+        chunk, sessions = [], 0
+        for group in self._groups(kind):
+            chunk.append(group)
+            sessions += len(group[2])
+            if sessions >= self.CHUNK_SESSIONS:
+                yield chunk
+                chunk, sessions = [], 0
+        if chunk:
+            yield chunk
+
+    def _groups(self, kind: str) -> Iterator[Tuple[int, str, List[ScheduleRow]]]:
+        """(entity id, entity name, sessions) of every professor or classroom with sessions."""
+        entity = kind[:-1]
+        rows = SchedulerService.iter_entity_schedules(self.db, entity, self.batch_size)
+        for entity_id, group in groupby(rows, key=lambda row: getattr(row, f"{entity}_id")):
+            sessions = list(group)
+            yield entity_id, getattr(sessions[0], f"{entity}_name"), sessions
+
+
+def main() -> None:
+    from session import get_db_session
+
+    today = date.today()
+    parser = argparse.ArgumentParser(description="Export the timetable per professor and per classroom")
+    parser.add_argument("directory")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--entities", nargs="+", choices=ENTITIES, default=list(ENTITIES))
+    parser.add_argument("--no-master", action="store_true", help="Skip the master schedules.csv")
+    parser.add_argument("--term-start", type=date.fromisoformat, default=today, help="YYYY-MM-DD")
+    parser.add_argument("--term-end", type=date.fromisoformat, help="YYYY-MM-DD (defaults to 16 weeks)")
+    parser.add_argument("--workers", type=int, help="Rendering processes (defaults to the CPU count)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    term = Term(args.term_start, args.term_end or args.term_start + timedelta(weeks=16, days=-1))
+
+    def progress(report: ExportReport) -> None:
+        print(f"{report.files} files written")
+
+    with get_db_session() as db:
+        exporter = TimetableExporter(db, args.directory, term, args.formats, args.workers, args.batch_size, progress)
+        report = exporter.export(args.entities, not args.no_master)
+
+    counts = ", ".join(f"{count} {kind}" for kind, count in report.per_entity.items())
+    print(f"{report.sessions} sessions, {report.files} files ({counts}) in {report.seconds:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
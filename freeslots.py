@@ -0,0 +1,114 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from columnar import WEEKDAYS, TimetableColumns
+from projections import ClassroomRow, SlotOption
+from timeslots import DAY_START_MINUTES, SLOT_MINUTES, SLOTS_PER_DAY, is_restricted, from_minutes
+
+
+def _busy_grid(resource: np.ndarray, day: np.ndarray, start: np.ndarray, end: np.ndarray, size: int) -> np.ndarray:
+    """
+    Boolean (resource, weekday, slot) grid of the slots touched by each
+    session (minutes from opening), rounding outwards. Candidate blocks start and end on slot
+    boundaries, so the rounded grid gives the same answer as the exact
+    interval test for sessions that do not.
+    """
+    first = np.clip(start // SLOT_MINUTES, 0, SLOTS_PER_DAY)
+    last = np.clip(-(-end // SLOT_MINUTES), 0, SLOTS_PER_DAY)
+    keep = last > first
+    # +1 where a session starts and -1 where it ends; the running sum is the number of sessions per slot
+    edges = np.zeros((size, len(WEEKDAYS), SLOTS_PER_DAY + 1), dtype=np.int32)
+    np.add.at(edges, (resource[keep], day[keep], first[keep]), 1)
+    np.add.at(edges, (resource[keep], day[keep], last[keep]), -1)
+    return np.cumsum(edges, axis=-1)[..., :SLOTS_PER_DAY] > 0
+
+
+def _free_windows(busy: np.ndarray, length: int) -> np.ndarray:
+    """True at every start slot whose next `length` slots are all free."""
+    counts = np.cumsum(busy, axis=-1, dtype=np.int32)
+    counts = np.concatenate([np.zeros(busy.shape[:-1] + (1,), dtype=np.int32), counts], axis=-1)
+    return counts[..., length:] - counts[..., :-length] == 0
+
+
+def find_free_slots(
+    course_id: int,
+    professor_id: int,
+    duration_minutes: int,
+    classrooms: Sequence[ClassroomRow],
+    sessions: TimetableColumns,
+    restriction_mask: int,
+    step_minutes: int = 60,
+    limit: Optional[int] = None,
+    skip_taught_days: bool = True
+) -> List[SlotOption]:
+    """
+    Every (classroom, weekday, start) where a block of the course fits: the
+    professor and the classroom are free, the start is not in a restricted
+    time block and the block ends by closing time. With skip_taught_days,
+    weekdays on which the professor already teaches the course are skipped,
+    as AutoScheduler does.
+    Ranked by the professor's load that day, then best-fitting classroom
+    (no spare equipment, smallest capacity), then weekday and start.
+    """
+    if step_minutes <= 0 or step_minutes % SLOT_MINUTES:
+        raise ValueError(f"Step minutes must be a positive multiple of {SLOT_MINUTES}")
+    length = -(-duration_minutes // SLOT_MINUTES)
+    starts = SLOTS_PER_DAY - length + 1
+    if not classrooms or starts <= 0:
+        return []
+
+    room_ids = np.array([room.id for room in classrooms])
+    room_order = np.argsort(room_ids)
+    sorted_ids = room_ids[room_order]
+
+    professor_busy = np.zeros((1, len(WEEKDAYS), SLOTS_PER_DAY), dtype=bool)
+    room_busy = np.zeros((len(classrooms), len(WEEKDAYS), SLOTS_PER_DAY), dtype=bool)
+    load = np.zeros(len(WEEKDAYS), dtype=np.int32)
+    allowed = np.ones((len(WEEKDAYS), starts), dtype=bool)
+    if len(sessions):
+        days = sessions.weekday.astype(np.intp)
+        begins = sessions.start.astype(np.int32)
+        ends = sessions.end.astype(np.int32)
+        rooms = sessions.classroom_id
+
+        mine = sessions.professor_id == professor_id
+        professor_busy = _busy_grid(np.zeros(mine.sum(), dtype=np.intp), days[mine], begins[mine], ends[mine], 1)
+        load = np.bincount(days[mine], minlength=len(WEEKDAYS))
+        if skip_taught_days:
+            allowed[np.unique(days[mine & (sessions.course_id == course_id)])] = False
+
+        position = np.minimum(np.searchsorted(sorted_ids, rooms), len(sorted_ids) - 1)
+        eligible = sorted_ids[position] == rooms
+        room_busy = _busy_grid(
+            room_order[position[eligible]], days[eligible], begins[eligible], ends[eligible], len(classrooms)
+        )
+
+    start_minutes = DAY_START_MINUTES + np.arange(starts) * SLOT_MINUTES
+    allowed &= ((start_minutes - DAY_START_MINUTES) % step_minutes == 0)[None, :]
+    if restriction_mask:
+        start_times = [from_minutes(int(minute)) for minute in start_minutes]
+        for d, weekday in enumerate(WEEKDAYS):
+            for t, start_time in enumerate(start_times):
+                if is_restricted(restriction_mask, weekday, start_time):
+                    allowed[d, t] = False
+
+    feasible = _free_windows(room_busy, length) & _free_windows(professor_busy, length) & allowed[None]
+    hit_room, hit_day, hit_start = np.nonzero(feasible)
+
+    # Only equipped rooms are offered when the course needs equipment, so this is then a tie
+    has_equipment = np.array([classroom.has_equipment for classroom in classrooms])
+    capacity = np.array([classroom.capacity for classroom in classrooms])
+    # np.lexsort sorts by the last key first
+    order = np.lexsort((
+        hit_start, hit_day, room_ids[hit_room], capacity[hit_room], has_equipment[hit_room], load[hit_day]
+    ))
+    if limit is not None:
+        order = order[:limit]
+    starts_at = [from_minutes(int(minute)) for minute in start_minutes]
+    ends_at = [from_minutes(int(minute) + duration_minutes) for minute in start_minutes]
+    ids = room_ids.tolist()
+    return [
+        SlotOption(ids[r], WEEKDAYS[d], starts_at[t], ends_at[t])
+        for r, d, t in zip(hit_room[order].tolist(), hit_day[order].tolist(), hit_start[order].tolist())
+    ]
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from datetime import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from models import WeekDay
+from projections import ClassroomRow, CourseRow, ProfessorRow, ScheduleRow
+
+MAGIC = b"TTSNAP"
+# Bump when the layout or a row codec changes; older files are then ignored
+FORMAT_VERSION = 2
+_PREFIX = struct.Struct("<6sHI")
+
+
+def _schedule_out(row: ScheduleRow) -> list:
+    return [*row[:7], row.weekday.value, row.start_time.isoformat(), row.end_time.isoformat()]
+
+
+def _schedule_in(values: list) -> ScheduleRow:
+    return ScheduleRow(
+        *values[:7], WeekDay(values[7]), time.fromisoformat(values[8]), time.fromisoformat(values[9])
+    )
+
+
+# Section name -> (encode, decode) between rows and JSON lists
+_CODECS: Dict[str, Tuple[Callable[[NamedTuple], list], Callable[[list], NamedTuple]]] = {
+    "professors": (list, ProfessorRow._make),
+    "courses": (list, CourseRow._make),
+    "classrooms": (list, ClassroomRow._make),
+    "schedules": (_schedule_out, _schedule_in),
+}
+
+
+class SnapshotFile:
+    """
+    On-disk copy of the GUI tables so the window can show data before the
+    database answers. Layout: magic, format version, header length, a JSON
+    header (database fingerprint, and offset, length and version stamp of each
+    section), then one JSON section per table. The file is memory-mapped and
+    only the requested section is decoded. Writes go to a temporary file that
+    replaces the old one, so readers never see half a snapshot.
+    """
+
+    def __init__(self, path: str, database_url: str):
+        self.path = path
+        # Snapshots of another database are never used
+        self.source = hashlib.sha256(database_url.encode()).hexdigest()[:16]
+        self._lock = threading.Lock()
+
+    def read(self, name: str) -> Optional[Tuple[str, List[NamedTuple]]]:
+        """(version stamp, rows) of a section, or None when there is no usable snapshot."""
+        try:
+            with open(self.path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                header = self._header(view)
+                if header is None or name not in header["sections"]:
+                    return None
+                section = header["sections"][name]
+                start = _PREFIX.size + header["length"] + section["offset"]
+                values = json.loads(view[start:start + section["length"]])
+        except (OSError, ValueError, KeyError):
+            return None
+        decode = _CODECS[name][1]
+        return section["stamp"], [decode(value) for value in values]
+
+    def write(self, tables: Dict[str, Tuple[str, List[NamedTuple]]]) -> None:
+        """Replace the file with the given {name: (stamp, rows)} sections."""
+        sections, bodies, offset = {}, [], 0
+        for name, (stamp, rows) in tables.items():
+            encode = _CODECS[name][0]
+            body = json.dumps([encode(row) for row in rows], separators=(",", ":")).encode()
+            sections[name] = {"offset": offset, "length": len(body), "stamp": stamp}
+            bodies.append(body)
+            offset += len(body)
+        header = json.dumps({"source": self.source, "sections": sections}).encode()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+            try:
+                with os.fdopen(handle, "wb") as out:
+                    out.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+                    out.write(header)
+                    for body in bodies:
+                        out.write(body)
+                os.replace(temporary, self.path)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+
+    def _header(self, view: mmap.mmap) -> Optional[dict]:
+        if len(view) < _PREFIX.size:
+            return None
+        magic, version, length = _PREFIX.unpack_from(view)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        header = json.loads(view[_PREFIX.size:_PREFIX.size + length])
+        if header.get("source") != self.source:
+            return None
+        header["length"] = length
+        return header
@@ -0,0 +1,479 @@
+import argparse
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import (
+    ClassroomModel,
+    CourseModel,
+    ProfessorModel,
+    ProfessorRestrictionModel,
+    TimeBlock,
+    WeekDay,
+    professor_course_association,
+)
+from services import SchedulerService
+from timeslots import restriction_bit
+
+MAX_COURSES_PER_PROFESSOR = 6
+
+ENTITIES = ("professors", "courses", "classrooms", "restrictions", "assignments")
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class ImportReport:
+    entity: str
+    dry_run: bool
+    processed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    errors: List[RowError] = field(default_factory=list)
+
+
+ProgressCallback = Callable[[ImportReport], None]
+
+
+def iter_records(path: str) -> Iterator[Tuple[int, Dict]]:
+    """Yield (line, record) pairs from a CSV, JSON Lines or JSON array file."""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as handle:
+        if extension == ".csv":
+            reader = csv.DictReader(handle)
+            for record in reader:
+                yield reader.line_num, record
+        elif extension in (".jsonl", ".ndjson"):
+            for line, text in enumerate(handle, start=1):
+                if text.strip():
+                    yield line, json.loads(text)
+        elif extension == ".json":
+            yield from enumerate(_iter_json_array(handle), start=1)
+        else:
+            raise ValueError(f"Unsupported file type {extension}")
+
+
+def _iter_json_array(handle, chunk_size: int = 65536) -> Iterator[Dict]:
+    """Decode the objects of a top-level JSON array one at a time."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+    while True:
+        # Skip whitespace, separators and the surrounding brackets
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            if buffer[position] == "[":
+                started = True
+            position += 1
+        if position < len(buffer):
+            if not started:
+                raise ValueError("JSON input must be an array of objects")
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield record
+                position = end
+                continue
+        elif eof:
+            return
+        chunk = handle.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def _batches(records: Iterable[Tuple[int, Dict]], size: int) -> Iterator[List[Tuple[int, Dict]]]:
+    batch: List[Tuple[int, Dict]] = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text(record: Dict, key: str) -> str:
+    value = record.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def _boolean(record: Dict, key: str, default: bool) -> bool:
+    value = record.get(key)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("1", "true", "yes", "y"):
+        return True
+    if text in ("0", "false", "no", "n"):
+        return False
+    raise ValueError(f"{key} must be a boolean value")
+
+
+def _integer(record: Dict, key: str, default: int) -> int:
+    value = record.get(key)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"{key} must be an integer") from exc
+
+
+def _enum(enum_type, record: Dict, key: str):
+    text = _text(record, key)
+    for member in enum_type:
+        if text.lower() in (member.value.lower(), member.name.lower()):
+            return member
+    raise ValueError(f"Invalid {key} {text!r}")
+
+
+class BulkImporter:
+    """
+    Import one entity type from an iterable of records. Rows are checked with
+    the rules SchedulerService enforces, natural keys are resolved with one
+    lookup query per batch and every batch is written with batched statements
+    and a single commit (or rolled back in dry-run mode).
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = 1000,
+        dry_run: bool = False,
+        update_existing: bool = False,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer")
+        self.db = db
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.update_existing = update_existing
+        self.progress = progress
+        # Natural keys, restriction slots or assignment pairs accepted by earlier batches of this run,
+        # and courses per professor so far; a dry run cannot find them in the database
+        self._inserted: Set[Hashable] = set()
+        self._loads: Dict[int, int] = {}
+
+    def run(self, entity: str, records: Iterable[Tuple[int, Dict]]) -> ImportReport:
+        """Import (line, record) pairs for the given entity."""
+        if entity not in ENTITIES:
+            raise ValueError(f"Unknown entity {entity}, expected one of {', '.join(ENTITIES)}")
+        handler = getattr(self, f"_import_{entity}")
+        report = ImportReport(entity=entity, dry_run=self.dry_run)
+        self._inserted = set()
+        self._loads = {}
+        for batch in _batches(records, self.batch_size):
+            try:
+                handler(batch, report)
+                if self.dry_run:
+                    self.db.rollback()
+                else:
+                    self.db.commit()
+                    # These writes bypass the service, so cached reference rows may be stale
+                    if SchedulerService.reference_cache is not None:
+                        SchedulerService.reference_cache.clear()
+            except Exception:
+                self.db.rollback()
+                raise
+            report.processed += len(batch)
+            if self.progress is not None:
+                self.progress(report)
+        return report
+
+    def import_file(self, entity: str, path: str) -> ImportReport:
+        """Import a CSV, JSON Lines or JSON array file."""
+        return self.run(entity, iter_records(path))
+
+    def _write(self, model, inserts: List[Dict], updates: List[Dict], report: ImportReport) -> None:
+        """Batched INSERT for new rows and a bulk UPDATE by primary key for existing ones."""
+        if inserts and not self.dry_run:
+            self.db.execute(insert(model), inserts)
+        if updates and not self.dry_run:
+            self.db.execute(update(model), updates)
+        report.inserted += len(inserts)
+        report.updated += len(updates)
+
+    def _insert_rows(
+        self,
+        model,
+        rows: List[Tuple[int, Dict]],
+        key_name: str,
+        label: str,
+        report: ImportReport,
+    ) -> List[Dict]:
+        """
+        Insert (line, row) pairs in one statement. When a unique index refuses
+        one, such as a key that only differs in case under a case-insensitive
+        collation, the rows are retried one by one and the refused ones become
+        row errors. Returns the rows inserted.
+        """
+        inserts = [row for _, row in rows]
+        if not inserts or self.dry_run:
+            return inserts
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(model), inserts)
+            return inserts
+        except IntegrityError:
+            pass
+        inserted = []
+        for line, row in rows:
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(insert(model), [row])
+                inserted.append(row)
+            except IntegrityError as exc:
+                report.errors.append(RowError(line, f"{label} {row[key_name]} already exists ({exc.orig})"))
+        return inserted
+
+    def _upsert(
+        self,
+        model,
+        key_column,
+        key_name: str,
+        label: str,
+        rows: List[Tuple[int, Dict]],
+        report: ImportReport,
+    ) -> None:
+        """Resolve the natural key of every row with one query and insert or update."""
+        keys = {row[key_name] for _, row in rows}
+        existing: Dict[str, Optional[int]] = dict(
+            self.db.query(key_column, model.id).filter(key_column.in_(keys)).all()
+        )
+        # Rows of earlier batches are in the database unless this is a dry run; they have no id then
+        existing.update((key, None) for key in keys & self._inserted if key not in existing)
+        inserts: List[Tuple[int, Dict]] = []
+        updates: List[Dict] = []
+        seen: Set[str] = set()
+        for line, row in rows:
+            key = row[key_name]
+            if key in seen:
+                report.errors.append(RowError(line, f"Duplicate {label} {key} in the same batch"))
+                continue
+            seen.add(key)
+            if key not in existing:
+                inserts.append((line, row))
+            elif self.update_existing:
+                updates.append(dict(row, id=existing[key]))
+            else:
+                report.errors.append(RowError(line, f"{label} {key} already exists"))
+        inserted = self._insert_rows(model, inserts, key_name, label, report)
+        self._inserted.update(row[key_name] for row in inserted)
+        self._write(model, [], updates, report)
+        report.inserted += len(inserted)
+
+    def _parse(self, batch, parser, report: ImportReport) -> List[Tuple[int, Dict]]:
+        rows = []
+        for line, record in batch:
+            if not isinstance(record, dict):
+                report.errors.append(RowError(line, "Record must be an object"))
+                continue
+            try:
+                rows.append((line, parser(record)))
+            except ValueError as exc:
+                report.errors.append(RowError(line, str(exc)))
+        return rows
+
+    def _import_professors(self, batch, report: ImportReport) -> None:
+        def parse(record: Dict) -> Dict:
+            name, document_id = _text(record, "name"), _text(record, "document_id")
+            if not name or not document_id:
+                raise ValueError("Name and document ID are required")
+            return {"name": name, "document_id": document_id}
+
+        rows = self._parse(batch, parse, report)
+        self._upsert(ProfessorModel, ProfessorModel.document_id, "document_id", "Professor with document ID", rows, report)
+
+    def _import_courses(self, batch, report: ImportReport) -> None:
+        def parse(record: Dict) -> Dict:
+            code, name = _text(record, "code"), _text(record, "name")
+            if not code or not name:
+                raise ValueError("Code and name are required")
+            weekly_hours = _integer(record, "weekly_hours", 4)
+            if weekly_hours not in [3, 4]:
+                raise ValueError("Weekly hours must be either 3 or 4")
+            return {
+                "code": code,
+                "name": name,
+                "weekly_hours": weekly_hours,
+                "requires_equipment": _boolean(record, "requires_equipment", False),
+            }
+
+        rows = self._parse(batch, parse, report)
+        self._upsert(CourseModel, CourseModel.code, "code", "Course with code", rows, report)
+
+    def _import_classrooms(self, batch, report: ImportReport) -> None:
+        def parse(record: Dict) -> Dict:
+            name = _text(record, "name")
+            if not name:
+                raise ValueError("Name is required")
+            capacity = _integer(record, "capacity", 30)
+            if capacity <= 0:
+                raise ValueError("Capacity must be a positive integer")
+            return {
+                "name": name,
+                "has_equipment": _boolean(record, "has_equipment", False),
+                "capacity": capacity,
+            }
+
+        rows = self._parse(batch, parse, report)
+        self._upsert(ClassroomModel, ClassroomModel.name, "name", "Classroom with name", rows, report)
+
+    def _professor_ids(self, rows: List[Tuple[int, Dict]]) -> Dict[str, int]:
+        documents = {row["document_id"] for _, row in rows}
+        return dict(
+            self.db.query(ProfessorModel.document_id, ProfessorModel.id)
+            .filter(ProfessorModel.document_id.in_(documents))
+            .all()
+        )
+
+    def _import_restrictions(self, batch, report: ImportReport) -> None:
+        def parse(record: Dict) -> Dict:
+            document_id = _text(record, "document_id")
+            if not document_id:
+                raise ValueError("Document ID is required")
+            weekday, time_block = _enum(WeekDay, record, "weekday"), _enum(TimeBlock, record, "time_block")
+            restriction_bit(weekday, time_block)
+            return {"document_id": document_id, "weekday": weekday, "time_block": time_block}
+
+        rows = self._parse(batch, parse, report)
+        professor_ids = self._professor_ids(rows)
+        existing = set(
+            self.db.query(
+                ProfessorRestrictionModel.professor_id,
+                ProfessorRestrictionModel.weekday,
+                ProfessorRestrictionModel.time_block,
+            )
+            .filter(ProfessorRestrictionModel.professor_id.in_(professor_ids.values()))
+            .all()
+        ) | self._inserted
+        inserts: List[Dict] = []
+        for line, row in rows:
+            professor_id = professor_ids.get(row["document_id"])
+            if professor_id is None:
+                report.errors.append(RowError(line, f"Professor with document ID {row['document_id']} not found"))
+                continue
+            key = (professor_id, row["weekday"], row["time_block"])
+            if key in existing:
+                report.errors.append(
+                    RowError(line, f"Restriction for {row['weekday'].value} during {row['time_block'].value} already exists")
+                )
+                continue
+            existing.add(key)
+            self._inserted.add(key)
+            inserts.append({"professor_id": professor_id, "weekday": row["weekday"], "time_block": row["time_block"]})
+        self._write(ProfessorRestrictionModel, inserts, [], report)
+        if inserts and not self.dry_run:
+            bits: Dict[int, int] = {}
+            for row in inserts:
+                bit = restriction_bit(row["weekday"], row["time_block"])
+                bits[row["professor_id"]] = bits.get(row["professor_id"], 0) | bit
+            self.db.execute(
+                update(ProfessorModel.__table__)
+                .where(ProfessorModel.id == bindparam("professor_id"))
+                .values(restriction_mask=ProfessorModel.restriction_mask.op("|")(bindparam("bits"))),
+                [{"professor_id": professor_id, "bits": mask} for professor_id, mask in bits.items()]
+            )
+
+    def _import_assignments(self, batch, report: ImportReport) -> None:
+        def parse(record: Dict) -> Dict:
+            document_id, code = _text(record, "document_id"), _text(record, "course_code")
+            if not document_id or not code:
+                raise ValueError("Document ID and course code are required")
+            return {"document_id": document_id, "course_code": code}
+
+        rows = self._parse(batch, parse, report)
+        professor_ids = self._professor_ids(rows)
+        codes = {row["course_code"] for _, row in rows}
+        course_ids = dict(
+            self.db.query(CourseModel.code, CourseModel.id).filter(CourseModel.code.in_(codes)).all()
+        )
+        association = professor_course_association.c
+        existing = set(
+            self.db.query(association.professor_id, association.course_id)
+            .filter(association.professor_id.in_(professor_ids.values()))
+            .all()
+        ) | self._inserted
+        # Professors seen by an earlier batch keep their running count
+        unseen = set(professor_ids.values()) - set(self._loads)
+        loads = self._loads
+        loads.update(dict.fromkeys(unseen, 0))
+        if unseen:
+            loads.update(
+                self.db.query(association.professor_id, func.count())
+                .filter(association.professor_id.in_(unseen))
+                .group_by(association.professor_id)
+                .all()
+            )
+        inserts: List[Dict] = []
+        for line, row in rows:
+            professor_id = professor_ids.get(row["document_id"])
+            course_id = course_ids.get(row["course_code"])
+            if professor_id is None:
+                report.errors.append(RowError(line, f"Professor with document ID {row['document_id']} not found"))
+                continue
+            if course_id is None:
+                report.errors.append(RowError(line, f"Course with code {row['course_code']} not found"))
+                continue
+            if (professor_id, course_id) in existing:
+                report.errors.append(
+                    RowError(line, f"Course {row['course_code']} is already assigned to professor {row['document_id']}")
+                )
+                continue
+            if loads.get(professor_id, 0) >= MAX_COURSES_PER_PROFESSOR:
+                report.errors.append(RowError(line, "Professor already has the maximum of 6 courses assigned"))
+                continue
+            existing.add((professor_id, course_id))
+            self._inserted.add((professor_id, course_id))
+            loads[professor_id] = loads.get(professor_id, 0) + 1
+            inserts.append({"professor_id": professor_id, "course_id": course_id})
+        if inserts and not self.dry_run:
+            self.db.execute(insert(professor_course_association), inserts)
+        report.inserted += len(inserts)
+
+
+def main() -> None:
+    from session import get_db_session
+
+    parser = argparse.ArgumentParser(description="Bulk import registrar exports")
+    parser.add_argument("entity", choices=ENTITIES)
+    parser.add_argument("path", help="CSV, JSON Lines (.jsonl) or JSON array file")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="Validate and resolve keys without writing")
+    parser.add_argument("--update-existing", action="store_true", help="Update rows whose natural key exists")
+    args = parser.parse_args()
+
+    def progress(report: ImportReport) -> None:
+        print(f"{report.entity}: {report.processed} rows, {len(report.errors)} errors")
+
+    with get_db_session() as db:
+        importer = BulkImporter(db, args.batch_size, args.dry_run, args.update_existing, progress)
+        report = importer.import_file(args.entity, args.path)
+
+    for error in report.errors:
+        print(f"line {error.line}: {error.message}")
+    action = "would insert" if report.dry_run else "inserted"
+    print(f"{report.processed} rows processed, {report.inserted} {action}, "
+          f"{report.updated} updated, {len(report.errors)} errors")
+
+
+if __name__ == "__main__":
+    main()
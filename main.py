@@ -1,246 +1,284 @@
 import dearpygui.dearpygui as dpg
-import dearpygui.dearpygui as dpg
+import functools
 from datetime import time
-from session import get_db
 from services import SchedulerService
 from models import WeekDay
+from timeslots import RESTRICTION_BLOCKS, restricted_slots
+import config
+from database import get_engine, registry
+from guisnapshot import SnapshotFile
+from metrics import metrics
+from migrations import upgrade
+from workers import BackgroundExecutor
+from projections import ClassroomRow, CourseRow, ProfessorRow
+from tableview import PagedTable
 
-# Placeholders for external db session and service, to be assigned before use
-db = get_db()
 scheduler_service = SchedulerService()
+# Every service call runs here; results come back to the GUI thread in the render loop
+executor = BackgroundExecutor()
 
 def show_message(message, color=(255, 255, 255)):
     dpg.set_value("output_text", message)
     dpg.configure_item("output_text", color=color)
 
-def get_classrooms():
-    session = next(get_db())
-    try:
-        return scheduler_service.get_classrooms(session)
-    finally:
-        session.close()
-
-def get_schedules():
-    session = next(get_db())
-    try:
-        return scheduler_service.get_schedules(session)
-    finally:
-        session.close()
-
+def show_error(error):
+    print(error)
+    show_message(str(error), (255, 0, 0))
+
+def gui_callback(func):
+    """Time a button callback as gui.<name>. The wrapper takes no arguments, like the callbacks."""
+    def timed_callback():
+        with metrics.timed(f"gui.{func.__name__}"):
+            func()
+    return functools.wraps(func)(timed_callback)
+
+def run_action(task, *args, apply=None):
+    """
+    Run a service call in the background; task returns (message, result) and apply(result) updates the tables.
+    Writes are never dropped as stale, so every commit reaches its table or reports its error.
+    """
+    def done(outcome):
+        message, result = outcome
+        show_message(message, (0, 255, 0))
+        if apply is not None:
+            apply(result)
+        # A table load still in flight may have read the rows before this commit; read them again after it
+        for name, (_, view, _, _) in TAB_VIEWS.items():
+            if executor.running(view.tag):
+                reload_table(name)
+
+    executor.submit(None, task, *args, on_success=done, on_error=show_error)
+
+@gui_callback
 def get_classroom_callback():
-    session = next(get_db())
     classroom_id = dpg.get_value("classroom_id")
-    try:
-        classroom = scheduler_service.get_classroom_by_id(session, classroom_id)
+
+    def fill(classroom):
         dpg.set_value("classroom_name", classroom.name)
         dpg.set_value("has_equipment", classroom.has_equipment)
         dpg.set_value("capacity", classroom.capacity)
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
+    executor.submit("classroom_form", scheduler_service.get_classroom_by_id, classroom_id,
+                    on_success=fill, on_error=show_error)
+
+@gui_callback
 def add_classroom_callback():
     name = dpg.get_value("classroom_name")
     has_equipment = dpg.get_value("has_equipment")
     capacity = dpg.get_value("capacity")
-    session = next(get_db())
-    try:
+
+    def task(session):
         classroom = scheduler_service.add_classroom(session, name, has_equipment, capacity)
-        show_message(f"Added Classroom: {classroom.name} (ID: {classroom.id})", (0, 255, 0))
-        update_classroom_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
+        return f"Added Classroom: {classroom.name} (ID: {classroom.id})", classroom_row(classroom)
+
+    run_action(task, apply=classroom_view.upsert)
 
+@gui_callback
 def update_classroom_callback():
     classroom_id = dpg.get_value("classroom_id")
     name = dpg.get_value("classroom_name")
     has_equipment = dpg.get_value("has_equipment")
     capacity = dpg.get_value("capacity")
-    session = next(get_db())
-    try:
-        scheduler_service.update_classroom(session, classroom_id, name, has_equipment, capacity)
-        show_message(f"Updated Classroom", (0, 255, 0))
-        update_classroom_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
+    def task(session):
+        classroom = scheduler_service.update_classroom(session, classroom_id, name, has_equipment, capacity)
+        return "Updated Classroom", classroom_row(classroom)
+
+    def apply(row):
+        classroom_view.upsert(row)
+        schedule_view.replace_where(
+            lambda s: s.classroom_id == row.id, lambda s: s._replace(classroom_name=row.name)
+        )
+
+    run_action(task, apply=apply)
+
+@gui_callback
 def delete_classroom_callback():
     classroom_id = dpg.get_value("classroom_id")
-    session = next(get_db())
-    try:
-        scheduler_service.delete_classroom(session, classroom_id)
-        show_message(f"Deleted Classroom", (0, 255, 0))
-        update_classroom_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
-def get_courses():
-    session = next(get_db())
-    try:
-        return scheduler_service.get_courses(session)
-    finally:
-        session.close()
+    def task(session):
+        deleted = scheduler_service.delete_classroom(session, classroom_id)
+        return "Deleted Classroom", int(classroom_id) if deleted else None
 
+    def apply(deleted_id):
+        classroom_view.remove(deleted_id)
+        schedule_view.remove_where(lambda s: s.classroom_id == deleted_id)
+
+    run_action(task, apply=apply)
+
+@gui_callback
 def get_course_callback():
-    session = next(get_db())
     course_id = dpg.get_value("course_id")
-    try:
-        course = scheduler_service.get_course_by_id(session, course_id)
+
+    def fill(course):
         dpg.set_value("course_code", course.code)
         dpg.set_value("course_name", course.name)
         dpg.set_value("weekly_hours", course.weekly_hours)
         dpg.set_value("requires_equipment", course.requires_equipment)
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
+    executor.submit("course_form", scheduler_service.get_course_by_id, course_id,
+                    on_success=fill, on_error=show_error)
+
+@gui_callback
 def add_course_callback():
     code = dpg.get_value("course_code")
     name = dpg.get_value("course_name")
     weekly_hours = dpg.get_value("weekly_hours")
     requires_equipment = dpg.get_value("requires_equipment")
-    session = next(get_db())
-    try:
+
+    def task(session):
         course = scheduler_service.add_course(session, code, name, weekly_hours, requires_equipment)
-        show_message(f"Added Course: {course.name} (ID: {course.id})", (0, 255, 0))
-        update_course_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
+        return f"Added Course: {course.name} (ID: {course.id})", course_row(course)
+
+    run_action(task, apply=course_view.upsert)
 
+@gui_callback
 def update_course_callback():
     course_id = dpg.get_value("course_id")
     code = dpg.get_value("course_code")
     name = dpg.get_value("course_name")
     weekly_hours = dpg.get_value("weekly_hours")
     requires_equipment = dpg.get_value("requires_equipment")
-    session = next(get_db())
-    try:
-        scheduler_service.update_course(session, course_id, code, name, weekly_hours, requires_equipment)
-        show_message(f"Updated Course", (0, 255, 0))
-        update_course_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
+    def task(session):
+        course = scheduler_service.update_course(session, course_id, code, name, weekly_hours, requires_equipment)
+        return "Updated Course", course_row(course)
+
+    def apply(row):
+        course_view.upsert(row)
+        schedule_view.replace_where(
+            lambda s: s.course_id == row.id, lambda s: s._replace(course_name=row.name)
+        )
+
+    run_action(task, apply=apply)
+
+@gui_callback
 def delete_course_callback():
     course_id = dpg.get_value("course_id")
-    session = next(get_db())
-    try:
-        scheduler_service.delete_course(session, course_id)
-        show_message(f"Deleted Course", (0, 255, 0))
-        update_course_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
-def get_professors():
-    session = next(get_db())
-    try:
-        return scheduler_service.get_professors(session)
-    finally:
-        session.close()
+    def task(session):
+        deleted = scheduler_service.delete_course(session, course_id)
+        return "Deleted Course", int(course_id) if deleted else None
 
+    def apply(deleted_id):
+        course_view.remove(deleted_id)
+        schedule_view.remove_where(lambda s: s.course_id == deleted_id)
+
+    run_action(task, apply=apply)
+
+@gui_callback
 def get_professor_callback():
-    session = next(get_db())
     prof_id = dpg.get_value("prof_id")
-    try:
-        prof = scheduler_service.get_professor_by_id(session, prof_id)
+
+    def fill(prof):
         dpg.set_value("prof_name", prof.name)
         dpg.set_value("prof_doc_id", prof.document_id)
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
+    executor.submit("prof_form", scheduler_service.get_professor_by_id, prof_id,
+                    on_success=fill, on_error=show_error)
+
+@gui_callback
 def add_professor_callback():
     name = dpg.get_value("prof_name")
     doc_id = dpg.get_value("prof_doc_id")
-    session = next(get_db())
-    try:
+
+    def task(session):
         prof = scheduler_service.add_professor(session, name, doc_id)
-        show_message(f"Added Professor: {prof.name} (ID: {prof.id})", (0, 255, 0))
-        update_prof_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
+        return f"Added Professor: {prof.name} (ID: {prof.id})", professor_row(prof)
+
+    run_action(task, apply=prof_view.upsert)
 
+@gui_callback
 def update_professor_callback():
     prof_id = dpg.get_value("prof_id")
     name = dpg.get_value("prof_name")
     doc_id = dpg.get_value("prof_doc_id")
-    session = next(get_db())
-    try:
-        scheduler_service.update_professor(session, prof_id, name, doc_id)
-        show_message(f"Updated Professor", (0, 255, 0))
-        update_prof_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
+    def task(session):
+        prof = scheduler_service.update_professor(session, prof_id, name, doc_id)
+        return "Updated Professor", professor_row(prof)
+
+    def apply(row):
+        prof_view.upsert(row)
+        schedule_view.replace_where(
+            lambda s: s.professor_id == row.id, lambda s: s._replace(professor_name=row.name)
+        )
+
+    run_action(task, apply=apply)
+
+@gui_callback
 def delete_professor_callback():
     prof_id = dpg.get_value("prof_id")
-    session = next(get_db())
-    try:
-        scheduler_service.delete_professor(session, prof_id)
-        show_message(f"Deleted Professor", (0, 255, 0))
-        update_prof_table()
-    except Exception as e:
-        print(e)
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
 
+    def task(session):
+        deleted = scheduler_service.delete_professor(session, prof_id)
+        return "Deleted Professor", int(prof_id) if deleted else None
+
+    def apply(deleted_id):
+        prof_view.remove(deleted_id)
+        schedule_view.remove_where(lambda s: s.professor_id == deleted_id)
+
+    run_action(task, apply=apply)
+
+@gui_callback
 def assign_course_callback():
-    session = next(get_db())
-    try:
-        prof_id = int(dpg.get_value("assign_professor_id"))
-        course_id = int(dpg.get_value("assign_course_id"))
+    prof_id = int(dpg.get_value("assign_professor_id"))
+    course_id = int(dpg.get_value("assign_course_id"))
+
+    def task(session):
         scheduler_service.assign_course_to_professor(session, prof_id, course_id)
-        show_message(f"Assigned Course {course_id} to Professor {prof_id}", (0, 255, 0))
-    except Exception as e:
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
+        return f"Assigned Course {course_id} to Professor {prof_id}", None
 
+    run_action(task)
+
+@gui_callback
 def remove_course_callback():
-    session = next(get_db())
-    try:
-        prof_id = int(dpg.get_value("assign_professor_id"))
-        course_id = int(dpg.get_value("assign_course_id"))
+    prof_id = int(dpg.get_value("assign_professor_id"))
+    course_id = int(dpg.get_value("assign_course_id"))
+
+    def task(session):
         scheduler_service.remove_course_from_professor(session, prof_id, course_id)
-        show_message(f"Removed Course {course_id} from Professor {prof_id}", (0, 255, 0))
-    except Exception as e:
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
+        return f"Removed Course {course_id} from Professor {prof_id}", None
+
+    run_action(task)
+
+def restriction_tag(weekday, block):
+    return f"restriction_{weekday.name}_{block.name}"
+
+@gui_callback
+def load_restrictions_callback():
+    prof_id = dpg.get_value("restriction_professor_id")
+
+    def fill(prof):
+        slots = set(restricted_slots(prof.restriction_mask))
+        for weekday in WeekDay:
+            for block in RESTRICTION_BLOCKS:
+                dpg.set_value(restriction_tag(weekday, block), (weekday, block) in slots)
+        show_message(f"Loaded restrictions of {prof.name}", (0, 255, 0))
+
+    executor.submit("restriction_form", scheduler_service.get_professor_by_id, prof_id,
+                    on_success=fill, on_error=show_error)
+
+@gui_callback
+def save_restrictions_callback():
+    prof_id = dpg.get_value("restriction_professor_id")
+    slots = [
+        (weekday, block)
+        for weekday in WeekDay
+        for block in RESTRICTION_BLOCKS
+        if dpg.get_value(restriction_tag(weekday, block))
+    ]
+
+    def task(session):
+        scheduler_service.set_professor_restrictions(session, {prof_id: slots})
+        return f"Saved {len(slots)} restrictions for Professor {prof_id}", professor_row(
+            scheduler_service.get_professor_by_id(session, prof_id)
+        )
+
+    run_action(task, apply=prof_view.upsert)
 
+@gui_callback
 def schedule_session_callback():
-    session = next(get_db())
     try:
         course_id = int(dpg.get_value("schedule_course_id"))
         prof_id = int(dpg.get_value("schedule_professor_id"))
@@ -261,7 +299,11 @@ def schedule_session_callback():
                 break
         if not weekday_enum:
             raise ValueError("Invalid weekday selected")
+    except Exception as e:
+        show_message(str(e), (255, 0, 0))
+        return
 
+    def task(session):
         schedule = scheduler_service.schedule_course_session(
             session,
             course_id,
@@ -271,92 +313,231 @@ def schedule_session_callback():
             start_time_obj,
             end_time_obj
         )
-        show_message(f"Scheduled session ID {schedule.id}", (0, 255, 0))
-        update_schedule_table()
-    except Exception as e:
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
-
+        return f"Scheduled session ID {schedule.id}", scheduler_service.get_schedule_row(session, schedule.id)
+
+    show_message("Scheduling...", (200, 200, 200))
+    run_action(task, apply=schedule_view.upsert)
+
+@gui_callback
+def suggest_slot_callback():
+    course_id = int(dpg.get_value("schedule_course_id"))
+    prof_id = int(dpg.get_value("schedule_professor_id"))
+
+    def fill(options):
+        if not options:
+            show_message("No free slot for this course and professor", (255, 255, 0))
+            return
+        best = options[0]
+        dpg.set_value("schedule_classroom_id", best.classroom_id)
+        dpg.set_value("schedule_weekday", best.weekday.value)
+        dpg.set_value("schedule_start_hour", best.start_time.hour)
+        dpg.set_value("schedule_start_minute", best.start_time.minute)
+        dpg.set_value("schedule_end_hour", best.end_time.hour)
+        dpg.set_value("schedule_end_minute", best.end_time.minute)
+        show_message(f"Best of {len(options)} free slots filled in", (0, 255, 0))
+
+    executor.submit("schedule_form", scheduler_service.find_available_slots, course_id, prof_id,
+                    on_success=fill, on_error=show_error)
+
+@gui_callback
 def validate_course_callback():
-    session = next(get_db())
-    try:
-        course_id = int(dpg.get_value("validate_course_id"))
-        valid = scheduler_service.validate_course_scheduling(session, course_id)
+    course_id = int(dpg.get_value("validate_course_id"))
+
+    def report(valid):
         if valid:
             show_message("Course scheduling is valid!", (0, 255, 0))
         else:
             show_message("Course scheduling is NOT valid!", (255, 255, 0))
-    except Exception as e:
-        show_message(str(e), (255, 0, 0))
-    finally:
-        session.close()
-
-def update_prof_table():
-    for tag in dpg.get_item_children("prof_table")[1]:
-        dpg.delete_item(tag)
-    professors = get_professors()
-    for professor in professors:
-        with dpg.table_row(parent="prof_table"):
-            dpg.add_text(f"{professor.id}")
-            dpg.add_text(f"{professor.name}")
-            dpg.add_text(f"{professor.document_id}")
-
-def update_course_table():
-    """Refresh the course table with the latest data."""
-    for tag in dpg.get_item_children("course_table")[1]:
-        dpg.delete_item(tag)
-    courses = get_courses()
-    for course in courses:
-        with dpg.table_row(parent="course_table"):
-            dpg.add_text(f"{course.id}")
-            dpg.add_text(f"{course.code}")
-            dpg.add_text(f"{course.name}")
-            dpg.add_text(f"{course.weekly_hours}")
-            dpg.add_text(f"{'Yes' if course.requires_equipment else 'No'}")
-
-def update_classroom_table():
-    """Refresh the classroom table with the latest data."""
-    for tag in dpg.get_item_children("classroom_table")[1]:
-        dpg.delete_item(tag)
-    classrooms = get_classrooms()
-    for classroom in classrooms:
-        with dpg.table_row(parent="classroom_table"):
-            dpg.add_text(f"{classroom.id}")
-            dpg.add_text(f"{classroom.name}")
-            dpg.add_text(f"{'Yes' if classroom.has_equipment else 'No'}")
-            dpg.add_text(f"{classroom.capacity}")
-
-def update_schedule_table():
-    """Refresh the schedule table with the latest data."""
-    for tag in dpg.get_item_children("schedule_table")[1]:
-        dpg.delete_item(tag)
-    schedules = get_schedules()
-    for schedule in schedules:
-        with dpg.table_row(parent="schedule_table"):
-            dpg.add_text(f"{schedule.id}")
-            dpg.add_text(f"{schedule.course_id}")
-            dpg.add_text(f"{schedule.professor_id}")
-            dpg.add_text(f"{schedule.classroom_id}")
-            dpg.add_text(f"{schedule.weekday}")
-            dpg.add_text(f"{schedule.start_time}")
-            dpg.add_text(f"{schedule.end_time}")
+
+    executor.submit("output_text", scheduler_service.validate_course_scheduling, course_id,
+                    on_success=report, on_error=show_error)
+
+@gui_callback
+def validate_all_callback():
+    only_invalid = dpg.get_value("validate_only_invalid")
+
+    def report(results):
+        validation_view.set_rows(results)
+        invalid = sum(1 for item in results if not item.valid)
+        if only_invalid:
+            show_message(f"{invalid} courses are NOT valid", (255, 255, 0) if invalid else (0, 255, 0))
+        else:
+            show_message(f"{len(results) - invalid} of {len(results)} courses are valid",
+                         (255, 255, 0) if invalid else (0, 255, 0))
+
+    executor.submit(validation_view.tag, scheduler_service.validate_all_courses, only_invalid,
+                    on_success=report, on_error=show_error)
+
+def professor_row(prof):
+    return ProfessorRow(prof.id, prof.name, prof.document_id, prof.restriction_mask)
+
+def course_row(course):
+    return CourseRow(course.id, course.code, course.name, course.weekly_hours, course.requires_equipment)
+
+def classroom_row(classroom):
+    return ClassroomRow(classroom.id, classroom.name, classroom.has_equipment, classroom.capacity)
+
+# Tables keep every row in memory but only draw one page; changes are applied per row
+prof_view = PagedTable("prof_table", [
+    ("ID", lambda p: f"{p.id}"),
+    ("Name", lambda p: f"{p.name}"),
+    ("Document ID", lambda p: f"{p.document_id}"),
+])
+course_view = PagedTable("course_table", [
+    ("ID", lambda c: f"{c.id}"),
+    ("Code", lambda c: f"{c.code}"),
+    ("Name", lambda c: f"{c.name}"),
+    ("Weekly Hours", lambda c: f"{c.weekly_hours}"),
+    ("Requires Equipment", lambda c: f"{'Yes' if c.requires_equipment else 'No'}"),
+])
+classroom_view = PagedTable("classroom_table", [
+    ("ID", lambda c: f"{c.id}"),
+    ("Name", lambda c: f"{c.name}"),
+    ("Has Equipment", lambda c: f"{'Yes' if c.has_equipment else 'No'}"),
+    ("Capacity", lambda c: f"{c.capacity}"),
+])
+schedule_view = PagedTable("schedule_table", [
+    ("ID", lambda s: f"{s.id}"),
+    ("Course", lambda s: f"{s.course_id}: {s.course_name}"),
+    ("Professor", lambda s: f"{s.professor_id}: {s.professor_name}"),
+    ("Classroom", lambda s: f"{s.classroom_id}: {s.classroom_name}"),
+    ("Weekday", lambda s: f"{s.weekday.value}"),
+    ("Start Time", lambda s: f"{s.start_time}"),
+    ("End Time", lambda s: f"{s.end_time}"),
+])
+validation_view = PagedTable("validation_table", [
+    ("Course", lambda v: f"{v.course_id}: {v.name}"),
+    ("Weekly Hours", lambda v: f"{v.weekly_hours}"),
+    ("Scheduled", lambda v: f"{v.scheduled_hours:g}"),
+    ("Blocks", lambda v: f"{v.blocks}"),
+    ("Days", lambda v: f"{v.weekdays}"),
+    ("Status", lambda v: "Valid" if v.valid else v.reason),
+], key="course_id")
+
+performance_view = PagedTable("performance_table", [
+    ("Operation", lambda m: m.name),
+    ("Calls", lambda m: f"{m.calls}"),
+    ("Errors", lambda m: f"{m.errors}"),
+    ("Mean ms", lambda m: f"{m.mean_ms:.2f}"),
+    ("p95 ms", lambda m: f"{m.percentile_ms(0.95):g}"),
+    ("Max ms", lambda m: f"{m.max_ms:.2f}"),
+    ("SQL", lambda m: f"{m.statements}"),
+    ("Rows", lambda m: f"{m.rows}"),
+    ("DB ms", lambda m: f"{m.db_ms:.2f}"),
+], key="name")
+
+def refresh_performance_callback():
+    performance_view.set_rows(metrics.snapshot())
+
+def reset_performance_callback():
+    metrics.reset()
+    performance_view.set_rows([])
+
+def export_performance_callback():
+    metrics.dump("scheduler-metrics.json")
+    metrics.dump("scheduler-metrics.prom")
+    show_message("Saved scheduler-metrics.json and scheduler-metrics.prom", (0, 255, 0))
+
+TABLE_OPTIONS = dict(row_background=True, borders_innerH=True, borders_outerH=True,
+                     borders_innerV=True, borders_outerV=True, scrollY=True)
+
+# Snapshot section -> (tab, view, loader, tables its rows are read from)
+TAB_VIEWS = {
+    "professors": ("prof_tab", prof_view, scheduler_service.list_professors, ("professors",)),
+    "courses": ("course_tab", course_view, scheduler_service.list_courses, ("courses",)),
+    "classrooms": ("classroom_tab", classroom_view, scheduler_service.list_classrooms, ("classrooms",)),
+    "schedules": ("schedule_tab", schedule_view, scheduler_service.list_schedules,
+                  ("schedules", "professors", "courses", "classrooms")),
+}
+# Shown first, so it is the only table read from the database at startup
+VISIBLE_TAB = "professors"
+
+snapshot = SnapshotFile(config.GUI_SNAPSHOT_PATH, config.DATABASE_URL)
+# Version stamp of the rows each view shows; views missing here have not been filled yet
+view_stamps = {}
+# Views to load once the database is ready
+pending_views = set()
+database_ready = False
+
+def view_stamp(versions, name):
+    return "|".join(versions[table] for table in TAB_VIEWS[name][3])
+
+def reload_table(name):
+    """Load a view from the database in the background; an older load still in flight is dropped."""
+    _, view, loader, _ = TAB_VIEWS[name]
+
+    def task(session):
+        # Stamp first: a change made while the rows are read makes the snapshot look stale, never fresh
+        versions = scheduler_service.table_versions(session)
+        return view_stamp(versions, name), loader(session)
+
+    def apply(result):
+        view_stamps[name], rows = result
+        view.set_rows(rows)
+
+    if not database_ready:
+        pending_views.add(name)
+        return
+    executor.submit(view.tag, task, on_success=apply, on_error=show_error)
+
+def refresh_stale_views(versions):
+    """Reload the views filled from the snapshot whose tables changed since it was written."""
+    for name, stamp in list(view_stamps.items()):
+        if stamp != view_stamp(versions, name):
+            reload_table(name)
+
+def tab_changed(sender, tab):
+    if isinstance(tab, int):
+        tab = dpg.get_item_alias(tab)
+    for name, (tab_tag, _, _, _) in TAB_VIEWS.items():
+        if tab_tag == tab and name not in view_stamps:
+            reload_table(name)
+
+def restore_from_snapshot():
+    """Fill the hidden tabs from the snapshot file; nothing touches the database here."""
+    for name, (_, view, _, _) in TAB_VIEWS.items():
+        if name == VISIBLE_TAB:
+            continue
+        cached = snapshot.read(name)
+        if cached is not None:
+            view_stamps[name], rows = cached
+            view.set_rows(rows)
+
+def prepare_database(session):
+    # Bring the schema up to date before any table is queried
+    upgrade(get_engine())
+    # Open the pooled connections now rather than on the first callbacks
+    registry.warm()
+
+def database_prepared(_):
+    global database_ready
+    database_ready = True
+    reload_table(VISIBLE_TAB)
+    for name in pending_views - {VISIBLE_TAB}:
+        reload_table(name)
+    pending_views.clear()
+    executor.submit("table_versions", scheduler_service.table_versions,
+                    on_success=refresh_stale_views, on_error=show_error)
+
+def save_snapshot():
+    loaded = {name: (stamp, TAB_VIEWS[name][1].rows()) for name, stamp in view_stamps.items()}
+    if loaded:
+        try:
+            snapshot.write(loaded)
+        except OSError as exc:
+            print(f"Could not save the GUI snapshot: {exc}")
+
+# Every write goes through SchedulerService here, so cached reference rows stay fresh
+scheduler_service.enable_reference_cache()
 
 dpg.create_context()
 dpg.create_viewport(title='Scheduler GUI', width=800, height=600)
 
 with dpg.window(label="Scheduler", width=800, height=600):
-    with dpg.tab_bar():
-        with dpg.tab(label="Professors"):
+    with dpg.tab_bar(callback=tab_changed):
+        with dpg.tab(label="Professors", tag="prof_tab"):
             with dpg.group(horizontal=True):
-                with dpg.table(tag="prof_table", header_row=True, row_background=True,
-                             borders_innerH=True, borders_outerH=True, borders_innerV=True,
-                             borders_outerV=True, width=300, height=200):
-                    dpg.add_table_column(label="ID")
-                    dpg.add_table_column(label="Name")
-                    dpg.add_table_column(label="Document ID")
-
-                    update_prof_table()
+                prof_view.build(width=300, height=200, **TABLE_OPTIONS)
                 
                 with dpg.group(horizontal=False):
                     with dpg.group(horizontal=True):
@@ -379,18 +560,9 @@ with dpg.window(label="Scheduler", width=800, height=600):
                         dpg.add_button(label="Update", callback=update_professor_callback)
                         dpg.add_button(label="Delete", callback=delete_professor_callback)
 
-        with dpg.tab(label="Courses"):
+        with dpg.tab(label="Courses", tag="course_tab"):
             with dpg.group(horizontal=True):
-                with dpg.table(tag="course_table", header_row=True, row_background=True,
-                             borders_innerH=True, borders_outerH=True, borders_innerV=True,
-                             borders_outerV=True, width=500, height=200):
-                    dpg.add_table_column(label="ID")
-                    dpg.add_table_column(label="Code")
-                    dpg.add_table_column(label="Name")
-                    dpg.add_table_column(label="Weekly Hours")
-                    dpg.add_table_column(label="Requires Equipment")
-
-                    update_course_table()
+                course_view.build(width=500, height=200, **TABLE_OPTIONS)
                 
                 with dpg.group(horizontal=False):
                     with dpg.group(horizontal=True):
@@ -420,17 +592,9 @@ with dpg.window(label="Scheduler", width=800, height=600):
                         dpg.add_button(label="Update", callback=update_course_callback)
                         dpg.add_button(label="Delete", callback=delete_course_callback)
         
-        with dpg.tab(label="Classrooms"):
+        with dpg.tab(label="Classrooms", tag="classroom_tab"):
             with dpg.group(horizontal=True):
-                with dpg.table(tag="classroom_table", header_row=True, row_background=True,
-                             borders_innerH=True, borders_outerH=True, borders_innerV=True,
-                             borders_outerV=True, width=500, height=200):
-                    dpg.add_table_column(label="ID")
-                    dpg.add_table_column(label="Name")
-                    dpg.add_table_column(label="Has Equipment")
-                    dpg.add_table_column(label="Capacity")
-
-                    update_classroom_table()
+                classroom_view.build(width=500, height=200, **TABLE_OPTIONS)
                 
                 with dpg.group(horizontal=False):
                     with dpg.group(horizontal=True):
@@ -464,20 +628,23 @@ with dpg.window(label="Scheduler", width=800, height=600):
                 dpg.add_button(label="Assign", callback=assign_course_callback)
                 dpg.add_button(label="Remove", callback=remove_course_callback)
         
-        with dpg.tab(label="Schedule Session"):
-            with dpg.table(tag="schedule_table", header_row=True, row_background=True,
-                         borders_innerH=True, borders_outerH=True, borders_innerV=True,
-                         borders_outerV=True, width=500, height=200):
-
-                dpg.add_table_column(label="ID")
-                dpg.add_table_column(label="Course ID")
-                dpg.add_table_column(label="Professor ID")
-                dpg.add_table_column(label="Classroom ID")
-                dpg.add_table_column(label="Weekday")
-                dpg.add_table_column(label="Start Time")
-                dpg.add_table_column(label="End Time")
-
-                update_schedule_table()
+        with dpg.tab(label="Restrictions"):
+            with dpg.group(horizontal=True):
+                dpg.add_input_int(label="Professor ID", tag="restriction_professor_id", width=185)
+                dpg.add_button(label="Load", callback=load_restrictions_callback)
+            with dpg.table(header_row=True, width=400):
+                dpg.add_table_column(label="Day")
+                for block in RESTRICTION_BLOCKS:
+                    dpg.add_table_column(label=block.value)
+                for weekday in WeekDay:
+                    with dpg.table_row():
+                        dpg.add_text(weekday.value)
+                        for block in RESTRICTION_BLOCKS:
+                            dpg.add_checkbox(tag=restriction_tag(weekday, block))
+            dpg.add_button(label="Save", callback=save_restrictions_callback)
+
+        with dpg.tab(label="Schedule Session", tag="schedule_tab"):
+            schedule_view.build(width=500, height=200, **TABLE_OPTIONS)
 
             dpg.add_input_int(label="Course ID", tag="schedule_course_id")
             dpg.add_input_int(label="Professor ID", tag="schedule_professor_id")
@@ -495,16 +662,39 @@ with dpg.window(label="Scheduler", width=800, height=600):
                 dpg.add_input_int(label="Hour", default_value=11, min_value=0, max_value=23, tag="schedule_end_hour", width=100)
                 dpg.add_input_int(label="Minute", default_value=0, min_value=0, max_value=59, tag="schedule_end_minute", width=100)
             
-            dpg.add_button(label="Schedule Session", callback=schedule_session_callback)
+            with dpg.group(horizontal=True):
+                dpg.add_button(label="Suggest Slot", callback=suggest_slot_callback)
+                dpg.add_button(label="Schedule Session", callback=schedule_session_callback)
         
         with dpg.tab(label="Validate Schedule"):
             dpg.add_input_int(label="Course ID", tag="validate_course_id")
             dpg.add_button(label="Validate", callback=validate_course_callback)
+            dpg.add_separator()
+            with dpg.group(horizontal=True):
+                dpg.add_button(label="Validate All", callback=validate_all_callback)
+                dpg.add_checkbox(label="Only invalid", tag="validate_only_invalid", default_value=True)
+            validation_view.build(width=-1, height=200, **TABLE_OPTIONS)
+
+        if config.GUI_PERFORMANCE_TAB:
+            with dpg.tab(label="Performance"):
+                with dpg.group(horizontal=True):
+                    dpg.add_button(label="Refresh", callback=refresh_performance_callback)
+                    dpg.add_button(label="Reset", callback=reset_performance_callback)
+                    dpg.add_button(label="Export", callback=export_performance_callback)
+                performance_view.build(width=-1, height=250, **TABLE_OPTIONS)
 
     dpg.add_spacer(height=10)
     dpg.add_text("", tag="output_text")
 
+restore_from_snapshot()
+executor.submit("startup", prepare_database, on_success=database_prepared, on_error=show_error)
+
 dpg.setup_dearpygui()
 dpg.show_viewport()
-dpg.start_dearpygui()
+# Manual render loop so finished background tasks are applied between frames
+while dpg.is_dearpygui_running():
+    executor.drain()
+    dpg.render_dearpygui_frame()
+executor.shutdown(wait=False)
+save_snapshot()
 dpg.destroy_context()
@@ -0,0 +1,260 @@
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds of the latency histogram buckets, in milliseconds; a last bucket catches the rest
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class OperationStats(NamedTuple):
+    name: str
+    calls: int
+    errors: int
+    total_ms: float
+    max_ms: float
+    # Calls per latency bucket (LATENCY_BUCKETS_MS, then everything slower)
+    buckets: Tuple[int, ...]
+    statements: int
+    rows: int
+    db_ms: float
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def percentile_ms(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of calls (max_ms for the last bucket)."""
+        wanted = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class _Operation:
+    __slots__ = ("calls", "errors", "total", "maximum", "buckets", "statements", "rows", "db_time")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.statements = 0
+        self.rows = 0
+        self.db_time = 0.0
+
+
+class _CountingCursor:
+    """DBAPI cursor proxy that adds the rows fetched through it to the operations that ran the statement."""
+
+    def __init__(self, cursor, metrics: "Metrics", operations: Tuple[_Operation, ...]):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._operations = operations
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._metrics._add_rows(self._operations, 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._metrics._add_rows(self._operations, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._metrics._add_rows(self._operations, len(rows))
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class Metrics:
+    """
+    In-process call counts, latency histograms and SQL totals per named
+    operation. Operations nest per thread; a statement counts for every
+    operation running on its thread when it executes, so a service method
+    includes the SQL of the methods it calls.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations: Dict[str, _Operation] = {}
+        self._local = threading.local()
+
+    @contextmanager
+    def timed(self, name: str) -> Iterator[None]:
+        """Count one call of the named operation and time it."""
+        operation = self._operation(name)
+        stack = self._stack()
+        stack.append(operation)
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            stack.pop()
+            bucket = next(
+                (i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed <= bound), len(LATENCY_BUCKETS_MS)
+            )
+            with self._lock:
+                operation.calls += 1
+                operation.errors += failed
+                operation.total += elapsed
+                operation.maximum = max(operation.maximum, elapsed)
+                operation.buckets[bucket] += 1
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """func, timed under name."""
+        @functools.wraps(func)
+        def timed_call(*args, **kwargs):
+            with self.timed(name):
+                return func(*args, **kwargs)
+
+        return timed_call
+
+    def instrument(self, cls: type, prefix: Optional[str] = None) -> type:
+        """Time every public staticmethod of a class as '<prefix>.<method>'."""
+        prefix = prefix or cls.__name__
+        for name, member in list(vars(cls).items()):
+            if isinstance(member, staticmethod) and not name.startswith("_"):
+                setattr(cls, name, staticmethod(self.wrap(f"{prefix}.{name}", member.__func__)))
+        return cls
+
+    def instrument_engine(self, engine: Engine) -> None:
+        """Count statements, fetched rows and database time of an engine's connections."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def snapshot(self) -> List[OperationStats]:
+        """Current totals of every operation, by name."""
+        with self._lock:
+            return [
+                OperationStats(
+                    name, op.calls, op.errors, round(op.total, 3), round(op.maximum, 3), tuple(op.buckets),
+                    op.statements, op.rows, round(op.db_time * 1000, 3)
+                )
+                for name, op in sorted(self._operations.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._operations.clear()
+
+    def to_json(self) -> Dict:
+        return {
+            "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+            "operations": {
+                stats.name: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "total_ms": stats.total_ms,
+                    "mean_ms": round(stats.mean_ms, 3),
+                    "p95_ms": stats.percentile_ms(0.95),
+                    "max_ms": stats.max_ms,
+                    "buckets": list(stats.buckets),
+                    "statements": stats.statements,
+                    "rows": stats.rows,
+                    "db_ms": stats.db_ms,
+                }
+                for stats in self.snapshot()
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP scheduler_operation_seconds Latency of instrumented operations.",
+            "# TYPE scheduler_operation_seconds histogram",
+        ]
+        snapshot = self.snapshot()
+        for stats in snapshot:
+            label = _label(stats.name)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_MS, stats.buckets):
+                cumulative += count
+                lines.append(
+                    f'scheduler_operation_seconds_bucket{{operation="{label}",le="{bound / 1000:g}"}} {cumulative}'
+                )
+            lines.append(f'scheduler_operation_seconds_bucket{{operation="{label}",le="+Inf"}} {stats.calls}')
+            lines.append(f'scheduler_operation_seconds_sum{{operation="{label}"}} {stats.total_ms / 1000:.6f}')
+            lines.append(f'scheduler_operation_seconds_count{{operation="{label}"}} {stats.calls}')
+        for metric, help_text, value in (
+            ("scheduler_operation_errors_total", "Calls that raised.", lambda s: s.errors),
+            ("scheduler_sql_statements_total", "SQL statements executed.", lambda s: s.statements),
+            ("scheduler_sql_rows_total", "Rows fetched from result sets.", lambda s: s.rows),
+            ("scheduler_sql_seconds_total", "Time spent executing SQL statements.", lambda s: f"{s.db_ms / 1000:.6f}"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for stats in snapshot:
+                lines.append(f'{metric}{{operation="{_label(stats.name)}"}} {value(stats)}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Write the metrics to a file: Prometheus text for .prom/.txt, JSON otherwise."""
+        with open(path, "w") as handle:
+            if path.endswith((".prom", ".txt")):
+                handle.write(self.to_prometheus())
+            else:
+                json.dump(self.to_json(), handle, indent=2)
+
+    def _operation(self, name: str) -> _Operation:
+        operation = self._operations.get(name)
+        if operation is None:
+            with self._lock:
+                operation = self._operations.setdefault(name, _Operation())
+        return operation
+
+    def _stack(self) -> List[_Operation]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        operations = tuple(set(self._stack()))
+        if not operations or context is None:
+            return
+        elapsed = time.perf_counter() - getattr(context, "_metrics_started", time.perf_counter())
+        with self._lock:
+            for operation in operations:
+                operation.statements += 1
+                operation.db_time += elapsed
+        # Result rows are read after this event, through context.cursor
+        if cursor.description is not None and context.cursor is cursor:
+            context.cursor = _CountingCursor(cursor, self, operations)
+
+    def _add_rows(self, operations: Tuple[_Operation, ...], rows: int) -> None:
+        if rows:
+            with self._lock:
+                for operation in operations:
+                    operation.rows += rows
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# The application's metrics
+metrics = Metrics()
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from migrations import (
+    v0001_initial_schema,
+    v0002_scheduling_indexes,
+    v0003_booking_locks,
+    v0004_restriction_masks,
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+# Kept outside Base.metadata so create_all never touches it
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+MIGRATIONS: List[Migration] = [
+    Migration(module.VERSION, module.DESCRIPTION, module.upgrade)
+    for module in (
+        v0001_initial_schema, v0002_scheduling_indexes, v0003_booking_locks, v0004_restriction_masks
+    )
+]
+
+
+def current_version(engine: Engine) -> int:
+    """Highest migration version applied to the database, 0 if none."""
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        versions = connection.execute(select(schema_migrations.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Apply every pending migration up to target, each in its own transaction."""
+    applied: List[int] = []
+    version = current_version(engine)
+    for migration in MIGRATIONS:
+        if migration.version <= version or (target is not None and migration.version > target):
+            continue
+        with engine.begin() as connection:
+            migration.upgrade(connection)
+            connection.execute(insert(schema_migrations).values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.now()
+            ))
+        applied.append(migration.version)
+    return applied
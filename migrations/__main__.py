@@ -0,0 +1,45 @@
+import argparse
+import sys
+
+from sqlalchemy import create_engine
+
+from migrations import current_version, upgrade
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Database schema migrations")
+    parser.add_argument("command", choices=("upgrade", "current", "check-indexes"))
+    parser.add_argument("--url", help="Database URL (defaults to the application database)")
+    parser.add_argument("--target", type=int, help="Stop upgrading at this version")
+    args = parser.parse_args()
+
+    if args.command == "check-indexes":
+        # The check writes and deletes sample rows, so it runs on a scratch database
+        engine = create_engine(args.url or "sqlite://")
+    elif args.url:
+        engine = create_engine(args.url)
+    else:
+        from database import get_engine
+
+        engine = get_engine()
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.target)
+        print(f"Applied {applied}" if applied else "Database is up to date")
+        print(f"Current version: {current_version(engine)}")
+    elif args.command == "current":
+        print(f"Current version: {current_version(engine)}")
+    else:
+        from migrations.explain import check_indexes
+
+        problems = check_indexes(engine)
+        for statement, scans in problems:
+            print(f"Full scan ({'; '.join(scans)}):\n{statement}\n")
+        if problems:
+            return 1
+        print("Every filtered SchedulerService query uses an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+from datetime import time
+from typing import List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from migrations import upgrade
+from models import TimeBlock, WeekDay
+from services import SchedulerService
+
+
+def _exercise_services(engine: Engine) -> List[Tuple[str, object]]:
+    """Run the filtered SchedulerService queries once and capture their SQL."""
+    captured: List[Tuple[str, object]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        words = statement.split()
+        if not executemany and words[0].upper() == "SELECT" and "WHERE" in words:
+            captured.append((statement, parameters))
+
+    db = sessionmaker(bind=engine)()
+    professor = SchedulerService.add_professor(db, "Explain Professor", "EXPLAIN-0001")
+    course = SchedulerService.add_course(db, "EXPLAIN-C1", "Explain Course", 4, False)
+    classroom = SchedulerService.add_classroom(db, "EXPLAIN-R1", True, 30)
+    professor_id, course_id, classroom_id = professor.id, course.id, classroom.id
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        SchedulerService.get_professor_by_id(db, professor_id)
+        SchedulerService.get_course_by_id(db, course_id)
+        SchedulerService.get_classroom_by_id(db, classroom_id)
+        SchedulerService.assign_course_to_professor(db, professor_id, course_id)
+        SchedulerService.add_professor_restriction(db, professor_id, WeekDay.FRIDAY, TimeBlock.EVENING)
+        schedule = SchedulerService.schedule_course_session(
+            db, course_id, professor_id, classroom_id, WeekDay.MONDAY, time(8, 0), time(10, 0)
+        )
+        SchedulerService._check_scheduling_conflicts(
+            db, professor_id, classroom_id, WeekDay.TUESDAY, time(8, 0), time(10, 0)
+        )
+        SchedulerService.get_professor_schedule(db, professor_id)
+        SchedulerService.get_classroom_schedule(db, classroom_id)
+        SchedulerService.get_course_schedule(db, course_id)
+        SchedulerService.page_professors(db, after_id=0)
+        SchedulerService.page_schedules(db, after_id=0, professor_id=professor_id)
+        SchedulerService.page_schedules(db, after_id=0, classroom_id=classroom_id, weekday=WeekDay.MONDAY)
+        SchedulerService.page_schedules(db, after_id=0, course_id=course_id)
+        SchedulerService.validate_course_scheduling(db, course_id)
+        try:
+            SchedulerService.remove_course_from_professor(db, professor_id, course_id)
+        except ValueError:
+            pass  # the course is scheduled, the lookups still ran
+        SchedulerService.remove_course_session(db, schedule.id)
+        SchedulerService.remove_course_from_professor(db, professor_id, course_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        SchedulerService.delete_professor(db, professor_id)
+        SchedulerService.delete_course(db, course_id)
+        SchedulerService.delete_classroom(db, classroom_id)
+        db.close()
+    return captured
+
+
+def _full_scans(engine: Engine, statement: str, parameters) -> List[str]:
+    """Return the plan lines of a statement that read a whole table."""
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            return [row[3] for row in plan if row[3].startswith("SCAN ")]
+        if engine.dialect.name == "mysql":
+            plan = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+            return [f"{row['table']}: type ALL" for row in plan if row["type"] == "ALL"]
+    raise ValueError(f"EXPLAIN check is not supported for {engine.dialect.name}")
+
+
+def check_indexes(engine: Engine) -> List[Tuple[str, List[str]]]:
+    """
+    Migrate a scratch database, run the SchedulerService hot paths against it
+    and EXPLAIN every filtered SELECT they issue. Returns (statement, plan)
+    for each statement that falls back to a full table scan.
+    """
+    upgrade(engine)
+    problems = []
+    seen = set()
+    for statement, parameters in _exercise_services(engine):
+        if statement in seen:
+            continue
+        seen.add(statement)
+        scans = _full_scans(engine, statement, parameters)
+        if scans:
+            problems.append((statement, scans))
+    return problems
@@ -0,0 +1,12 @@
+from sqlalchemy.engine import Connection
+
+from config import Base
+import models  # noqa: F401  (registers the tables on Base.metadata)
+
+VERSION = 1
+DESCRIPTION = "Initial schema"
+
+
+def upgrade(connection: Connection) -> None:
+    """Create any missing table; databases created before migrations keep theirs."""
+    Base.metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,82 @@
+from sqlalchemy import Column, Index, Integer, MetaData, Table, delete, func, insert, select
+from sqlalchemy.engine import Connection
+
+from models import ProfessorRestrictionModel, professor_course_association
+
+VERSION = 2
+DESCRIPTION = "Composite indexes for scheduling queries, unique assignments and restrictions"
+
+# Frozen copy of the indexes as of this version; models.py declares the same ones
+_metadata = MetaData()
+_professor_course = Table(
+    "professor_course", _metadata,
+    Column("professor_id", Integer), Column("course_id", Integer),
+)
+_restrictions = Table(
+    "professor_restrictions", _metadata,
+    Column("professor_id", Integer), Column("weekday", Integer), Column("time_block", Integer),
+)
+_schedules = Table(
+    "schedules", _metadata,
+    Column("course_id", Integer), Column("professor_id", Integer), Column("classroom_id", Integer),
+    Column("weekday", Integer), Column("start_time", Integer), Column("end_time", Integer),
+)
+INDEXES = [
+    Index("ux_professor_course_professor_course",
+          _professor_course.c.professor_id, _professor_course.c.course_id, unique=True),
+    Index("ix_professor_course_course", _professor_course.c.course_id),
+    Index("ux_professor_restrictions_slot",
+          _restrictions.c.professor_id, _restrictions.c.weekday, _restrictions.c.time_block, unique=True),
+    Index("ix_schedules_professor_slot",
+          _schedules.c.professor_id, _schedules.c.weekday, _schedules.c.start_time, _schedules.c.end_time),
+    Index("ix_schedules_classroom_slot",
+          _schedules.c.classroom_id, _schedules.c.weekday, _schedules.c.start_time, _schedules.c.end_time),
+    Index("ix_schedules_course", _schedules.c.course_id, _schedules.c.weekday),
+]
+
+
+def _dedupe_assignments(connection: Connection) -> None:
+    """professor_course has no key, so duplicated pairs are deleted and inserted once."""
+    association = professor_course_association.c
+    duplicates = connection.execute(
+        select(association.professor_id, association.course_id)
+        .group_by(association.professor_id, association.course_id)
+        .having(func.count() > 1)
+    ).all()
+    for professor_id, course_id in duplicates:
+        connection.execute(delete(professor_course_association).where(
+            association.professor_id == professor_id,
+            association.course_id == course_id
+        ))
+        connection.execute(insert(professor_course_association).values(
+            professor_id=professor_id, course_id=course_id
+        ))
+
+
+def _dedupe_restrictions(connection: Connection) -> None:
+    """Keep the oldest row of every repeated (professor, weekday, time block)."""
+    seen = set()
+    doomed = []
+    rows = connection.execute(select(
+        ProfessorRestrictionModel.id,
+        ProfessorRestrictionModel.professor_id,
+        ProfessorRestrictionModel.weekday,
+        ProfessorRestrictionModel.time_block
+    ).order_by(ProfessorRestrictionModel.id))
+    for row in rows:
+        key = (row.professor_id, row.weekday, row.time_block)
+        if key in seen:
+            doomed.append(row.id)
+        seen.add(key)
+    for start in range(0, len(doomed), 1000):
+        connection.execute(delete(ProfessorRestrictionModel).where(
+            ProfessorRestrictionModel.id.in_(doomed[start:start + 1000])
+        ))
+
+
+def upgrade(connection: Connection) -> None:
+    """Remove duplicates the unique indexes would reject, then create the indexes."""
+    _dedupe_assignments(connection)
+    _dedupe_restrictions(connection)
+    for index in INDEXES:
+        index.create(connection, checkfirst=True)
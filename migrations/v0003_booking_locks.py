@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Enum, Index, Integer, MetaData, String, Table
+from sqlalchemy.engine import Connection
+
+VERSION = 3
+DESCRIPTION = "Per-resource-day booking lock rows for concurrent scheduling"
+
+# Frozen copy of the table as of this version; models.BookingLockModel declares the same one
+_metadata = MetaData()
+booking_locks = Table(
+    "booking_locks", _metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("resource", String(16), nullable=False),
+    Column("resource_id", Integer, nullable=False),
+    Column(
+        "weekday",
+        Enum("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", name="weekday"),
+        nullable=False
+    ),
+    Column("version", Integer, nullable=False),
+    Index("ux_booking_locks_resource_day", "resource", "resource_id", "weekday", unique=True),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    """Create the table; rows are added by the first booking of each resource-day."""
+    booking_locks.create(connection, checkfirst=True)
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table, bindparam, inspect, select, text, update
+from sqlalchemy.engine import Connection
+
+VERSION = 4
+DESCRIPTION = "Restriction bitmask on professors, filled from professor_restrictions"
+
+# Frozen copies as of this version. Enums are read as stored: weekday by value, time_block by name
+_metadata = MetaData()
+professors = Table(
+    "professors", _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("restriction_mask", Integer, nullable=False),
+)
+professor_restrictions = Table(
+    "professor_restrictions", _metadata,
+    Column("professor_id", Integer),
+    Column("weekday", String(16)),
+    Column("time_block", String(16)),
+)
+# Bit weekday * 3 + block, as timeslots.RESTRICTION_BITS; Saturday-block rows never restricted anything
+_WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+_BLOCKS = ["MORNING", "AFTERNOON", "EVENING"]
+
+
+def upgrade(connection: Connection) -> None:
+    """Add the column (databases created from the current models already have it) and fill it."""
+    columns = {column["name"] for column in inspect(connection).get_columns("professors")}
+    if "restriction_mask" not in columns:
+        connection.execute(text("ALTER TABLE professors ADD COLUMN restriction_mask INTEGER NOT NULL DEFAULT 0"))
+
+    masks = {}
+    for professor_id, weekday, block in connection.execute(select(professor_restrictions)):
+        if weekday in _WEEKDAYS and block in _BLOCKS:
+            bit = 1 << (_WEEKDAYS.index(weekday) * len(_BLOCKS) + _BLOCKS.index(block))
+            masks[professor_id] = masks.get(professor_id, 0) | bit
+    if masks:
+        connection.execute(
+            update(professors).where(professors.c.id == bindparam("professor_id")).values(
+                restriction_mask=bindparam("mask")
+            ),
+            [{"professor_id": professor_id, "mask": mask} for professor_id, mask in masks.items()]
+        )
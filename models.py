@@ -9,6 +9,7 @@ from sqlalchemy import (
     Table,
     Enum,
     Time,
+    Index,
     func,
 )
 from sqlalchemy.orm import relationship
@@ -20,6 +21,8 @@ professor_course_association = Table(
     Base.metadata,
     Column("professor_id", Integer, ForeignKey("professors.id")),
     Column("course_id", Integer, ForeignKey("courses.id")),
+    Index("ux_professor_course_professor_course", "professor_id", "course_id", unique=True),
+    Index("ix_professor_course_course", "course_id"),
 )
 
 
@@ -45,6 +48,9 @@ class ProfessorModel(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(100), nullable=False, index=True)
     document_id = Column(String(20), nullable=False, unique=True, index=True)
+    # One bit per restricted (weekday, time block), see timeslots.RESTRICTION_BITS;
+    # kept in step with the professor_restrictions rows by SchedulerService
+    restriction_mask = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationships
     courses = relationship(
@@ -73,6 +79,12 @@ class ProfessorRestrictionModel(Base):
     weekday = Column(Enum(WeekDay, values_callable=lambda x: [e.value for e in x]), nullable=False)
     time_block = Column(Enum(TimeBlock), nullable=False)
 
+    __table_args__ = (
+        Index(
+            "ux_professor_restrictions_slot", "professor_id", "weekday", "time_block", unique=True
+        ),
+    )
+
     # Relationships
     professor = relationship("ProfessorModel", back_populates="restrictions")
 
@@ -133,6 +145,13 @@ class ScheduleModel(Base):
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=False)
 
+    # Covering indexes for the conflict checks and the per-entity schedule lookups
+    __table_args__ = (
+        Index("ix_schedules_professor_slot", "professor_id", "weekday", "start_time", "end_time"),
+        Index("ix_schedules_classroom_slot", "classroom_id", "weekday", "start_time", "end_time"),
+        Index("ix_schedules_course", "course_id", "weekday"),
+    )
+
     # Relationships
     course = relationship("CourseModel", back_populates="schedules")
     professor = relationship("ProfessorModel", back_populates="schedules")
@@ -140,3 +159,24 @@ class ScheduleModel(Base):
 
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+
+class BookingLockModel(Base):
+    """
+    One row per (professor, weekday) and (classroom, weekday) that has been
+    booked, see booking.BookingVersions. Every write that places a session
+    bumps the version of its rows, so concurrent writers that checked the same
+    resource-day cannot both commit.
+    """
+    __tablename__ = "booking_locks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # "professor" or "classroom"
+    resource = Column(String(16), nullable=False)
+    resource_id = Column(Integer, nullable=False)
+    weekday = Column(Enum(WeekDay, values_callable=lambda x: [e.value for e in x]), nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ux_booking_locks_resource_day", "resource", "resource_id", "weekday", unique=True),
+    )
@@ -0,0 +1,272 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Iterator, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import ScheduleModel, WeekDay
+from timeslots import DAY_END_MINUTES, DAY_START_MINUTES, SLOT_MINUTES, slot_mask, to_minutes
+
+
+@dataclass
+class BookedSession:
+    course_id: Optional[int]
+    professor_id: int
+    classroom_id: int
+    weekday: WeekDay
+    start: int
+    end: int
+
+
+def _on_grid(start: int, end: int) -> bool:
+    """True if [start, end) lies inside opening hours on slot boundaries."""
+    return (
+        DAY_START_MINUTES <= start
+        and end <= DAY_END_MINUTES
+        and (start - DAY_START_MINUTES) % SLOT_MINUTES == 0
+        and (end - DAY_START_MINUTES) % SLOT_MINUTES == 0
+    )
+
+
+class _Lanes:
+    """Busy slots of one resource type, per weekday and then per resource id."""
+
+    def __init__(self):
+        self.masks: Dict[WeekDay, Dict[int, int]] = {day: {} for day in WeekDay}
+        self.entries: Dict[WeekDay, Dict[int, Set[Hashable]]] = {day: {} for day in WeekDay}
+        # Number of off-grid sessions behind each resource
+        self.ragged: Dict[WeekDay, Dict[int, int]] = {day: {} for day in WeekDay}
+
+    def link(self, weekday: WeekDay, resource_id: int, entry_id: Hashable, mask: int, on_grid: bool) -> None:
+        masks = self.masks[weekday]
+        masks[resource_id] = masks.get(resource_id, 0) | mask
+        self.entries[weekday].setdefault(resource_id, set()).add(entry_id)
+        if not on_grid:
+            ragged = self.ragged[weekday]
+            ragged[resource_id] = ragged.get(resource_id, 0) + 1
+
+    def unlink(
+        self,
+        weekday: WeekDay,
+        resource_id: int,
+        entry_id: Hashable,
+        on_grid: bool,
+        entries: Dict[Hashable, BookedSession]
+    ) -> None:
+        if not on_grid:
+            self.ragged[weekday][resource_id] -= 1
+        remaining = self.entries[weekday][resource_id]
+        remaining.discard(entry_id)
+        if not remaining:
+            del self.entries[weekday][resource_id]
+            del self.masks[weekday][resource_id]
+            return
+        # Slots can be shared by sessions that do not start on a boundary, so rebuild
+        mask = 0
+        for other in remaining:
+            mask |= slot_mask(entries[other].start, entries[other].end)
+        self.masks[weekday][resource_id] = mask
+
+
+class OccupancyIndex:
+    """
+    Bitset index of busy 15-minute slots (08:00-22:00) per (professor, weekday)
+    and per (classroom, weekday). A conflict check is a bitwise AND; only when
+    the AND is non-zero are the few entries behind the key compared exactly, so
+    sessions that do not start on a slot boundary keep the SQL overlap rules.
+    Keys holding only on-grid sessions answer on-grid queries from the bits.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, BookedSession] = {}
+        self._professors = _Lanes()
+        self._classrooms = _Lanes()
+        # Writers on several threads share the application's index
+        self._lock = threading.RLock()
+        # booking.ResourceDay -> version of its booking lock whose sessions are all in the index
+        self.lock_versions: Dict[Hashable, int] = {}
+
+    @classmethod
+    def load(cls, db: Session) -> "OccupancyIndex":
+        """Build the index from every row of the schedules table."""
+        index = cls()
+        for row in db.query(
+            ScheduleModel.id,
+            ScheduleModel.course_id,
+            ScheduleModel.professor_id,
+            ScheduleModel.classroom_id,
+            ScheduleModel.weekday,
+            ScheduleModel.start_time,
+            ScheduleModel.end_time
+        ):
+            index.add(
+                row.id, row.professor_id, row.classroom_id, row.weekday,
+                to_minutes(row.start_time), to_minutes(row.end_time), row.course_id
+            )
+        return index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry_id: Hashable) -> bool:
+        return entry_id in self._entries
+
+    def items(self) -> Iterator[Tuple[Hashable, BookedSession]]:
+        """Iterate over a snapshot of the (entry_id, session) pairs, safe while other threads write."""
+        with self._lock:
+            return iter(list(self._entries.items()))
+
+    def add(
+        self,
+        entry_id: Hashable,
+        professor_id: int,
+        classroom_id: int,
+        weekday: WeekDay,
+        start: int,
+        end: int,
+        course_id: Optional[int] = None
+    ) -> None:
+        """Register a session; start and end are minutes since midnight."""
+        with self._lock:
+            if entry_id in self._entries:
+                self.remove(entry_id)
+            self._entries[entry_id] = BookedSession(course_id, professor_id, classroom_id, weekday, start, end)
+            mask = slot_mask(start, end)
+            on_grid = _on_grid(start, end)
+            self._professors.link(weekday, professor_id, entry_id, mask, on_grid)
+            self._classrooms.link(weekday, classroom_id, entry_id, mask, on_grid)
+
+    def add_schedule(self, schedule: ScheduleModel) -> None:
+        """Register a persisted schedule row."""
+        self.add(
+            schedule.id, schedule.professor_id, schedule.classroom_id, schedule.weekday,
+            to_minutes(schedule.start_time), to_minutes(schedule.end_time), schedule.course_id
+        )
+
+    def remove(self, entry_id: Hashable) -> None:
+        """Forget a session. Unknown ids are ignored."""
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                return
+            on_grid = _on_grid(entry.start, entry.end)
+            self._professors.unlink(entry.weekday, entry.professor_id, entry_id, on_grid, self._entries)
+            self._classrooms.unlink(entry.weekday, entry.classroom_id, entry_id, on_grid, self._entries)
+            del self._entries[entry_id]
+
+    def note_versions(self, versions: Dict[Hashable, int]) -> None:
+        """
+        Record the booking lock versions claimed by sessions just added. A
+        version is only taken when the index already holds the one before it,
+        so a thread that lost the race to update the index leaves the key
+        behind (its checks then go to the database) instead of hiding a session.
+        """
+        with self._lock:
+            for key, version in versions.items():
+                if self.lock_versions.get(key, 0) == version - 1:
+                    self.lock_versions[key] = version
+
+    def reflects(self, versions: Dict[Hashable, int]) -> bool:
+        """True if the index holds every session booked up to the given lock versions."""
+        return all(self.lock_versions.get(key, 0) == version for key, version in versions.items())
+
+    def discard_where(
+        self,
+        professor_id: Optional[int] = None,
+        classroom_id: Optional[int] = None,
+        course_id: Optional[int] = None
+    ) -> None:
+        """Forget every session matching all given ids (used when rows cascade away)."""
+        with self._lock:
+            doomed = [
+                entry_id
+                for entry_id, entry in self._entries.items()
+                if (professor_id is None or entry.professor_id == professor_id)
+                and (classroom_id is None or entry.classroom_id == classroom_id)
+                and (course_id is None or entry.course_id == course_id)
+            ]
+            for entry_id in doomed:
+                self.remove(entry_id)
+
+    def professor_conflict(
+        self,
+        professor_id: int,
+        weekday: WeekDay,
+        start: int,
+        end: int,
+        ignore: Optional[Hashable] = None
+    ) -> bool:
+        """True if the professor is busy at any point of [start, end) on weekday."""
+        return self._conflict(self._professors, professor_id, weekday, start, end, ignore)
+
+    def classroom_conflict(
+        self,
+        classroom_id: int,
+        weekday: WeekDay,
+        start: int,
+        end: int,
+        ignore: Optional[Hashable] = None
+    ) -> bool:
+        """True if the classroom is booked at any point of [start, end) on weekday."""
+        return self._conflict(self._classrooms, classroom_id, weekday, start, end, ignore)
+
+    def free_classrooms(
+        self,
+        classroom_ids: Iterable[int],
+        weekday: WeekDay,
+        start: int,
+        end: int
+    ) -> Iterator[int]:
+        """Yield the classrooms, in the given order, that are free for [start, end) on weekday."""
+        mask = slot_mask(start, end)
+        exact = _on_grid(start, end)
+        masks = self._classrooms.masks[weekday]
+        ragged = self._classrooms.ragged[weekday]
+        entries = self._classrooms.entries[weekday]
+        free = []
+        # Decided under the lock and yielded after it, so a slow consumer never blocks writers
+        with self._lock:
+            for classroom_id in classroom_ids:
+                if not masks.get(classroom_id, 0) & mask:
+                    free.append(classroom_id)
+                elif exact and not ragged.get(classroom_id):
+                    continue
+                elif not self._overlaps(entries[classroom_id], start, end, None):
+                    free.append(classroom_id)
+        yield from free
+
+    def professor_mask(self, professor_id: int, weekday: WeekDay) -> int:
+        """Busy slots of a professor on a weekday."""
+        return self._professors.masks[weekday].get(professor_id, 0)
+
+    def classroom_mask(self, classroom_id: int, weekday: WeekDay) -> int:
+        """Busy slots of a classroom on a weekday."""
+        return self._classrooms.masks[weekday].get(classroom_id, 0)
+
+    def professor_sessions(self, professor_id: int, weekday: WeekDay) -> int:
+        """Number of sessions a professor teaches on a weekday."""
+        return len(self._professors.entries[weekday].get(professor_id, ()))
+
+    def _conflict(
+        self,
+        lanes: _Lanes,
+        resource_id: int,
+        weekday: WeekDay,
+        start: int,
+        end: int,
+        ignore: Optional[Hashable]
+    ) -> bool:
+        with self._lock:
+            if not lanes.masks[weekday].get(resource_id, 0) & slot_mask(start, end):
+                return False
+            if ignore is None and not lanes.ragged[weekday].get(resource_id) and _on_grid(start, end):
+                return True
+            return self._overlaps(lanes.entries[weekday][resource_id], start, end, ignore)
+
+    def _overlaps(self, entry_ids: Set[Hashable], start: int, end: int, ignore: Optional[Hashable]) -> bool:
+        """Exact interval test against the sessions behind a key; the caller holds the lock."""
+        return any(
+            self._entries[entry_id].start < end and self._entries[entry_id].end > start
+            for entry_id in entry_ids
+            if entry_id != ignore
+        )
@@ -0,0 +1,255 @@
+import math
+import random
+import time as clock
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from models import WeekDay
+from occupancy import OccupancyIndex
+from solver import SolverClassroom, SolverCourse
+from timeslots import from_minutes, is_restricted, session_starts
+
+# (weekday, start, end, classroom_id) with minutes since midnight
+Placement = Tuple[WeekDay, int, int, int]
+
+WEEKDAYS = list(WeekDay)
+
+
+@dataclass
+class OptimizerSession:
+    schedule_id: int
+    course_id: int
+    professor_id: int
+    classroom_id: int
+    weekday: WeekDay
+    start: int
+    end: int
+
+
+@dataclass
+class CostWeights:
+    # Per hour a professor waits between two sessions of the same day
+    idle_hour: float = 1.0
+    # Per squared teaching hour of a professor on one day; favours spreading the load
+    day_load: float = 0.1
+    # Per extra classroom a professor uses on one day
+    room_change: float = 0.5
+    # Per session of a course without equipment needs held in an equipped classroom
+    equipment_waste: float = 0.3
+
+
+@dataclass
+class OptimizerResult:
+    # (schedule_id, new placement) for every session that ended up somewhere else
+    moves: List[Tuple[int, Placement]] = field(default_factory=list)
+    initial_cost: float = 0.0
+    final_cost: float = 0.0
+    iterations: int = 0
+    accepted: int = 0
+
+
+class TimetableOptimizer:
+    """
+    Simulated annealing over an existing timetable. A move relocates one
+    session to another weekday, start or classroom and is only tried when the
+    rules of SchedulerService.schedule_course_session still hold (no overlaps,
+    restrictions, equipment, block length) and the assignment keeps one
+    session per weekday. The soft cost is a sum of per (professor, weekday)
+    terms plus a per-session term, so a move is priced by re-evaluating the
+    one or two days it touches.
+    """
+
+    def __init__(
+        self,
+        courses: Dict[int, SolverCourse],
+        classrooms: List[SolverClassroom],
+        restrictions: Dict[int, int],
+        sessions: List[OptimizerSession],
+        weights: Optional[CostWeights] = None,
+        step_minutes: int = 60,
+        seed: Optional[int] = None
+    ):
+        if step_minutes <= 0:
+            raise ValueError("Step minutes must be a positive integer")
+        self.courses = courses
+        self.classrooms = {room.id: room for room in classrooms}
+        self.restrictions = restrictions
+        self.weights = weights or CostWeights()
+        self.step_minutes = step_minutes
+        self.random = random.Random(seed)
+
+        self.sessions = {session.schedule_id: session for session in sessions}
+        self.occupancy = OccupancyIndex()
+        self._days: Dict[Tuple[int, WeekDay], Dict[int, OptimizerSession]] = {}
+        self._task_days: Dict[Tuple[int, int], List[WeekDay]] = {}
+        for session in sessions:
+            self.occupancy.add(
+                session.schedule_id, session.professor_id, session.classroom_id, session.weekday,
+                session.start, session.end, session.course_id
+            )
+            self._days.setdefault((session.professor_id, session.weekday), {})[session.schedule_id] = session
+            self._task_days.setdefault((session.professor_id, session.course_id), []).append(session.weekday)
+
+        self._rooms: Dict[int, List[int]] = {
+            course.id: [room.id for room in classrooms if room.has_equipment or not course.requires_equipment]
+            for course in courses.values()
+        }
+        # Sessions of unknown courses, or of courses no classroom can host, stay where they are
+        self._movable = [session.schedule_id for session in sessions if self._rooms.get(session.course_id)]
+        self._starts: Dict[int, List[int]] = {}
+
+    def cost(self) -> float:
+        """Soft cost of the whole timetable, computed from scratch."""
+        total = sum(self._day_cost(list(day.values())) for day in self._days.values())
+        return total + sum(
+            self._session_cost(session.course_id, session.classroom_id) for session in self.sessions.values()
+        )
+
+    def optimize(
+        self,
+        max_iterations: int = 20000,
+        time_limit_seconds: Optional[float] = None,
+        initial_temperature: float = 2.0,
+        final_temperature: float = 0.01
+    ) -> OptimizerResult:
+        """Anneal until the iteration or time budget runs out and keep the best timetable seen."""
+        if max_iterations <= 0:
+            raise ValueError("Max iterations must be a positive integer")
+        if not 0 < final_temperature <= initial_temperature:
+            raise ValueError("Temperatures must satisfy 0 < final <= initial")
+
+        original = {sid: self._placement(session) for sid, session in self.sessions.items()}
+        current = self.cost()
+        result = OptimizerResult(initial_cost=current)
+        best = current
+        # The best timetable is only copied when an uphill move is about to leave it
+        best_snapshot: Dict[int, Placement] = {}
+        at_best = True
+        cooling = (final_temperature / initial_temperature) ** (1.0 / max_iterations)
+        temperature = initial_temperature
+        deadline = None if time_limit_seconds is None else clock.monotonic() + time_limit_seconds
+
+        while self._movable and result.iterations < max_iterations:
+            if deadline is not None and result.iterations % 256 == 0 and clock.monotonic() >= deadline:
+                break
+            result.iterations += 1
+            temperature *= cooling
+            move = self._propose()
+            if move is None:
+                continue
+            schedule_id, target = move
+            delta = self._delta(schedule_id, target)
+            if delta > 0 and self.random.random() >= math.exp(-delta / temperature):
+                continue
+            if at_best and delta > 0:
+                best_snapshot = {sid: self._placement(session) for sid, session in self.sessions.items()}
+            self._apply(schedule_id, target)
+            current += delta
+            result.accepted += 1
+            best = min(best, current)
+            at_best = current <= best + 1e-9
+
+        if not at_best:
+            for schedule_id, placement in best_snapshot.items():
+                if self._placement(self.sessions[schedule_id]) != placement:
+                    self._apply(schedule_id, placement)
+        result.final_cost = self.cost()
+        result.moves = [
+            (sid, self._placement(session))
+            for sid, session in self.sessions.items()
+            if self._placement(session) != original[sid]
+        ]
+        return result
+
+    def _placement(self, session: OptimizerSession) -> Placement:
+        return session.weekday, session.start, session.end, session.classroom_id
+
+    def _propose(self) -> Optional[Tuple[int, Placement]]:
+        """A random legal relocation of a random session, or None when the draw is not legal."""
+        schedule_id = self.random.choice(self._movable)
+        session = self.sessions[schedule_id]
+        duration = session.end - session.start
+        weekday, start, room = session.weekday, session.start, session.classroom_id
+        kind = self.random.random()
+        if kind < 0.6:
+            if duration not in self._starts:
+                self._starts[duration] = list(session_starts(duration, self.step_minutes))
+            if not self._starts[duration]:
+                return None
+            weekday = self.random.choice(WEEKDAYS)
+            start = self.random.choice(self._starts[duration])
+        if kind >= 0.3:
+            room = self.random.choice(self._rooms[session.course_id])
+        target = (weekday, start, start + duration, room)
+        if target == self._placement(session):
+            return None
+
+        if is_restricted(self.restrictions.get(session.professor_id, 0), weekday, from_minutes(start)):
+            return None
+        if weekday != session.weekday and weekday in self._task_days[(session.professor_id, session.course_id)]:
+            return None
+        if self.occupancy.professor_conflict(session.professor_id, weekday, start, start + duration, schedule_id):
+            return None
+        if self.occupancy.classroom_conflict(room, weekday, start, start + duration, schedule_id):
+            return None
+        return schedule_id, target
+
+    def _delta(self, schedule_id: int, target: Placement) -> float:
+        """Cost change of moving one session, from the days it leaves and joins."""
+        session = self.sessions[schedule_id]
+        weekday, start, end, room = target
+        moved = OptimizerSession(
+            schedule_id, session.course_id, session.professor_id, room, weekday, start, end
+        )
+        old_day = self._days[(session.professor_id, session.weekday)]
+        before = self._day_cost(list(old_day.values()))
+        rest = [other for sid, other in old_day.items() if sid != schedule_id]
+        if weekday == session.weekday:
+            after = self._day_cost(rest + [moved])
+        else:
+            new_day = list(self._days.get((session.professor_id, weekday), {}).values())
+            before += self._day_cost(new_day)
+            after = self._day_cost(rest) + self._day_cost(new_day + [moved])
+        return (
+            after - before
+            + self._session_cost(session.course_id, room)
+            - self._session_cost(session.course_id, session.classroom_id)
+        )
+
+    def _apply(self, schedule_id: int, target: Placement) -> None:
+        session = self.sessions[schedule_id]
+        weekday, start, end, room = target
+        del self._days[(session.professor_id, session.weekday)][schedule_id]
+        days = self._task_days[(session.professor_id, session.course_id)]
+        days.remove(session.weekday)
+        days.append(weekday)
+        session.weekday, session.start, session.end, session.classroom_id = weekday, start, end, room
+        self._days.setdefault((session.professor_id, weekday), {})[schedule_id] = session
+        self.occupancy.add(
+            schedule_id, session.professor_id, room, weekday, start, end, session.course_id
+        )
+
+    def _day_cost(self, sessions: List[OptimizerSession]) -> float:
+        """Idle hours, load and classroom changes of one professor on one day."""
+        if not sessions:
+            return 0.0
+        ordered = sorted(sessions, key=lambda s: s.start)
+        idle = 0
+        reach = ordered[0].end
+        for session in ordered[1:]:
+            idle += max(0, session.start - reach)
+            reach = max(reach, session.end)
+        hours = sum(session.end - session.start for session in ordered) / 60
+        rooms = len({session.classroom_id for session in ordered})
+        return (
+            self.weights.idle_hour * idle / 60
+            + self.weights.day_load * hours * hours
+            + self.weights.room_change * (rooms - 1)
+        )
+
+    def _session_cost(self, course_id: int, classroom_id: int) -> float:
+        course = self.courses.get(course_id)
+        room = self.classrooms.get(classroom_id)
+        if course is None or room is None or course.requires_equipment or not room.has_equipment:
+            return 0.0
+        return self.weights.equipment_waste
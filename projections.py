@@ -0,0 +1,68 @@
+from datetime import time
+from typing import List, NamedTuple, Optional
+
+from models import WeekDay
+
+
+# Compact read-only rows for list views. They hold plain column values, so they
+# stay usable after the session is closed and never trigger lazy loads.
+
+class ProfessorRow(NamedTuple):
+    id: int
+    name: str
+    document_id: str
+    # See timeslots.RESTRICTION_BITS
+    restriction_mask: int
+
+
+class CourseRow(NamedTuple):
+    id: int
+    code: str
+    name: str
+    weekly_hours: int
+    requires_equipment: bool
+
+
+class ClassroomRow(NamedTuple):
+    id: int
+    name: str
+    has_equipment: bool
+    capacity: int
+
+
+class ScheduleRow(NamedTuple):
+    id: int
+    course_id: int
+    course_name: str
+    professor_id: int
+    professor_name: str
+    classroom_id: int
+    classroom_name: str
+    weekday: WeekDay
+    start_time: time
+    end_time: time
+
+
+class Page(NamedTuple):
+    rows: List[NamedTuple]
+    # Pass as after_id to get the next page; None on the last page
+    next_after: Optional[int]
+
+
+class CourseValidation(NamedTuple):
+    course_id: int
+    code: str
+    name: str
+    weekly_hours: int
+    scheduled_hours: float
+    blocks: int
+    weekdays: int
+    valid: bool
+    reason: Optional[str]
+
+
+class SlotOption(NamedTuple):
+    classroom_id: int
+    weekday: WeekDay
+    start_time: time
+    end_time: time
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+
+class ReferenceCache:
+    """
+    Bounded LRU cache with a time-to-live, for rows that rarely change
+    (professors, courses, classrooms, assignments). Entries are keyed by
+    (kind, key) and must be immutable values, never ORM instances, because
+    they outlive the session that loaded them. Writers invalidate explicitly;
+    the TTL bounds staleness from writes made by other processes. A value
+    loaded while its entry was invalidated is returned but not kept, since it
+    may predate the write.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if max_entries <= 0:
+            raise ValueError("Max entries must be a positive integer")
+        if ttl_seconds <= 0:
+            raise ValueError("TTL must be a positive number of seconds")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        # Bumped by invalidate() and clear(); a load is only stored if none moved meanwhile
+        self._epoch = 0
+        self._kind_generations: Dict[str, int] = {}
+        # [loads running, invalidations since the first started] per key, dropped when the last load ends
+        self._in_flight: Dict[Tuple[str, Hashable], List[int]] = {}
+
+    def _generation(self, entry_key: Tuple[str, Hashable]) -> Tuple[int, int, int]:
+        return self._epoch, self._kind_generations.get(entry_key[0], 0), self._in_flight[entry_key][1]
+
+    def get_or_load(self, kind: str, key: Hashable, load: Callable[[], Optional[V]]) -> Optional[V]:
+        """Return the cached value or call load() and keep its result. None results are not cached."""
+        entry_key = (kind, key)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(entry_key)
+                    self._hits += 1
+                    return value
+                del self._entries[entry_key]
+                self._expirations += 1
+            self._misses += 1
+            self._in_flight.setdefault(entry_key, [0, 0])[0] += 1
+            generation = self._generation(entry_key)
+
+        value = None
+        try:
+            value = load()
+        finally:
+            with self._lock:
+                if value is not None and self._generation(entry_key) == generation:
+                    self._store(entry_key, value)
+                flight = self._in_flight[entry_key]
+                flight[0] -= 1
+                if not flight[0]:
+                    del self._in_flight[entry_key]
+        return value
+
+    def put(self, kind: str, key: Hashable, value: object) -> None:
+        """Store a value, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            self._store((kind, key), value)
+
+    def _store(self, entry_key: Tuple[str, Hashable], value: object) -> None:
+        self._entries[entry_key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(entry_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, kind: str, key: Optional[Hashable] = None) -> None:
+        """Forget one entry, or every entry of a kind when key is None."""
+        with self._lock:
+            if key is not None:
+                entry_key = (kind, key)
+                self._entries.pop(entry_key, None)
+                # Only a load already running can store a value that predates this
+                if entry_key in self._in_flight:
+                    self._in_flight[entry_key][1] += 1
+                return
+            self._kind_generations[kind] = self._kind_generations.get(kind, 0) + 1
+            for entry_key in [k for k in self._entries if k[0] == kind]:
+                del self._entries[entry_key]
+
+    def clear(self) -> None:
+        """Forget every entry (after writes that bypass the service, e.g. bulk imports)."""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+            # The epoch covers every kind, so their counters can start over
+            self._kind_generations.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, self._expirations, len(self._entries))
@@ -0,0 +1,131 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from models import WeekDay
+from occupancy import OccupancyIndex
+from projections import ClassroomRow
+
+
+class RoomDemand(NamedTuple):
+    """A session with a fixed time that still needs a classroom (times in minutes since midnight)."""
+    professor_id: int
+    weekday: WeekDay
+    start: int
+    end: int
+    requires_equipment: bool
+    students: int
+
+
+def _augment(
+    root: int,
+    candidates: List[List[int]],
+    match_left: List[Optional[int]],
+    match_right: Dict[int, int],
+    depth: Dict[int, Optional[int]]
+) -> bool:
+    """Depth-first search for one augmenting path along the BFS layers, flipping it when found."""
+    stack = [(root, iter(candidates[root]))]
+    path: List[int] = []
+    while stack:
+        left, rooms = stack[-1]
+        for room in rooms:
+            owner = match_right.get(room)
+            if owner is None:
+                path.append(room)
+                for (node, _), chosen in zip(stack, path):
+                    match_left[node] = chosen
+                    match_right[chosen] = node
+                return True
+            if depth.get(owner) == depth[left] + 1:
+                path.append(room)
+                stack.append((owner, iter(candidates[owner])))
+                break
+        else:
+            # Dead end for the rest of this phase
+            depth[left] = None
+            stack.pop()
+            if path:
+                path.pop()
+    return False
+
+
+def max_matching(candidates: List[List[int]]) -> List[Optional[int]]:
+    """
+    Hopcroft-Karp maximum matching of sessions (list positions) to rooms.
+    candidates[i] lists the rooms session i may use, preferred first; a greedy
+    pass over the most constrained sessions seeds the matching, so preferred
+    rooms are kept unless giving them up places another session.
+    """
+    match_left: List[Optional[int]] = [None] * len(candidates)
+    match_right: Dict[int, int] = {}
+    for left in sorted(range(len(candidates)), key=lambda i: len(candidates[i])):
+        for room in candidates[left]:
+            if room not in match_right:
+                match_left[left] = room
+                match_right[room] = left
+                break
+
+    while True:
+        free = [left for left, room in enumerate(match_left) if room is None and candidates[left]]
+        depth: Dict[int, Optional[int]] = dict.fromkeys(free, 0)
+        queue = list(free)
+        reachable = False
+        for left in queue:
+            for room in candidates[left]:
+                owner = match_right.get(room)
+                if owner is None:
+                    reachable = True
+                elif owner not in depth:
+                    depth[owner] = depth[left] + 1
+                    queue.append(owner)
+        if not reachable:
+            return match_left
+        if not any([_augment(left, candidates, match_left, match_right, depth) for left in free]):
+            return match_left
+
+
+def match_rooms(
+    demands: Sequence[RoomDemand],
+    classrooms: Sequence[ClassroomRow],
+    occupancy: OccupancyIndex
+) -> List[Optional[int]]:
+    """
+    Classroom id for each demand, or None when it cannot be placed. A room
+    fits when it has equipment for courses that need it and at least as many
+    seats as students. Each weekday is swept in start order; the sessions that
+    start together are matched with max_matching against the rooms still free
+    for their whole interval, then booked in `occupancy` so later starts see
+    them. With interchangeable rooms this is optimal (interval partitioning);
+    otherwise it places the most sessions possible at each start time.
+    Rooms are preferred best fit first: no spare equipment, fewest seats.
+    """
+    rooms = sorted(classrooms, key=lambda room: (room.has_equipment, room.capacity, room.id))
+    fitting: Dict[Tuple[bool, int], List[int]] = {}
+    assignment: List[Optional[int]] = [None] * len(demands)
+
+    groups: Dict[Tuple[WeekDay, int], List[int]] = {}
+    for index, demand in enumerate(demands):
+        groups.setdefault((demand.weekday, demand.start), []).append(index)
+        need = (demand.requires_equipment, demand.students)
+        if need not in fitting:
+            fitting[need] = [
+                room.id for room in rooms
+                if (room.has_equipment or not demand.requires_equipment) and room.capacity >= demand.students
+            ]
+
+    for weekday in WeekDay:
+        for start in sorted(start for day, start in groups if day == weekday):
+            batch = groups[(weekday, start)]
+            candidates = [
+                list(occupancy.free_classrooms(
+                    fitting[(demands[i].requires_equipment, demands[i].students)],
+                    weekday, demands[i].start, demands[i].end
+                ))
+                for i in batch
+            ]
+            for index, room_id in zip(batch, max_matching(candidates)):
+                if room_id is None:
+                    continue
+                demand = demands[index]
+                occupancy.add(("room", index), demand.professor_id, room_id, weekday, demand.start, demand.end)
+                assignment[index] = room_id
+    return assignment
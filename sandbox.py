@@ -0,0 +1,326 @@
+from datetime import time
+from itertools import count
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import ProfessorModel, ProfessorRestrictionModel, ScheduleModel, TimeBlock, WeekDay
+from booking import BookingVersions, booking_keys, with_retries
+from errors import ConflictError, NotFoundError
+from occupancy import OccupancyIndex
+from projections import CourseValidation
+from services import RuleData, SchedulerService, SessionSpec
+from timeslots import determine_time_block, is_restricted, restriction_bit, to_minutes
+
+
+class SandboxConflict(NamedTuple):
+    # "professor", "classroom" or "restriction"
+    kind: str
+    keys: Tuple[Hashable, ...]
+    reason: str
+
+
+class SandboxDiff(NamedTuple):
+    added: Dict[Hashable, SessionSpec]
+    removed: List[int]
+    moved: Dict[int, SessionSpec]
+    restrictions: List[Tuple[int, WeekDay, TimeBlock]]
+
+
+class TimetableSandbox:
+    """
+    What-if copy of the timetable. The schedules read at open() are a shared,
+    read-only base; edits live in an overlay keyed by schedule id (or by
+    ("new", n) for sessions added here) and never touch the database until
+    commit(). Every edit goes through SchedulerService._check_spec, the rules
+    of schedule_course_session, against the sandbox's own state.
+    """
+
+    def __init__(self, base: Dict[int, SessionSpec], rules: RuleData):
+        self._base = base
+        self._rules = rules
+        self._base_restricted = dict(rules.restricted)
+        self._overlay: Dict[Hashable, Optional[SessionSpec]] = {}
+        self._new_restrictions: List[Tuple[int, WeekDay, TimeBlock]] = []
+        self._new_keys = count(1)
+        self._occupancy = OccupancyIndex()
+        for key, spec in base.items():
+            self._book(key, spec)
+
+    @classmethod
+    def open(cls, db: Session) -> "TimetableSandbox":
+        """Snapshot the schedules table and the reference rows behind the rules."""
+        base = {
+            row.id: SessionSpec(
+                row.course_id, row.professor_id, row.classroom_id, row.weekday, row.start_time, row.end_time
+            )
+            for row in db.execute(select(
+                ScheduleModel.id,
+                ScheduleModel.course_id,
+                ScheduleModel.professor_id,
+                ScheduleModel.classroom_id,
+                ScheduleModel.weekday,
+                ScheduleModel.start_time,
+                ScheduleModel.end_time
+            ))
+        }
+        return cls(base, SchedulerService._load_rule_data(db))
+
+    def sessions(self) -> Iterator[Tuple[Hashable, SessionSpec]]:
+        """Current (key, session) pairs: the base with the overlay applied."""
+        for key, spec in self._base.items():
+            if key in self._overlay:
+                spec = self._overlay[key]
+            if spec is not None:
+                yield key, spec
+        for key, spec in self._overlay.items():
+            if key not in self._base and spec is not None:
+                yield key, spec
+
+    def get(self, key: Hashable) -> SessionSpec:
+        spec = self._overlay[key] if key in self._overlay else self._base.get(key)
+        if spec is None:
+            raise NotFoundError(f"Schedule with ID {key} not found")
+        return spec
+
+    def schedule(
+        self,
+        course_id: int,
+        professor_id: int,
+        classroom_id: int,
+        weekday: WeekDay,
+        start_time: time,
+        end_time: time
+    ) -> Hashable:
+        """Add a session and return its sandbox key."""
+        spec = SessionSpec(course_id, professor_id, classroom_id, weekday, start_time, end_time)
+        SchedulerService._check_spec(spec, self._rules, self._occupancy)
+        key = ("new", next(self._new_keys))
+        self._overlay[key] = spec
+        self._book(key, spec)
+        return key
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a session."""
+        self.get(key)
+        if key in self._base:
+            self._overlay[key] = None
+        else:
+            del self._overlay[key]
+        self._occupancy.remove(key)
+
+    def move(
+        self,
+        key: Hashable,
+        classroom_id: Optional[int] = None,
+        weekday: Optional[WeekDay] = None,
+        start_time: Optional[time] = None,
+        end_time: Optional[time] = None
+    ) -> None:
+        """Change the classroom, weekday or times of a session; unset fields keep their value."""
+        spec = self.get(key)
+        moved = spec._replace(
+            classroom_id=spec.classroom_id if classroom_id is None else classroom_id,
+            weekday=spec.weekday if weekday is None else weekday,
+            start_time=spec.start_time if start_time is None else start_time,
+            end_time=spec.end_time if end_time is None else end_time
+        )
+        SchedulerService._check_spec(moved, self._rules, self._occupancy, ignore=key)
+        if self._base.get(key) == moved:
+            # Moved back to where it started
+            self._overlay.pop(key, None)
+        else:
+            self._overlay[key] = moved
+        self._book(key, moved)
+
+    def restrict(self, professor_id: int, weekday: WeekDay, time_block: TimeBlock) -> None:
+        """
+        Add a professor restriction. Sessions already in that block are not
+        removed; they show up in conflicts().
+        """
+        if professor_id not in self._rules.professors:
+            raise NotFoundError(f"Professor with ID {professor_id} not found")
+        bit = restriction_bit(weekday, time_block)
+        mask = self._rules.restricted.get(professor_id, 0)
+        if mask & bit:
+            raise ConflictError(f"Professor already has a restriction for {weekday.value} during {time_block.value}")
+        self._rules.restricted[professor_id] = mask | bit
+        self._new_restrictions.append((professor_id, weekday, time_block))
+
+    def reset(self) -> None:
+        """Drop every edit and go back to the snapshot."""
+        for key in list(self._overlay):
+            self._occupancy.remove(key)
+            if key in self._base:
+                self._book(key, self._base[key])
+        self._overlay.clear()
+        self._rules.restricted.clear()
+        self._rules.restricted.update(self._base_restricted)
+        self._new_restrictions.clear()
+
+    def diff(self) -> SandboxDiff:
+        """The edits made since open() (or the last commit)."""
+        return SandboxDiff(
+            added={key: spec for key, spec in self._overlay.items() if key not in self._base},
+            removed=[key for key, spec in self._overlay.items() if key in self._base and spec is None],
+            moved={key: spec for key, spec in self._overlay.items() if key in self._base and spec is not None},
+            restrictions=list(self._new_restrictions)
+        )
+
+    def conflicts(self) -> List[SandboxConflict]:
+        """Overlapping sessions per professor and per classroom, and sessions inside a restriction."""
+        lanes: Dict[Tuple[str, int, WeekDay], List[Tuple[int, int, Hashable]]] = {}
+        found: List[SandboxConflict] = []
+        for key, spec in self.sessions():
+            start, end = to_minutes(spec.start_time), to_minutes(spec.end_time)
+            lanes.setdefault(("professor", spec.professor_id, spec.weekday), []).append((start, end, key))
+            lanes.setdefault(("classroom", spec.classroom_id, spec.weekday), []).append((start, end, key))
+            if is_restricted(self._rules.restricted.get(spec.professor_id, 0), spec.weekday, spec.start_time):
+                block = determine_time_block(spec.start_time)
+                found.append(SandboxConflict(
+                    "restriction", (key,),
+                    f"Professor has a restriction for {spec.weekday.value} during {block.value}"
+                ))
+        for (kind, _, weekday), sessions in lanes.items():
+            sessions.sort(key=lambda session: session[:2])
+            # Sweep: each session is compared with the earlier ones still running
+            running: List[Tuple[int, int, Hashable]] = []
+            for start, end, key in sessions:
+                running = [other for other in running if other[1] > start]
+                for other in running:
+                    label = "Professor already has a class" if kind == "professor" else "Classroom is already booked"
+                    found.append(SandboxConflict(kind, (other[2], key), f"{label} at this time on {weekday.value}"))
+                running.append((start, end, key))
+        return found
+
+    def validation(self, only_invalid: bool = False) -> List[CourseValidation]:
+        """validate_all_courses over the sandbox's sessions."""
+        totals: Dict[int, List] = {}
+        for _, spec in self.sessions():
+            minutes = to_minutes(spec.end_time) - to_minutes(spec.start_time)
+            total = totals.setdefault(spec.course_id, [0, 0, None, None, set()])
+            total[0] += minutes
+            total[1] += 1
+            total[2] = minutes if total[2] is None else min(total[2], minutes)
+            total[3] = minutes if total[3] is None else max(total[3], minutes)
+            total[4].add(spec.weekday)
+        report = []
+        for course_id in sorted(self._rules.courses):
+            course = self._rules.courses[course_id]
+            minutes, blocks, shortest, longest, days = totals.get(course_id, [0, 0, None, None, set()])
+            report.append(SchedulerService._course_validation((
+                course.id, course.code, course.name, course.weekly_hours,
+                minutes, blocks, shortest, longest, len(days)
+            )))
+        if only_invalid:
+            return [item for item in report if not item.valid]
+        return report
+
+    def commit(self, db: Session) -> Dict[Hashable, int]:
+        """
+        Write the diff in one transaction and return the schedule id of every
+        added session by sandbox key. Raises ValueError, writing nothing, when
+        a removed or moved row changed since open() or an edit no longer passes
+        the rules against the current database.
+        """
+        diff = self.diff()
+        touched = diff.removed + list(diff.moved)
+        placed = list(diff.moved.items()) + list(diff.added.items())
+        keys = {key for _, spec in placed for key in booking_keys(spec.professor_id, spec.classroom_id, spec.weekday)}
+
+        def write() -> Dict[Hashable, int]:
+            try:
+                current = {
+                    row.id: SessionSpec(
+                        row.course_id, row.professor_id, row.classroom_id, row.weekday, row.start_time, row.end_time
+                    )
+                    for row in db.execute(
+                        select(
+                            ScheduleModel.id,
+                            ScheduleModel.course_id,
+                            ScheduleModel.professor_id,
+                            ScheduleModel.classroom_id,
+                            ScheduleModel.weekday,
+                            ScheduleModel.start_time,
+                            ScheduleModel.end_time
+                        ).where(ScheduleModel.id.in_(touched)).with_for_update()
+                    )
+                }
+                for schedule_id in touched:
+                    if current.get(schedule_id) != self._base[schedule_id]:
+                        raise ConflictError(
+                            f"Schedule {schedule_id} was changed by someone else since the sandbox was opened"
+                        )
+
+                # Re-check every edit against the rows as they are now, others' new sessions included;
+                # a session booked after the versions are read fails the claim below
+                versions = BookingVersions.read(db, keys)
+                rules = SchedulerService._load_rule_data(db)
+                for professor_id, weekday, block in diff.restrictions:
+                    rules.restricted[professor_id] = rules.restricted.get(professor_id, 0) | restriction_bit(weekday, block)
+                occupancy = OccupancyIndex.load(db)
+                for schedule_id in touched:
+                    occupancy.remove(schedule_id)
+                for key, spec in placed:
+                    SchedulerService._check_spec(spec, rules, occupancy)
+                    occupancy.add(
+                        key, spec.professor_id, spec.classroom_id, spec.weekday,
+                        to_minutes(spec.start_time), to_minutes(spec.end_time), spec.course_id
+                    )
+
+                versions.claim(db, keys)
+                if diff.removed:
+                    db.execute(delete(ScheduleModel).where(ScheduleModel.id.in_(diff.removed)))
+                if diff.moved:
+                    db.execute(update(ScheduleModel), [
+                        {"id": schedule_id, **spec._asdict()} for schedule_id, spec in diff.moved.items()
+                    ])
+                new_ids: Dict[Hashable, int] = {}
+                for key, spec in diff.added.items():
+                    new_ids[key] = db.execute(insert(ScheduleModel).values(**spec._asdict())).inserted_primary_key[0]
+                if diff.restrictions:
+                    db.execute(insert(ProfessorRestrictionModel), [
+                        {"professor_id": p, "weekday": weekday, "time_block": block}
+                        for p, weekday, block in diff.restrictions
+                    ])
+                    # The unique index refused any restriction added since open(), so OR-ing the bits is safe
+                    added: Dict[int, int] = {}
+                    for p, weekday, block in diff.restrictions:
+                        added[p] = added.get(p, 0) | restriction_bit(weekday, block)
+                    db.execute(
+                        update(ProfessorModel.__table__)
+                        .where(ProfessorModel.id == bindparam("professor_id"))
+                        .values(restriction_mask=ProfessorModel.restriction_mask.op("|")(bindparam("bits"))),
+                        [{"professor_id": p, "bits": bits} for p, bits in added.items()]
+                    )
+                db.commit()
+            except IntegrityError as exc:
+                db.rollback()
+                raise ConflictError("Could not store the sandbox changes") from exc
+            except Exception:
+                db.rollback()
+                raise
+            return new_ids
+
+        new_ids = with_retries(db, write)
+        for professor_id in {entry[0] for entry in diff.restrictions}:
+            SchedulerService._invalidate("professor", professor_id)
+        if SchedulerService.occupancy_index is not None:
+            SchedulerService.load_occupancy_index(db)
+        self._rebase(new_ids)
+        return new_ids
+
+    def _rebase(self, new_ids: Dict[Hashable, int]) -> None:
+        """Make the committed state the new base."""
+        base = {}
+        for key, spec in self.sessions():
+            base[new_ids.get(key, key)] = spec
+        self.__init__(base, self._rules)
+
+    def _book(self, key: Hashable, spec: SessionSpec) -> None:
+        self._occupancy.add(
+            key, spec.professor_id, spec.classroom_id, spec.weekday,
+            to_minutes(spec.start_time), to_minutes(spec.end_time), spec.course_id
+        )
@@ -1,6 +1,8 @@
 import enum
 from datetime import time
-from typing import List, Optional, Dict, Tuple
+from typing import Callable, FrozenSet, Hashable, List, Optional, Dict, Set, Tuple, Iterable, Iterator, NamedTuple, Union
+from sqlalchemy import bindparam, delete, distinct, extract, func, insert, literal, or_, select, union_all, update
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
@@ -14,13 +16,174 @@ from models import (
     TimeBlock,
     professor_course_association
 )
+from booking import BookingVersions, StaleBooking, booking_keys, with_retries
+from errors import ConflictError, NotFoundError
+from columnar import TimetableColumns
+from freeslots import find_free_slots
+from metrics import metrics
+from occupancy import OccupancyIndex
+from optimizer import CostWeights, OptimizerResult, OptimizerSession, TimetableOptimizer
+from projections import ClassroomRow, CourseRow, CourseValidation, Page, ProfessorRow, ScheduleRow, SlotOption
+from refcache import ReferenceCache
+from rooms import RoomDemand, match_rooms
+from solver import AutoScheduler, SolverClassroom, SolverCourse
+from timeslots import (
+    block_hours,
+    determine_time_block,
+    from_minutes,
+    is_restricted,
+    restricted_slots,
+    restriction_bit,
+    restriction_mask,
+    to_minutes,
+)
+
+
+class SessionSpec(NamedTuple):
+    """One session to schedule in a bulk call."""
+    course_id: int
+    professor_id: int
+    classroom_id: int
+    weekday: WeekDay
+    start_time: time
+    end_time: time
+
+
+class BulkScheduleItem(NamedTuple):
+    """Outcome of one spec in schedule_course_sessions_bulk."""
+    index: int
+    accepted: bool
+    schedule_id: Optional[int]
+    reason: Optional[str]
+
+
+class RuleData(NamedTuple):
+    """Reference rows behind the scheduling rules, keyed for in-memory checks."""
+    professors: Dict[int, str]
+    courses: Dict[int, Row]
+    classrooms: Dict[int, Row]
+    assigned: Set[Tuple[int, int]]
+    # Professor id -> restriction mask (timeslots.RESTRICTION_BITS)
+    restricted: Dict[int, int]
+
+
+class RoomRequest(NamedTuple):
+    """A session whose weekday and times are fixed but whose classroom is still open."""
+    course_id: int
+    professor_id: int
+    weekday: WeekDay
+    start_time: time
+    end_time: time
+    # Seats the classroom must have
+    students: int = 0
+
+
+class RoomAssignment(NamedTuple):
+    """Outcome of one request in assign_classrooms; classroom_id is None when it was not placed."""
+    index: int
+    classroom_id: Optional[int]
+    schedule_id: Optional[int]
+    reason: Optional[str]
 
 
 class SchedulerService:
     """
     Service to handle scheduling logic for courses, professors, and classrooms.
     """
-    
+
+    # Optional in-memory slot index; when loaded, conflict checks skip the database
+    occupancy_index: Optional[OccupancyIndex] = None
+
+    @staticmethod
+    def load_occupancy_index(db: Session) -> OccupancyIndex:
+        """Load the slot-occupancy index from the schedules table and start using it."""
+        # Versions first: sessions booked between the two reads only make the index look stale
+        versions = BookingVersions.read(db)
+        index = OccupancyIndex.load(db)
+        index.lock_versions.update(versions.versions())
+        SchedulerService.occupancy_index = index
+        return index
+
+    @staticmethod
+    def drop_occupancy_index() -> None:
+        """Stop using the slot-occupancy index and go back to database conflict checks."""
+        SchedulerService.occupancy_index = None
+
+    # Optional read-through cache of professor/course/classroom rows (restriction masks included) and assignments
+    reference_cache: Optional[ReferenceCache] = None
+
+    @staticmethod
+    def enable_reference_cache(max_entries: int = 4096, ttl_seconds: float = 300.0) -> ReferenceCache:
+        """Start caching reference rows used by the scheduling rules."""
+        SchedulerService.reference_cache = ReferenceCache(max_entries, ttl_seconds)
+        return SchedulerService.reference_cache
+
+    @staticmethod
+    def disable_reference_cache() -> None:
+        """Stop caching reference rows; every lookup goes to the database again."""
+        SchedulerService.reference_cache = None
+
+    @staticmethod
+    def _cache_key(key):
+        # IDs arrive as ints or as text from the GUI; both must map to one entry
+        try:
+            return int(key)
+        except (TypeError, ValueError):
+            return key
+
+    @staticmethod
+    def _cached(kind: str, key, load: Callable, strict: bool):
+        """Read through the reference cache unless it is disabled or the read is strict."""
+        cache = SchedulerService.reference_cache
+        if cache is None or strict:
+            return load()
+        return cache.get_or_load(kind, SchedulerService._cache_key(key), load)
+
+    @staticmethod
+    def _invalidate(kind: str, key=None) -> None:
+        if SchedulerService.reference_cache is not None:
+            cache_key = None if key is None else SchedulerService._cache_key(key)
+            SchedulerService.reference_cache.invalidate(kind, cache_key)
+
+    @staticmethod
+    def _professor_ref(db: Session, professor_id: int, strict: bool = False) -> Optional[ProfessorRow]:
+        def load():
+            row = db.execute(
+                SchedulerService._professor_rows_query().where(ProfessorModel.id == professor_id)
+            ).first()
+            return ProfessorRow._make(row) if row is not None else None
+
+        return SchedulerService._cached("professor", professor_id, load, strict)
+
+    @staticmethod
+    def _course_ref(db: Session, course_id: int, strict: bool = False) -> Optional[CourseRow]:
+        def load():
+            row = db.execute(SchedulerService._course_rows_query().where(CourseModel.id == course_id)).first()
+            return CourseRow._make(row) if row is not None else None
+
+        return SchedulerService._cached("course", course_id, load, strict)
+
+    @staticmethod
+    def _classroom_ref(db: Session, classroom_id: int, strict: bool = False) -> Optional[ClassroomRow]:
+        def load():
+            row = db.execute(
+                SchedulerService._classroom_rows_query().where(ClassroomModel.id == classroom_id)
+            ).first()
+            return ClassroomRow._make(row) if row is not None else None
+
+        return SchedulerService._cached("classroom", classroom_id, load, strict)
+
+    @staticmethod
+    def _assigned_course_ids(db: Session, professor_id: int, strict: bool = False) -> FrozenSet[int]:
+        """IDs of the courses assigned to a professor."""
+        def load():
+            return frozenset(db.execute(
+                select(professor_course_association.c.course_id)
+                .where(professor_course_association.c.professor_id == professor_id)
+            ).scalars())
+
+        return SchedulerService._cached("assignments", professor_id, load, strict)
+
     @staticmethod
     def add_professor(
         db: Session, 
@@ -41,7 +204,8 @@ class SchedulerService:
             db.refresh(professor)
         except IntegrityError as exc:
             db.rollback()
-            raise ValueError(f"Professor with document ID {document_id} already exists") from exc
+            raise ConflictError(f"Professor with document ID {document_id} already exists") from exc
+        SchedulerService._invalidate("professor", professor.id)
         
         return professor
 
@@ -55,7 +219,7 @@ class SchedulerService:
         """Update an existing professor's details."""
         professor = db.query(ProfessorModel).filter(ProfessorModel.id == professor_id).first()
         if not professor:
-            raise ValueError(f"Professor with ID {professor_id} not found")
+            raise NotFoundError(f"Professor with ID {professor_id} not found")
         
         # Update only the fields that are provided
         if name:
@@ -68,7 +232,8 @@ class SchedulerService:
             db.refresh(professor)
         except IntegrityError as exc:
             db.rollback()
-            raise ValueError(f"Professor with document ID {document_id} already exists") from exc
+            raise ConflictError(f"Professor with document ID {document_id} already exists") from exc
+        SchedulerService._invalidate("professor", professor.id)
         
         return professor
 
@@ -79,6 +244,10 @@ class SchedulerService:
         if professor:
             db.delete(professor)
             db.commit()
+            if SchedulerService.occupancy_index is not None:
+                SchedulerService.occupancy_index.discard_where(professor_id=professor.id)
+            for kind in ("professor", "assignments"):
+                SchedulerService._invalidate(kind, professor.id)
             return True
         return False
     
@@ -98,12 +267,255 @@ class SchedulerService:
         """Get schedules"""
         return db.query(ScheduleModel).all()
 
+    @staticmethod
+    def _professor_rows_query():
+        return select(ProfessorModel.id, ProfessorModel.name, ProfessorModel.document_id, ProfessorModel.restriction_mask)
+
+    @staticmethod
+    def _course_rows_query():
+        return select(
+            CourseModel.id,
+            CourseModel.code,
+            CourseModel.name,
+            CourseModel.weekly_hours,
+            CourseModel.requires_equipment
+        )
+
+    @staticmethod
+    def _classroom_rows_query():
+        return select(
+            ClassroomModel.id,
+            ClassroomModel.name,
+            ClassroomModel.has_equipment,
+            ClassroomModel.capacity
+        )
+
+    @staticmethod
+    def _schedule_rows_query():
+        """Schedule columns joined with the course, professor and classroom names."""
+        return (
+            select(
+                ScheduleModel.id,
+                ScheduleModel.course_id,
+                CourseModel.name,
+                ScheduleModel.professor_id,
+                ProfessorModel.name,
+                ScheduleModel.classroom_id,
+                ClassroomModel.name,
+                ScheduleModel.weekday,
+                ScheduleModel.start_time,
+                ScheduleModel.end_time
+            )
+            .join(CourseModel, CourseModel.id == ScheduleModel.course_id)
+            .join(ProfessorModel, ProfessorModel.id == ScheduleModel.professor_id)
+            .join(ClassroomModel, ClassroomModel.id == ScheduleModel.classroom_id)
+        )
+
+    @staticmethod
+    def _filter_schedules(
+        stmt,
+        weekday: Optional[WeekDay] = None,
+        professor_id: Optional[int] = None,
+        classroom_id: Optional[int] = None,
+        course_id: Optional[int] = None
+    ):
+        """Add the optional schedule filters shared by the paged and streaming readers."""
+        if weekday is not None:
+            stmt = stmt.where(ScheduleModel.weekday == weekday)
+        if professor_id is not None:
+            stmt = stmt.where(ScheduleModel.professor_id == professor_id)
+        if classroom_id is not None:
+            stmt = stmt.where(ScheduleModel.classroom_id == classroom_id)
+        if course_id is not None:
+            stmt = stmt.where(ScheduleModel.course_id == course_id)
+        return stmt
+
+    @staticmethod
+    def _keyset_page(db: Session, stmt, id_column, row_type, after_id: Optional[int], limit: int) -> Page:
+        """Rows with id > after_id in id order, at most limit of them."""
+        if limit <= 0:
+            raise ValueError("Limit must be a positive integer")
+        if after_id is not None:
+            stmt = stmt.where(id_column > after_id)
+        # One extra row tells whether another page follows without a COUNT
+        rows = [row_type._make(row) for row in db.execute(stmt.order_by(id_column).limit(limit + 1))]
+        if len(rows) > limit:
+            return Page(rows[:limit], rows[limit - 1].id)
+        return Page(rows, None)
+
+    @staticmethod
+    def _stream(db: Session, stmt, row_type, batch_size: int) -> Iterator:
+        """
+        Yield rows through a server-side cursor, batch_size at a time. The
+        connection is busy until the iterator is exhausted or closed.
+        """
+        if batch_size <= 0:
+            raise ValueError("Batch size must be a positive integer")
+
+        def rows() -> Iterator:
+            result = db.execute(stmt.execution_options(yield_per=batch_size))
+            try:
+                for row in result:
+                    yield row_type._make(row)
+            finally:
+                result.close()
+
+        return rows()
+
+    @staticmethod
+    def list_professors(db: Session) -> List[ProfessorRow]:
+        """Get id, name and document ID of every professor."""
+        stmt = SchedulerService._professor_rows_query().order_by(ProfessorModel.id)
+        return [ProfessorRow._make(row) for row in db.execute(stmt)]
+
+    @staticmethod
+    def list_courses(db: Session) -> List[CourseRow]:
+        """Get the scalar columns of every course."""
+        stmt = SchedulerService._course_rows_query().order_by(CourseModel.id)
+        return [CourseRow._make(row) for row in db.execute(stmt)]
+
+    @staticmethod
+    def list_classrooms(db: Session) -> List[ClassroomRow]:
+        """Get the scalar columns of every classroom."""
+        stmt = SchedulerService._classroom_rows_query().order_by(ClassroomModel.id)
+        return [ClassroomRow._make(row) for row in db.execute(stmt)]
+
+    @staticmethod
+    def list_schedules(db: Session) -> List[ScheduleRow]:
+        """Get every schedule with its course, professor and classroom names in one query."""
+        stmt = SchedulerService._schedule_rows_query().order_by(ScheduleModel.id)
+        return [ScheduleRow._make(row) for row in db.execute(stmt)]
+
+    @staticmethod
+    def table_versions(db: Session) -> Dict[str, str]:
+        """
+        Cheap change stamp per table (row count, highest id, latest updated_at)
+        from one query. A different stamp means the table changed; an equal
+        stamp can miss an update made in the same second as the latest one.
+        """
+        stmt = union_all(*(
+            select(
+                literal(model.__tablename__).label("name"),
+                func.count(model.id),
+                func.max(model.id),
+                func.max(model.updated_at)
+            )
+            for model in (ProfessorModel, CourseModel, ClassroomModel, ScheduleModel)
+        ))
+        return {name: f"{rows}:{last_id}:{updated}" for name, rows, last_id, updated in db.execute(stmt)}
+
+    @staticmethod
+    def page_professors(db: Session, after_id: Optional[int] = None, limit: int = 100) -> Page:
+        """Get the professors following after_id, ordered by id."""
+        return SchedulerService._keyset_page(
+            db, SchedulerService._professor_rows_query(), ProfessorModel.id, ProfessorRow, after_id, limit
+        )
+
+    @staticmethod
+    def page_courses(db: Session, after_id: Optional[int] = None, limit: int = 100) -> Page:
+        """Get the courses following after_id, ordered by id."""
+        return SchedulerService._keyset_page(
+            db, SchedulerService._course_rows_query(), CourseModel.id, CourseRow, after_id, limit
+        )
+
+    @staticmethod
+    def page_classrooms(db: Session, after_id: Optional[int] = None, limit: int = 100) -> Page:
+        """Get the classrooms following after_id, ordered by id."""
+        return SchedulerService._keyset_page(
+            db, SchedulerService._classroom_rows_query(), ClassroomModel.id, ClassroomRow, after_id, limit
+        )
+
+    @staticmethod
+    def page_schedules(
+        db: Session,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        weekday: Optional[WeekDay] = None,
+        professor_id: Optional[int] = None,
+        classroom_id: Optional[int] = None,
+        course_id: Optional[int] = None
+    ) -> Page:
+        """Get the schedules following after_id that match every given filter, ordered by id."""
+        stmt = SchedulerService._filter_schedules(
+            SchedulerService._schedule_rows_query(), weekday, professor_id, classroom_id, course_id
+        )
+        return SchedulerService._keyset_page(db, stmt, ScheduleModel.id, ScheduleRow, after_id, limit)
+
+    @staticmethod
+    def iter_professors(db: Session, batch_size: int = 1000) -> Iterator[ProfessorRow]:
+        """Stream every professor in id order with bounded memory."""
+        stmt = SchedulerService._professor_rows_query().order_by(ProfessorModel.id)
+        return SchedulerService._stream(db, stmt, ProfessorRow, batch_size)
+
+    @staticmethod
+    def iter_courses(db: Session, batch_size: int = 1000) -> Iterator[CourseRow]:
+        """Stream every course in id order with bounded memory."""
+        stmt = SchedulerService._course_rows_query().order_by(CourseModel.id)
+        return SchedulerService._stream(db, stmt, CourseRow, batch_size)
+
+    @staticmethod
+    def iter_classrooms(db: Session, batch_size: int = 1000) -> Iterator[ClassroomRow]:
+        """Stream every classroom in id order with bounded memory."""
+        stmt = SchedulerService._classroom_rows_query().order_by(ClassroomModel.id)
+        return SchedulerService._stream(db, stmt, ClassroomRow, batch_size)
+
+    @staticmethod
+    def iter_schedules(
+        db: Session,
+        batch_size: int = 1000,
+        weekday: Optional[WeekDay] = None,
+        professor_id: Optional[int] = None,
+        classroom_id: Optional[int] = None,
+        course_id: Optional[int] = None
+    ) -> Iterator[ScheduleRow]:
+        """Stream the schedules matching every given filter in id order with bounded memory."""
+        stmt = SchedulerService._filter_schedules(
+            SchedulerService._schedule_rows_query(), weekday, professor_id, classroom_id, course_id
+        ).order_by(ScheduleModel.id)
+        return SchedulerService._stream(db, stmt, ScheduleRow, batch_size)
+
+    @staticmethod
+    def iter_entity_schedules(db: Session, entity: str, batch_size: int = 1000) -> Iterator[ScheduleRow]:
+        """
+        Stream every schedule ordered by its professor, classroom or course
+        (entity), so each one's sessions arrive together. The order follows the
+        entity's slot index; sessions of an entity are not in weekday order.
+        """
+        columns = {
+            "professor": (ScheduleModel.professor_id, ScheduleModel.weekday, ScheduleModel.start_time),
+            "classroom": (ScheduleModel.classroom_id, ScheduleModel.weekday, ScheduleModel.start_time),
+            "course": (ScheduleModel.course_id, ScheduleModel.weekday),
+        }
+        if entity not in columns:
+            raise ValueError(f"Entity must be one of {', '.join(columns)}")
+        stmt = SchedulerService._schedule_rows_query().order_by(*columns[entity], ScheduleModel.id)
+        return SchedulerService._stream(db, stmt, ScheduleRow, batch_size)
+
+    @staticmethod
+    def get_schedule_row(db: Session, schedule_id: int) -> ScheduleRow:
+        """Get one schedule with its course, professor and classroom names."""
+        stmt = SchedulerService._schedule_rows_query().where(ScheduleModel.id == schedule_id)
+        row = db.execute(stmt).first()
+        if row is None:
+            raise NotFoundError(f"Schedule with ID {schedule_id} not found")
+        return ScheduleRow._make(row)
+
+    @staticmethod
+    def get_schedule_rows(db: Session, schedule_ids: Iterable[int]) -> List[ScheduleRow]:
+        """Get the given schedules with their names in one query, ordered by id; unknown ids are skipped."""
+        stmt = (
+            SchedulerService._schedule_rows_query()
+            .where(ScheduleModel.id.in_(list(schedule_ids)))
+            .order_by(ScheduleModel.id)
+        )
+        return [ScheduleRow._make(row) for row in db.execute(stmt)]
+
     @staticmethod
     def get_professor_by_id(db: Session, id: str) -> Optional[ProfessorModel]:
         """Get a professor by their ID."""
         professor = db.query(ProfessorModel).filter(ProfessorModel.id == id).first()
         if not professor:
-            raise ValueError(f"Professor with ID {id} not found")
+            raise NotFoundError(f"Professor with ID {id} not found")
         return professor
     
     @staticmethod
@@ -119,16 +531,125 @@ class SchedulerService:
         time_block: TimeBlock
     ) -> ProfessorRestrictionModel:
         """Add a time restriction for a professor."""
+        bit = restriction_bit(weekday, time_block)
+        # Set the bit only where it is clear, so a duplicate is refused before any row is written
+        claimed = db.execute(
+            update(ProfessorModel)
+            .where(ProfessorModel.id == professor_id, ProfessorModel.restriction_mask.op("&")(bit) == 0)
+            .values(restriction_mask=ProfessorModel.restriction_mask.op("|")(bit))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            if SchedulerService._professor_ref(db, professor_id, strict=True) is None:
+                raise NotFoundError(f"Professor with ID {professor_id} not found")
+            raise ConflictError(f"Professor already has a restriction for {weekday.value} during {time_block.value}")
+
         restriction = ProfessorRestrictionModel(
             professor_id=professor_id,
             weekday=weekday,
             time_block=time_block
         )
-        db.add(restriction)
-        db.commit()
-        db.refresh(restriction)
+        try:
+            db.add(restriction)
+            db.commit()
+            db.refresh(restriction)
+        except IntegrityError as exc:
+            db.rollback()
+            raise ConflictError(
+                f"Professor already has a restriction for {weekday.value} during {time_block.value}"
+            ) from exc
+        SchedulerService._invalidate("professor", restriction.professor_id)
         return restriction
 
+    @staticmethod
+    def set_professor_restrictions(
+        db: Session,
+        restrictions: Dict[int, Iterable[Tuple[WeekDay, TimeBlock]]],
+        replace: bool = True
+    ) -> Dict[int, int]:
+        """
+        Set the (weekday, time block) restrictions of many professors in one
+        commit, replacing their current ones (or adding to them when replace is
+        False). Sessions already in a new restriction are kept. Returns the new
+        restriction mask of every professor.
+        """
+        wanted = {
+            int(professor_id): restriction_mask(
+                (WeekDay(weekday), TimeBlock(time_block)) for weekday, time_block in slots
+            )
+            for professor_id, slots in restrictions.items()
+        }
+        if not wanted:
+            return {}
+        current = dict(db.execute(
+            select(ProfessorModel.id, ProfessorModel.restriction_mask).where(ProfessorModel.id.in_(wanted))
+        ).all())
+        missing = sorted(set(wanted) - set(current))
+        if missing:
+            raise NotFoundError(f"Professor with ID {missing[0]} not found")
+        masks = {
+            professor_id: mask if replace else mask | current[professor_id]
+            for professor_id, mask in wanted.items()
+        }
+        changed = [professor_id for professor_id, mask in masks.items() if mask != current[professor_id]]
+        if not changed:
+            return masks
+
+        try:
+            # Compare-and-set on the old masks: a concurrent change makes the rowcount come up short
+            updated = db.execute(
+                update(ProfessorModel.__table__)
+                .where(
+                    ProfessorModel.id == bindparam("professor_id"),
+                    ProfessorModel.restriction_mask == bindparam("old_mask")
+                )
+                .values(restriction_mask=bindparam("new_mask")),
+                [
+                    {"professor_id": p, "old_mask": current[p], "new_mask": masks[p]}
+                    for p in changed
+                ]
+            ).rowcount
+            if updated != len(changed):
+                raise ConflictError("Restrictions were changed by someone else, try again")
+
+            removed: Dict[Tuple[WeekDay, TimeBlock], List[int]] = {}
+            inserts = []
+            for professor_id in changed:
+                old, new = current[professor_id], masks[professor_id]
+                for slot in restricted_slots(old & ~new):
+                    removed.setdefault(slot, []).append(professor_id)
+                inserts.extend(
+                    {"professor_id": professor_id, "weekday": weekday, "time_block": time_block}
+                    for weekday, time_block in restricted_slots(new & ~old)
+                )
+            if removed:
+                # One branch per (weekday, block), at most 18 however many professors
+                db.execute(delete(ProfessorRestrictionModel).where(or_(*(
+                    (ProfessorRestrictionModel.weekday == weekday)
+                    & (ProfessorRestrictionModel.time_block == time_block)
+                    & ProfessorRestrictionModel.professor_id.in_(professor_ids)
+                    for (weekday, time_block), professor_ids in removed.items()
+                ))))
+            if inserts:
+                db.execute(insert(ProfessorRestrictionModel), inserts)
+            db.commit()
+        except (IntegrityError, ValueError) as exc:
+            db.rollback()
+            if isinstance(exc, IntegrityError):
+                raise ConflictError("Restrictions were changed by someone else, try again") from exc
+            raise
+        for professor_id in changed:
+            SchedulerService._invalidate("professor", professor_id)
+        return masks
+
+    @staticmethod
+    def _restriction_masks(db: Session) -> Dict[int, int]:
+        """Restriction mask of every professor that has restrictions."""
+        return dict(db.execute(
+            select(ProfessorModel.id, ProfessorModel.restriction_mask).where(ProfessorModel.restriction_mask != 0)
+        ).all())
+
     @staticmethod
     def update_course(
         db: Session,
@@ -141,7 +662,7 @@ class SchedulerService:
         """Update an existing course's details."""
         course = db.query(CourseModel).filter(CourseModel.id == course_id).first()
         if not course:
-            raise ValueError(f"Course with ID {course_id} not found")
+            raise NotFoundError(f"Course with ID {course_id} not found")
 
         # Update only the fields that are provided
         if code:
@@ -160,7 +681,8 @@ class SchedulerService:
             db.refresh(course)
         except IntegrityError as exc:
             db.rollback()
-            raise ValueError(f"Course with code {code} already exists") from exc
+            raise ConflictError(f"Course with code {code} already exists") from exc
+        SchedulerService._invalidate("course", course.id)
 
         return course
 
@@ -172,6 +694,11 @@ class SchedulerService:
         if course:
             db.delete(course)
             db.commit()
+            if SchedulerService.occupancy_index is not None:
+                SchedulerService.occupancy_index.discard_where(course_id=course.id)
+            SchedulerService._invalidate("course", course.id)
+            # The course disappears from every professor's assignment set
+            SchedulerService._invalidate("assignments")
             return True
         return False
 
@@ -187,7 +714,7 @@ class SchedulerService:
         """Get a course by its ID."""
         course = db.query(CourseModel).filter(CourseModel.id == course_id).first()
         if not course:
-            raise ValueError(f"Course with ID {course_id} not found")
+            raise NotFoundError(f"Course with ID {course_id} not found")
         return course
     
     @staticmethod
@@ -215,6 +742,7 @@ class SchedulerService:
         db.add(course)
         db.commit()
         db.refresh(course)
+        SchedulerService._invalidate("course", course.id)
         return course
     
     @staticmethod
@@ -240,6 +768,7 @@ class SchedulerService:
         db.add(classroom)
         db.commit()
         db.refresh(classroom)
+        SchedulerService._invalidate("classroom", classroom.id)
         return classroom
 
 
@@ -254,7 +783,7 @@ class SchedulerService:
         """Update an existing classroom's details."""
         classroom = db.query(ClassroomModel).filter(ClassroomModel.id == classroom_id).first()
         if not classroom:
-            raise ValueError(f"Classroom with ID {classroom_id} not found")
+            raise NotFoundError(f"Classroom with ID {classroom_id} not found")
 
         # Update only the fields that are provided
         if name:
@@ -271,7 +800,8 @@ class SchedulerService:
             db.refresh(classroom)
         except IntegrityError as exc:
             db.rollback()
-            raise ValueError(f"Classroom with name {name} already exists") from exc
+            raise ConflictError(f"Classroom with name {name} already exists") from exc
+        SchedulerService._invalidate("classroom", classroom.id)
 
         return classroom
 
@@ -283,6 +813,9 @@ class SchedulerService:
         if classroom:
             db.delete(classroom)
             db.commit()
+            if SchedulerService.occupancy_index is not None:
+                SchedulerService.occupancy_index.discard_where(classroom_id=classroom.id)
+            SchedulerService._invalidate("classroom", classroom.id)
             return True
         return False
 
@@ -298,61 +831,73 @@ class SchedulerService:
         """Get a classroom by its ID."""
         classroom = db.query(ClassroomModel).filter(ClassroomModel.id == classroom_id).first()
         if not classroom:
-            raise ValueError(f"Classroom with ID {classroom_id} not found")
+            raise NotFoundError(f"Classroom with ID {classroom_id} not found")
         return classroom
     
     @staticmethod
     def assign_course_to_professor(
         db: Session, 
         professor_id: int, 
-        course_id: int
+        course_id: int,
+        strict: bool = False
     ) -> None:
-        """Assign a course to a professor."""
-        professor = db.query(ProfessorModel).filter(ProfessorModel.id == professor_id).first()
-        course = db.query(CourseModel).filter(CourseModel.id == course_id).first()
+        """Assign a course to a professor. strict=True reads around the reference cache."""
+        professor = SchedulerService._professor_ref(db, professor_id, strict)
+        course = SchedulerService._course_ref(db, course_id, strict)
         
         if not professor:
-            raise ValueError(f"Professor with ID {professor_id} not found")
+            raise NotFoundError(f"Professor with ID {professor_id} not found")
         if not course:
-            raise ValueError(f"Course with ID {course_id} not found")
+            raise NotFoundError(f"Course with ID {course_id} not found")
     
         # Check if professor already has 6 courses
-        if len(professor.courses) >= 6:
-            raise ValueError("Professor already has the maximum of 6 courses assigned")
+        assigned = SchedulerService._assigned_course_ids(db, professor.id, strict)
+        if len(assigned) >= 6:
+            raise ConflictError("Professor already has the maximum of 6 courses assigned")
+        if course.id in assigned:
+            raise ConflictError(f"Course {course.name} is already assigned to professor {professor.name}")
         
         try:
-            professor.courses.append(course)
+            db.execute(insert(professor_course_association).values(professor_id=professor.id, course_id=course.id))
             db.commit()
         except IntegrityError as exc:
             db.rollback()
-            raise ValueError(f"Course {course.name} is already assigned to professor {professor.name}") from exc
+            raise ConflictError(f"Course {course.name} is already assigned to professor {professor.name}") from exc
+        finally:
+            SchedulerService._invalidate("assignments", professor.id)
     
     @staticmethod
     def remove_course_from_professor(
         db: Session, 
         professor_id: int, 
-        course_id: int
+        course_id: int,
+        strict: bool = False
     ) -> None:
-        """Remove a course from a professor."""
-        professor = db.query(ProfessorModel).filter(ProfessorModel.id == professor_id).first()
-        course = db.query(CourseModel).filter(CourseModel.id == course_id).first()
+        """Remove a course from a professor. strict=True reads around the reference cache."""
+        professor = SchedulerService._professor_ref(db, professor_id, strict)
+        course = SchedulerService._course_ref(db, course_id, strict)
         
         if not professor:
-            raise ValueError(f"Professor with ID {professor_id} not found")
+            raise NotFoundError(f"Professor with ID {professor_id} not found")
         if not course:
-            raise ValueError(f"Course with ID {course_id} not found")
+            raise NotFoundError(f"Course with ID {course_id} not found")
         
         # Check if the course is already scheduled
         if db.query(ScheduleModel).filter(
             ScheduleModel.course_id == course_id, ScheduleModel.professor_id == professor_id
         ).count() > 0:
-            raise ValueError(f"Course {course.name} is already scheduled and cannot be removed")
+            raise ConflictError(f"Course {course.name} is already scheduled and cannot be removed")
 
-        if course in professor.courses:
-            professor.courses.remove(course)
-            db.commit()
-        else:
+        if course.id not in SchedulerService._assigned_course_ids(db, professor.id, strict):
             raise ValueError(f"Course {course.name} is not assigned to professor {professor.name}")
+        db.execute(
+            delete(professor_course_association).where(
+                professor_course_association.c.professor_id == professor.id,
+                professor_course_association.c.course_id == course.id
+            )
+        )
+        db.commit()
+        SchedulerService._invalidate("assignments", professor.id)
 
     @staticmethod
     def schedule_course_session(
@@ -362,70 +907,556 @@ class SchedulerService:
         classroom_id: int,
         weekday: WeekDay,
         start_time: time,
-        end_time: time
+        end_time: time,
+        strict: bool = False
     ) -> ScheduleModel:
-        """Schedule a session for a course with professor and classroom."""
+        """
+        Schedule a session for a course with professor and classroom.
+        strict=True reads the reference rows around the cache.
+        """
         # Check if professor is assigned to this course
-        professor = db.query(ProfessorModel).filter(ProfessorModel.id == professor_id).first()
-        course = db.query(CourseModel).filter(CourseModel.id == course_id).first()
+        professor = SchedulerService._professor_ref(db, professor_id, strict)
+        course = SchedulerService._course_ref(db, course_id, strict)
         
         if not professor:
-            raise ValueError(f"Professor with ID {professor_id} not found")
+            raise NotFoundError(f"Professor with ID {professor_id} not found")
         if not course:
-            raise ValueError(f"Course with ID {course_id} not found")
-        if course not in professor.courses:
+            raise NotFoundError(f"Course with ID {course_id} not found")
+        if course.id not in SchedulerService._assigned_course_ids(db, professor.id, strict):
             raise ValueError(f"Professor {professor.name} is not assigned to course {course.name}")
         
         # Check if the time is valid
-        if start_time >= end_time:
-            raise ValueError("Start time must be before end time")
-        if start_time < time(8, 0) or end_time > time(22, 0):
-            raise ValueError("Classroom hours must be between 08:00 and 22:00")
-        course_duration = (end_time.hour - start_time.hour) + (end_time.minute - start_time.minute) / 60
-        if course.weekly_hours == 3 and course_duration != 3:
-            raise ValueError("3-hour courses must be scheduled in one block")
-        if course.weekly_hours == 4 and course_duration != 2:
-            raise ValueError("4-hour courses must be scheduled in two blocks of 2 hours each")
+        SchedulerService._check_session_times(course.weekly_hours, start_time, end_time)
 
         # Check if professor has a restriction for this time
-        time_block = SchedulerService._determine_time_block(start_time)
-        restriction = db.query(ProfessorRestrictionModel).filter(
-            ProfessorRestrictionModel.professor_id == professor_id,
-            ProfessorRestrictionModel.weekday == weekday,
-            ProfessorRestrictionModel.time_block == time_block
-        ).first()
-        
-        if restriction:
+        if is_restricted(professor.restriction_mask, weekday, start_time):
+            time_block = SchedulerService._determine_time_block(start_time)
             raise ValueError(f"Professor has a restriction for {weekday.value} during {time_block.value}")
         
         # Check if classroom has required equipment
-        classroom = db.query(ClassroomModel).filter(ClassroomModel.id == classroom_id).first()
+        classroom = SchedulerService._classroom_ref(db, classroom_id, strict)
 
         if not classroom:
-            raise ValueError(f"Classroom with ID {classroom_id} not found")
+            raise NotFoundError(f"Classroom with ID {classroom_id} not found")
         if course.requires_equipment and not classroom.has_equipment:
             raise ValueError(f"Course {course.name} requires equipment but classroom {classroom.name} doesn't have it")
         
-        # Check for scheduling conflicts
-        SchedulerService._check_scheduling_conflicts(
-            db, professor_id, classroom_id, weekday, start_time, end_time
-        )
-        
-        # Create schedule
-        schedule = ScheduleModel(
-            course_id=course_id,
-            professor_id=professor_id,
-            classroom_id=classroom_id,
-            weekday=weekday,
-            start_time=start_time,
-            end_time=end_time
-        )
-        
-        db.add(schedule)
-        db.commit()
+        keys = booking_keys(professor_id, classroom_id, weekday)
+
+        def book() -> Tuple[ScheduleModel, Dict]:
+            # A session committed after this read changes a version, and the claim below fails
+            versions = BookingVersions.read(db, keys)
+            SchedulerService._check_scheduling_conflicts(
+                db, professor_id, classroom_id, weekday, start_time, end_time, versions
+            )
+            claimed = versions.claim(db, keys)
+            schedule = ScheduleModel(
+                course_id=course_id,
+                professor_id=professor_id,
+                classroom_id=classroom_id,
+                weekday=weekday,
+                start_time=start_time,
+                end_time=end_time
+            )
+            db.add(schedule)
+            db.commit()
+            return schedule, claimed
+
+        schedule, claimed = with_retries(db, book)
         db.refresh(schedule)
+        if SchedulerService.occupancy_index is not None:
+            SchedulerService.occupancy_index.add_schedule(schedule)
+            SchedulerService.occupancy_index.note_versions(claimed)
         return schedule
     
+    @staticmethod
+    def schedule_course_sessions_bulk(
+        db: Session,
+        sessions: Iterable[Union[SessionSpec, Tuple, Dict]],
+        dry_run: bool = False
+    ) -> List[BulkScheduleItem]:
+        """
+        Schedule many sessions at once. Every spec is checked with the rules of
+        schedule_course_session against the database and against the specs
+        accepted before it in the same call. Accepted sessions are written with
+        one batched INSERT and one commit; the report has one item per spec.
+        """
+        specs = [SchedulerService._to_session_spec(spec) for spec in sessions]
+        if not specs:
+            return []
+
+        professor_ids = {spec.professor_id for spec in specs}
+        classroom_ids = {spec.classroom_id for spec in specs}
+        rules = SchedulerService._load_rule_data(
+            db, professor_ids, {spec.course_id for spec in specs}, classroom_ids
+        )
+        keys = {key for spec in specs for key in booking_keys(spec.professor_id, spec.classroom_id, spec.weekday)}
+
+        def book() -> Tuple[List[BulkScheduleItem], List[SessionSpec], Optional[List[int]], Dict]:
+            # A session committed after this read changes a version, and the claim below fails
+            versions = BookingVersions.read(db, keys)
+
+            # Only the rows that can collide with this batch are needed for conflict checks
+            occupancy = OccupancyIndex()
+            for row in db.query(
+                ScheduleModel.id,
+                ScheduleModel.professor_id,
+                ScheduleModel.classroom_id,
+                ScheduleModel.weekday,
+                ScheduleModel.start_time,
+                ScheduleModel.end_time
+            ).filter(
+                ScheduleModel.professor_id.in_(professor_ids) | ScheduleModel.classroom_id.in_(classroom_ids)
+            ):
+                occupancy.add(
+                    row.id, row.professor_id, row.classroom_id, row.weekday,
+                    to_minutes(row.start_time), to_minutes(row.end_time)
+                )
+
+            report: List[BulkScheduleItem] = []
+            accepted: List[SessionSpec] = []
+            for index, spec in enumerate(specs):
+                try:
+                    SchedulerService._check_spec(spec, rules, occupancy)
+                except ValueError as exc:
+                    report.append(BulkScheduleItem(index, False, None, str(exc)))
+                    continue
+
+                occupancy.add(
+                    ("batch", index), spec.professor_id, spec.classroom_id, spec.weekday,
+                    to_minutes(spec.start_time), to_minutes(spec.end_time)
+                )
+                accepted.append(spec)
+                report.append(BulkScheduleItem(index, True, None, None))
+
+            if dry_run or not accepted:
+                return report, accepted, None, {}
+
+            claimed = versions.claim(db, {
+                key for spec in accepted for key in booking_keys(spec.professor_id, spec.classroom_id, spec.weekday)
+            })
+            rows = [spec._asdict() for spec in accepted]
+            try:
+                if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+                    schedule_ids = db.scalars(
+                        insert(ScheduleModel).returning(ScheduleModel.id, sort_by_parameter_order=True),
+                        rows
+                    ).all()
+                else:
+                    db.execute(insert(ScheduleModel), rows)
+                    schedule_ids = None
+                db.commit()
+            except IntegrityError as exc:
+                db.rollback()
+                raise ConflictError("Could not store the scheduled sessions") from exc
+            return report, accepted, schedule_ids, claimed
+
+        report, accepted, schedule_ids, claimed = with_retries(db, book)
+        if dry_run or not accepted:
+            return report
+
+        if schedule_ids is not None:
+            accepted_items = [i for i, item in enumerate(report) if item.accepted]
+            for position, schedule_id in zip(accepted_items, schedule_ids):
+                report[position] = report[position]._replace(schedule_id=schedule_id)
+
+        if SchedulerService.occupancy_index is not None:
+            if schedule_ids is None:
+                # Without RETURNING the new ids are unknown, so rebuild the index
+                SchedulerService.load_occupancy_index(db)
+            else:
+                for spec, schedule_id in zip(accepted, schedule_ids):
+                    SchedulerService.occupancy_index.add(
+                        schedule_id, spec.professor_id, spec.classroom_id, spec.weekday,
+                        to_minutes(spec.start_time), to_minutes(spec.end_time), spec.course_id
+                    )
+                SchedulerService.occupancy_index.note_versions(claimed)
+        return report
+
+    @staticmethod
+    def _load_rule_data(
+        db: Session,
+        professor_ids: Optional[Iterable[int]] = None,
+        course_ids: Optional[Iterable[int]] = None,
+        classroom_ids: Optional[Iterable[int]] = None
+    ) -> RuleData:
+        """Reference rows needed by _check_spec, limited to the given ids (None loads every row)."""
+        def only(query, column, ids):
+            return query if ids is None else query.filter(column.in_(ids))
+
+        professors, restricted = {}, {}
+        for row in only(
+            db.query(ProfessorModel.id, ProfessorModel.name, ProfessorModel.restriction_mask),
+            ProfessorModel.id, professor_ids
+        ):
+            professors[row.id] = row.name
+            restricted[row.id] = row.restriction_mask
+        courses = {
+            row.id: row
+            for row in only(
+                db.query(
+                    CourseModel.id, CourseModel.code, CourseModel.name,
+                    CourseModel.weekly_hours, CourseModel.requires_equipment
+                ),
+                CourseModel.id, course_ids
+            )
+        }
+        classrooms = {
+            row.id: row
+            for row in only(
+                db.query(ClassroomModel.id, ClassroomModel.name, ClassroomModel.has_equipment),
+                ClassroomModel.id, classroom_ids
+            )
+        }
+        assigned = set(only(
+            db.query(professor_course_association.c.professor_id, professor_course_association.c.course_id),
+            professor_course_association.c.professor_id, professor_ids
+        ).all())
+        return RuleData(professors, courses, classrooms, assigned, restricted)
+
+    @staticmethod
+    def _check_spec(
+        spec: SessionSpec,
+        rules: RuleData,
+        occupancy: OccupancyIndex,
+        ignore: Optional[Hashable] = None
+    ) -> None:
+        """
+        Apply the rules of schedule_course_session to a spec, using preloaded
+        reference rows and an occupancy index (ignore skips the session being moved).
+        """
+        professor_name = rules.professors.get(spec.professor_id)
+        course = rules.courses.get(spec.course_id)
+        if professor_name is None:
+            raise NotFoundError(f"Professor with ID {spec.professor_id} not found")
+        if course is None:
+            raise NotFoundError(f"Course with ID {spec.course_id} not found")
+        if (spec.professor_id, spec.course_id) not in rules.assigned:
+            raise ValueError(f"Professor {professor_name} is not assigned to course {course.name}")
+
+        SchedulerService._check_session_times(course.weekly_hours, spec.start_time, spec.end_time)
+
+        if is_restricted(rules.restricted.get(spec.professor_id, 0), spec.weekday, spec.start_time):
+            time_block = determine_time_block(spec.start_time)
+            raise ValueError(f"Professor has a restriction for {spec.weekday.value} during {time_block.value}")
+
+        classroom = rules.classrooms.get(spec.classroom_id)
+        if classroom is None:
+            raise NotFoundError(f"Classroom with ID {spec.classroom_id} not found")
+        if course.requires_equipment and not classroom.has_equipment:
+            raise ValueError(
+                f"Course {course.name} requires equipment but classroom {classroom.name} doesn't have it"
+            )
+
+        start, end = to_minutes(spec.start_time), to_minutes(spec.end_time)
+        if occupancy.professor_conflict(spec.professor_id, spec.weekday, start, end, ignore):
+            raise ConflictError(f"Professor already has a class scheduled at this time on {spec.weekday.value}")
+        if occupancy.classroom_conflict(spec.classroom_id, spec.weekday, start, end, ignore):
+            raise ConflictError(f"Classroom is already booked at this time on {spec.weekday.value}")
+
+    @staticmethod
+    def _to_session_spec(spec: Union[SessionSpec, Tuple, Dict]) -> SessionSpec:
+        """Accept a SessionSpec, a mapping or a positional tuple."""
+        if not isinstance(spec, SessionSpec):
+            spec = SessionSpec(**spec) if isinstance(spec, dict) else SessionSpec(*spec)
+        if not isinstance(spec.weekday, WeekDay):
+            spec = spec._replace(weekday=WeekDay(spec.weekday))
+        return spec
+
+    @staticmethod
+    def assign_classrooms(
+        db: Session,
+        sessions: Iterable[Union[RoomRequest, Tuple, Dict]],
+        dry_run: bool = False
+    ) -> List[RoomAssignment]:
+        """
+        Pick a classroom for sessions whose weekday and times are already fixed,
+        placing as many as possible (see rooms.match_rooms) around the sessions
+        already booked. The placed sessions then go through
+        schedule_course_sessions_bulk, so every other rule is still checked and
+        nothing is written on a dry run.
+        """
+        requests = [SchedulerService._to_room_request(request) for request in sessions]
+        if not requests:
+            return []
+
+        course_ids = {request.course_id for request in requests}
+        requires_equipment = dict(
+            db.query(CourseModel.id, CourseModel.requires_equipment).filter(CourseModel.id.in_(course_ids)).all()
+        )
+        classrooms = [
+            ClassroomRow._make(row)
+            for row in db.execute(SchedulerService._classroom_rows_query().order_by(ClassroomModel.id))
+        ]
+        weekdays = {request.weekday for request in requests}
+        occupancy = OccupancyIndex()
+        for row in db.query(
+            ScheduleModel.id,
+            ScheduleModel.professor_id,
+            ScheduleModel.classroom_id,
+            ScheduleModel.weekday,
+            ScheduleModel.start_time,
+            ScheduleModel.end_time
+        ).filter(ScheduleModel.weekday.in_(weekdays)):
+            occupancy.add(
+                row.id, row.professor_id, row.classroom_id, row.weekday,
+                to_minutes(row.start_time), to_minutes(row.end_time)
+            )
+
+        known = [index for index, request in enumerate(requests) if request.course_id in requires_equipment]
+        demands = [
+            RoomDemand(
+                requests[index].professor_id,
+                requests[index].weekday,
+                to_minutes(requests[index].start_time),
+                to_minutes(requests[index].end_time),
+                requires_equipment[requests[index].course_id],
+                requests[index].students
+            )
+            for index in known
+        ]
+        rooms = dict(zip(known, match_rooms(demands, classrooms, occupancy)))
+
+        report: List[RoomAssignment] = []
+        placed: List[SessionSpec] = []
+        for index, request in enumerate(requests):
+            if index not in rooms:
+                reason = f"Course with ID {request.course_id} not found"
+            elif rooms[index] is None:
+                needs_equipment = requires_equipment[request.course_id]
+                fits = any(
+                    (room.has_equipment or not needs_equipment) and room.capacity >= request.students
+                    for room in classrooms
+                )
+                if fits:
+                    reason = f"Every suitable classroom is booked at this time on {request.weekday.value}"
+                else:
+                    reason = f"No classroom has {'equipment and ' if needs_equipment else ''}{request.students} seats"
+            else:
+                placed.append(SessionSpec(
+                    request.course_id, request.professor_id, rooms[index],
+                    request.weekday, request.start_time, request.end_time
+                ))
+                report.append(RoomAssignment(index, rooms[index], None, None))
+                continue
+            report.append(RoomAssignment(index, None, None, reason))
+
+        positions = [i for i, item in enumerate(report) if item.classroom_id is not None]
+        for position, item in zip(positions, SchedulerService.schedule_course_sessions_bulk(db, placed, dry_run)):
+            if item.accepted:
+                report[position] = report[position]._replace(schedule_id=item.schedule_id)
+            else:
+                report[position] = report[position]._replace(classroom_id=None, reason=item.reason)
+        return report
+
+    @staticmethod
+    def _to_room_request(request: Union[RoomRequest, Tuple, Dict]) -> RoomRequest:
+        """Accept a RoomRequest, a mapping or a positional tuple."""
+        if not isinstance(request, RoomRequest):
+            request = RoomRequest(**request) if isinstance(request, dict) else RoomRequest(*request)
+        if not isinstance(request.weekday, WeekDay):
+            request = request._replace(weekday=WeekDay(request.weekday))
+        return request
+
+    @staticmethod
+    def auto_schedule(
+        db: Session,
+        professor_ids: Optional[List[int]] = None,
+        step_minutes: int = 60,
+        max_backtracks: int = 1000,
+        dry_run: bool = False
+    ) -> Tuple[List[ScheduleModel], List[Tuple[int, int, str]]]:
+        """
+        Schedule every professor/course assignment that still misses sessions.
+        Reference data and existing schedules are read once, the timetable is
+        built in memory and the new sessions are written in a single commit
+        (built again if another writer booked one of its resource-days meanwhile).
+        Returns the new sessions and the (professor_id, course_id, reason) of
+        every assignment that could not be placed.
+        """
+        courses = {
+            row.id: SolverCourse(row.id, row.name, row.weekly_hours, row.requires_equipment)
+            for row in db.query(
+                CourseModel.id, CourseModel.name, CourseModel.weekly_hours, CourseModel.requires_equipment
+            )
+        }
+        classrooms = [
+            SolverClassroom(row.id, row.has_equipment, row.capacity)
+            for row in db.query(ClassroomModel.id, ClassroomModel.has_equipment, ClassroomModel.capacity)
+        ]
+        restrictions = SchedulerService._restriction_masks(db)
+
+        assignments_query = db.query(
+            professor_course_association.c.professor_id,
+            professor_course_association.c.course_id
+        )
+        if professor_ids is not None:
+            assignments_query = assignments_query.filter(
+                professor_course_association.c.professor_id.in_(professor_ids)
+            )
+        assignments = sorted(set((row.professor_id, row.course_id) for row in assignments_query))
+
+        def book():
+            # Versions before the timetable: a session committed in between fails the claim below
+            versions = BookingVersions.read(db)
+            engine = AutoScheduler(
+                courses, classrooms, restrictions, OccupancyIndex.load(db), step_minutes, max_backtracks
+            )
+            result = engine.solve(assignments)
+            schedules = [
+                ScheduleModel(
+                    course_id=session.course_id,
+                    professor_id=session.professor_id,
+                    classroom_id=session.classroom_id,
+                    weekday=session.weekday,
+                    start_time=session.start_time,
+                    end_time=session.end_time
+                )
+                for session in result.placements
+            ]
+            if dry_run or not schedules:
+                return schedules, result, [], {}
+
+            try:
+                claimed = versions.claim(db, {
+                    key for session in result.placements
+                    for key in booking_keys(session.professor_id, session.classroom_id, session.weekday)
+                })
+                db.add_all(schedules)
+                db.flush()
+                schedule_ids = [schedule.id for schedule in schedules]
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            return schedules, result, schedule_ids, claimed
+
+        schedules, result, schedule_ids, claimed = with_retries(db, book)
+        if SchedulerService.occupancy_index is not None and schedule_ids:
+            for schedule_id, session in zip(schedule_ids, result.placements):
+                SchedulerService.occupancy_index.add(
+                    schedule_id, session.professor_id, session.classroom_id, session.weekday,
+                    to_minutes(session.start_time), to_minutes(session.end_time), session.course_id
+                )
+            SchedulerService.occupancy_index.note_versions(claimed)
+        return schedules, result.unplaced
+
+    @staticmethod
+    def optimize_timetable(
+        db: Session,
+        max_iterations: int = 20000,
+        time_limit_seconds: Optional[float] = None,
+        weights: Optional[CostWeights] = None,
+        step_minutes: int = 60,
+        seed: Optional[int] = None,
+        dry_run: bool = False
+    ) -> OptimizerResult:
+        """
+        Improve the stored timetable (idle gaps, daily load, classroom changes,
+        equipped rooms used by courses that do not need them) with
+        TimetableOptimizer, then write the moved sessions in one commit.
+        """
+        courses = {
+            row.id: SolverCourse(row.id, row.name, row.weekly_hours, row.requires_equipment)
+            for row in db.query(
+                CourseModel.id, CourseModel.name, CourseModel.weekly_hours, CourseModel.requires_equipment
+            )
+        }
+        classrooms = [
+            SolverClassroom(row.id, row.has_equipment, row.capacity)
+            for row in db.query(ClassroomModel.id, ClassroomModel.has_equipment, ClassroomModel.capacity)
+        ]
+        restrictions = SchedulerService._restriction_masks(db)
+        def book():
+            # Versions before the timetable: a session committed in between fails the claim below
+            versions = BookingVersions.read(db)
+            read = {
+                row.id: row
+                for row in db.query(
+                    ScheduleModel.id,
+                    ScheduleModel.course_id,
+                    ScheduleModel.professor_id,
+                    ScheduleModel.classroom_id,
+                    ScheduleModel.weekday,
+                    ScheduleModel.start_time,
+                    ScheduleModel.end_time
+                )
+            }
+            sessions = [
+                OptimizerSession(
+                    row.id, row.course_id, row.professor_id, row.classroom_id, row.weekday,
+                    to_minutes(row.start_time), to_minutes(row.end_time)
+                )
+                for row in read.values()
+            ]
+
+            engine = TimetableOptimizer(courses, classrooms, restrictions, sessions, weights, step_minutes, seed)
+            result = engine.optimize(max_iterations, time_limit_seconds)
+            if dry_run or not result.moves:
+                return engine, result, {}
+
+            rows = []
+            keys = set()
+            for schedule_id, (weekday, start, end, classroom_id) in result.moves:
+                original = read[schedule_id]
+                rows.append({
+                    "schedule_id": schedule_id,
+                    "old_course_id": original.course_id,
+                    "old_professor_id": original.professor_id,
+                    "old_classroom_id": original.classroom_id,
+                    "old_weekday": original.weekday,
+                    "old_start_time": original.start_time,
+                    "old_end_time": original.end_time,
+                    "new_classroom_id": classroom_id,
+                    "new_weekday": weekday,
+                    "new_start_time": from_minutes(start),
+                    "new_end_time": from_minutes(end)
+                })
+                # The resource-days a session leaves as well as the ones it moves into
+                keys.update(booking_keys(original.professor_id, original.classroom_id, original.weekday))
+                keys.update(booking_keys(original.professor_id, classroom_id, weekday))
+            claimed = versions.claim(db, keys)
+            table = ScheduleModel.__table__
+            try:
+                # Only rows still as they were read; an edited or deleted session comes up short
+                updated = db.execute(
+                    update(table)
+                    .where(
+                        table.c.id == bindparam("schedule_id"),
+                        table.c.course_id == bindparam("old_course_id"),
+                        table.c.professor_id == bindparam("old_professor_id"),
+                        table.c.classroom_id == bindparam("old_classroom_id"),
+                        table.c.weekday == bindparam("old_weekday"),
+                        table.c.start_time == bindparam("old_start_time"),
+                        table.c.end_time == bindparam("old_end_time")
+                    )
+                    .values(
+                        classroom_id=bindparam("new_classroom_id"),
+                        weekday=bindparam("new_weekday"),
+                        start_time=bindparam("new_start_time"),
+                        end_time=bindparam("new_end_time")
+                    ),
+                    rows
+                ).rowcount
+                if updated != len(rows):
+                    raise StaleBooking()
+                db.commit()
+            except IntegrityError as exc:
+                db.rollback()
+                raise ConflictError("Could not store the optimized timetable") from exc
+            return engine, result, claimed
+
+        engine, result, claimed = with_retries(db, book)
+        if SchedulerService.occupancy_index is not None and claimed:
+            for schedule_id, (weekday, start, end, classroom_id) in result.moves:
+                booked = engine.sessions[schedule_id]
+                SchedulerService.occupancy_index.add(
+                    schedule_id, booked.professor_id, classroom_id, weekday, start, end, booked.course_id
+                )
+            SchedulerService.occupancy_index.note_versions(claimed)
+        return result
+
+
     @staticmethod
     def remove_course_session(
         db: Session,
@@ -434,20 +1465,30 @@ class SchedulerService:
         """Remove a scheduled session."""
         schedule = db.query(ScheduleModel).filter(ScheduleModel.id == schedule_id).first()
         if not schedule:
-            raise ValueError(f"Schedule with ID {schedule_id} not found")
+            raise NotFoundError(f"Schedule with ID {schedule_id} not found")
         
         db.delete(schedule)
         db.commit()
+        if SchedulerService.occupancy_index is not None:
+            SchedulerService.occupancy_index.remove(schedule_id)
+
+    @staticmethod
+    def _check_session_times(weekly_hours: int, start_time: time, end_time: time) -> None:
+        """Check opening hours and block length for a session of a course."""
+        if start_time >= end_time:
+            raise ValueError("Start time must be before end time")
+        if start_time < time(8, 0) or end_time > time(22, 0):
+            raise ValueError("Classroom hours must be between 08:00 and 22:00")
+        course_duration = (end_time.hour - start_time.hour) + (end_time.minute - start_time.minute) / 60
+        if weekly_hours == 3 and course_duration != 3:
+            raise ValueError("3-hour courses must be scheduled in one block")
+        if weekly_hours == 4 and course_duration != 2:
+            raise ValueError("4-hour courses must be scheduled in two blocks of 2 hours each")
 
     @staticmethod
     def _determine_time_block(start_time: time) -> TimeBlock:
         """Determine the time block based on the start time."""
-        if start_time < time(12, 0):
-            return TimeBlock.MORNING
-        elif start_time < time(18, 0):
-            return TimeBlock.AFTERNOON
-        else:
-            return TimeBlock.EVENING
+        return determine_time_block(start_time)
     
     @staticmethod
     def _check_scheduling_conflicts(
@@ -456,9 +1497,25 @@ class SchedulerService:
         classroom_id: int,
         weekday: WeekDay,
         start_time: time,
-        end_time: time
+        end_time: time,
+        versions: Optional[BookingVersions] = None
     ) -> None:
-        """Check for scheduling conflicts with existing schedules."""
+        """
+        Check for scheduling conflicts with existing schedules. With the booking
+        lock versions of the slot, the occupancy index is only trusted when it
+        already holds every session booked up to them.
+        """
+        index = SchedulerService.occupancy_index
+        if index is not None and (versions is None or index.reflects({
+            key: versions.version(key) for key in booking_keys(professor_id, classroom_id, weekday)
+        })):
+            start, end = to_minutes(start_time), to_minutes(end_time)
+            if index.professor_conflict(professor_id, weekday, start, end):
+                raise ConflictError(f"Professor already has a class scheduled at this time on {weekday.value}")
+            if index.classroom_conflict(classroom_id, weekday, start, end):
+                raise ConflictError(f"Classroom is already booked at this time on {weekday.value}")
+            return
+
         # Check professor schedule conflicts
         professor_conflicts = db.query(ScheduleModel).filter(
             ScheduleModel.professor_id == professor_id,
@@ -469,7 +1526,7 @@ class SchedulerService:
         ).first()
         
         if professor_conflicts:
-            raise ValueError(f"Professor already has a class scheduled at this time on {weekday.value}")
+            raise ConflictError(f"Professor already has a class scheduled at this time on {weekday.value}")
         
         # Check classroom schedule conflicts
         classroom_conflicts = db.query(ScheduleModel).filter(
@@ -481,8 +1538,60 @@ class SchedulerService:
         ).first()
         
         if classroom_conflicts:
-            raise ValueError(f"Classroom is already booked at this time on {weekday.value}")
+            raise ConflictError(f"Classroom is already booked at this time on {weekday.value}")
     
+    @staticmethod
+    def find_available_slots(
+        db: Session,
+        course_id: int,
+        professor_id: int,
+        step_minutes: int = 60,
+        limit: Optional[int] = None,
+        skip_taught_days: bool = True
+    ) -> List[SlotOption]:
+        """
+        Every (classroom, weekday, start) at which schedule_course_session would
+        accept a block of the course for the professor, best options first.
+        By default weekdays on which the professor already teaches the course
+        are left out too, as AutoScheduler spreads a course over the week;
+        pass skip_taught_days=False for exactly what schedule_course_session accepts.
+        """
+        professor = SchedulerService._professor_ref(db, professor_id)
+        course = SchedulerService._course_ref(db, course_id)
+        if not professor:
+            raise NotFoundError(f"Professor with ID {professor_id} not found")
+        if not course:
+            raise NotFoundError(f"Course with ID {course_id} not found")
+        if course.id not in SchedulerService._assigned_course_ids(db, professor.id):
+            raise ValueError(f"Professor {professor.name} is not assigned to course {course.name}")
+        duration = block_hours(course.weekly_hours) * 60
+
+        rooms = SchedulerService._classroom_rows_query().order_by(ClassroomModel.id)
+        if course.requires_equipment:
+            rooms = rooms.where(ClassroomModel.has_equipment.is_(True))
+        classrooms = [ClassroomRow._make(row) for row in db.execute(rooms)]
+
+        if SchedulerService.occupancy_index is not None:
+            sessions = TimetableColumns.from_rows(
+                (entry_id, booked.course_id, booked.professor_id, booked.classroom_id,
+                 booked.weekday, booked.start, booked.end)
+                for entry_id, booked in SchedulerService.occupancy_index.items()
+            )
+        elif course.requires_equipment:
+            sessions = TimetableColumns.load(db, or_(
+                ScheduleModel.professor_id == professor.id,
+                ScheduleModel.classroom_id.in_(
+                    select(ClassroomModel.id).where(ClassroomModel.has_equipment.is_(True))
+                )
+            ))
+        else:
+            sessions = TimetableColumns.load(db)
+
+        return find_free_slots(
+            course.id, professor.id, duration, classrooms, sessions,
+            professor.restriction_mask, step_minutes, limit, skip_taught_days
+        )
+
     @staticmethod
     def get_professor_schedule(db: Session, professor_id: int) -> List[ScheduleModel]:
         """Get the complete schedule for a professor."""
@@ -498,6 +1607,58 @@ class SchedulerService:
         """Get the complete schedule for a course."""
         return db.query(ScheduleModel).filter(ScheduleModel.course_id == course_id).all()
     
+    @staticmethod
+    def _course_validation_query():
+        """Per-course totals of scheduled minutes, blocks, block lengths and distinct weekdays."""
+        minutes = (
+            (extract("hour", ScheduleModel.end_time) - extract("hour", ScheduleModel.start_time)) * 60
+            + extract("minute", ScheduleModel.end_time) - extract("minute", ScheduleModel.start_time)
+        )
+        return (
+            select(
+                CourseModel.id,
+                CourseModel.code,
+                CourseModel.name,
+                CourseModel.weekly_hours,
+                func.coalesce(func.sum(minutes), 0),
+                func.count(ScheduleModel.id),
+                func.min(minutes),
+                func.max(minutes),
+                func.count(distinct(ScheduleModel.weekday))
+            )
+            .outerjoin(ScheduleModel, ScheduleModel.course_id == CourseModel.id)
+            .group_by(CourseModel.id, CourseModel.code, CourseModel.name, CourseModel.weekly_hours)
+        )
+
+    @staticmethod
+    def _course_validation(row) -> CourseValidation:
+        """
+        Apply the scheduling rules to one aggregated row.
+        - 3-hour courses should have one block
+        - 4-hour courses should have two 2-hour blocks on different days
+        """
+        course_id, code, name, weekly_hours, total_minutes, blocks, shortest, longest, days = row
+        reason = None
+        if total_minutes != weekly_hours * 60:
+            reason = "No sessions scheduled" if not blocks else \
+                f"Scheduled {total_minutes / 60:g} of {weekly_hours} weekly hours"
+        elif weekly_hours == 4 and days < 2:
+            reason = "Blocks must be on different days"
+        elif weekly_hours == 4 and not shortest == longest == 120:
+            reason = "Blocks must be 2 hours long"
+        return CourseValidation(
+            course_id, code, name, weekly_hours, total_minutes / 60, blocks, days, reason is None, reason
+        )
+
+    @staticmethod
+    def validate_all_courses(db: Session, only_invalid: bool = False) -> List[CourseValidation]:
+        """Validate the scheduling of every course with a single aggregate query."""
+        stmt = SchedulerService._course_validation_query().order_by(CourseModel.id)
+        report = [SchedulerService._course_validation(row) for row in db.execute(stmt)]
+        if only_invalid:
+            return [item for item in report if not item.valid]
+        return report
+
     @staticmethod
     def validate_course_scheduling(db: Session, course_id: int) -> bool:
         """
@@ -505,34 +1666,15 @@ class SchedulerService:
         - 3-hour courses should have one block
         - 4-hour courses should have two 2-hour blocks on different days
         """
-        course = db.query(CourseModel).filter(CourseModel.id == course_id).first()
+        row = db.execute(
+            SchedulerService._course_validation_query().where(CourseModel.id == course_id)
+        ).first()
 
-        if not course:
-            raise ValueError(f"Course with ID {course_id} not found")
+        if row is None:
+            raise NotFoundError(f"Course with ID {course_id} not found")
 
-        schedules = db.query(ScheduleModel).filter(ScheduleModel.course_id == course_id).all()
-        
-        total_hours = sum((s.end_time.hour - s.start_time.hour) + 
-                         (s.end_time.minute - s.start_time.minute) / 60 
-                         for s in schedules)
-        
-        # Check if total scheduled hours match course weekly hours
-        if total_hours != course.weekly_hours:
-            return False
-        
-        # For 4-hour courses, check if they're split into two blocks on different days
-        if course.weekly_hours == 4:
-            # Get unique days
-            days = set(s.weekday for s in schedules)
-            # Check if there are at least 2 different days
-            if len(days) < 2:
-                return False
-            
-            # Check if each block is 2 hours
-            for schedule in schedules:
-                hours = (schedule.end_time.hour - schedule.start_time.hour) + \
-                       (schedule.end_time.minute - schedule.start_time.minute) / 60
-                if hours != 2:
-                    return False
-        
-        return True
+        return SchedulerService._course_validation(row).valid
+
+
+# Call counts and latency of every public method, see metrics.Metrics
+metrics.instrument(SchedulerService)
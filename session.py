@@ -1,7 +1,15 @@
-from database import SessionLocal
+from contextlib import contextmanager
+from typing import Iterator
 
-def get_db():
-    db = SessionLocal()
+from sqlalchemy.orm import Session
+
+from database import get_session
+
+
+@contextmanager
+def get_db_session() -> Iterator[Session]:
+    """A session on the shared engine that is closed when the block exits."""
+    db = get_session()
     try:
         yield db
     finally:
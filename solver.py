@@ -0,0 +1,324 @@
+from dataclasses import dataclass, field
+from datetime import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from models import WeekDay
+from occupancy import OccupancyIndex
+from timeslots import block_hours, from_minutes, is_restricted, session_starts
+
+
+@dataclass
+class SolverCourse:
+    id: int
+    name: str
+    weekly_hours: int
+    requires_equipment: bool
+
+
+@dataclass
+class SolverClassroom:
+    id: int
+    has_equipment: bool
+    capacity: int
+
+
+@dataclass
+class PlannedSession:
+    course_id: int
+    professor_id: int
+    classroom_id: int
+    weekday: WeekDay
+    start_time: time
+    end_time: time
+
+
+@dataclass
+class SolverResult:
+    placements: List[PlannedSession] = field(default_factory=list)
+    # (professor_id, course_id, reason) for every assignment left unscheduled
+    unplaced: List[Tuple[int, int, str]] = field(default_factory=list)
+    backtracks: int = 0
+
+
+@dataclass
+class _Block:
+    """One session that still has to be placed for a professor/course assignment."""
+    task: int
+    professor_id: int
+    course: SolverCourse
+    duration: int
+    room_ids: List[int]
+    blocked_days: Set[WeekDay]
+    siblings: List[int] = field(default_factory=list)
+
+
+class AutoScheduler:
+    """
+    In-memory timetable engine. It applies the same rules as
+    SchedulerService.schedule_course_session and places every block with
+    forward checking and bounded chronological backtracking.
+    """
+
+    def __init__(
+        self,
+        courses: Dict[int, SolverCourse],
+        classrooms: List[SolverClassroom],
+        restrictions: Dict[int, int],
+        occupancy: Optional[OccupancyIndex] = None,
+        step_minutes: int = 60,
+        max_backtracks: int = 1000,
+    ):
+        if step_minutes <= 0:
+            raise ValueError("Step minutes must be a positive integer")
+        self.courses = courses
+        self.classrooms = sorted(classrooms, key=lambda c: (c.has_equipment, c.capacity, c.id))
+        self.restrictions = restrictions
+        self.step_minutes = step_minutes
+        self.max_backtracks = max_backtracks
+        self.occupancy = occupancy if occupancy is not None else OccupancyIndex()
+        self._dropped: Set[int] = set()
+
+    def solve(
+        self,
+        assignments: List[Tuple[int, int]],
+        existing_days: Optional[Dict[Tuple[int, int], List[WeekDay]]] = None,
+    ) -> SolverResult:
+        """
+        Place every block still missing for the given (professor_id, course_id)
+        assignments. existing_days lists the weekdays already used by the
+        assignment's scheduled sessions; by default it is read from the
+        occupancy index.
+        """
+        result = SolverResult()
+        if existing_days is None:
+            existing_days = {}
+            for _, booked in self.occupancy.items():
+                key = (booked.professor_id, booked.course_id)
+                existing_days.setdefault(key, []).append(booked.weekday)
+        blocks = self._build_blocks(assignments, existing_days, result)
+        order = self._order_blocks(blocks)
+        placed: List[Optional[Tuple[WeekDay, int, int]]] = [None] * len(order)
+        position = {block_index: i for i, block_index in enumerate(order)}
+        candidates: List[Optional[Iterator[Tuple[WeekDay, int, int]]]] = [None] * len(order)
+        pending_by_professor: Dict[int, List[int]] = {}
+        for block_index, block in enumerate(blocks):
+            pending_by_professor.setdefault(block.professor_id, []).append(block_index)
+        self._dropped = set()
+
+        i = 0
+        while i < len(order):
+            block = blocks[order[i]]
+            if block.task in self._dropped:
+                i += 1
+                continue
+
+            if candidates[i] is None:
+                candidates[i] = self._candidates(block, self._sibling_days(block, placed, position))
+            choice = self._next_consistent(
+                order[i], blocks, placed, position, pending_by_professor, candidates[i]
+            )
+            if choice is not None:
+                i += 1
+                continue
+
+            candidates[i] = None
+            previous = self._previous_active(order, blocks, i)
+            if previous is not None and result.backtracks < self.max_backtracks:
+                # Chronological backtracking: undo the previous block and try its next value
+                result.backtracks += 1
+                for j in range(previous + 1, i):
+                    candidates[j] = None
+                self._unplace(order[previous], placed, previous)
+                i = previous
+                continue
+
+            # Give up on this assignment and keep going with the rest of the term
+            self._dropped.add(block.task)
+            for sibling in block.siblings:
+                j = position[sibling]
+                if placed[j] is not None:
+                    self._unplace(sibling, placed, j)
+            result.unplaced.append(
+                (block.professor_id, block.course.id, "No feasible classroom and time left")
+            )
+            i += 1
+
+        for i, block_index in enumerate(order):
+            block = blocks[block_index]
+            if placed[i] is None or block.task in self._dropped:
+                continue
+            weekday, start, classroom_id = placed[i]
+            result.placements.append(PlannedSession(
+                course_id=block.course.id,
+                professor_id=block.professor_id,
+                classroom_id=classroom_id,
+                weekday=weekday,
+                start_time=from_minutes(start),
+                end_time=from_minutes(start + block.duration),
+            ))
+        return result
+
+    def _build_blocks(
+        self,
+        assignments: List[Tuple[int, int]],
+        existing_days: Dict[Tuple[int, int], List[WeekDay]],
+        result: SolverResult,
+    ) -> List[_Block]:
+        """Expand assignments into the individual blocks that still need a slot."""
+        blocks: List[_Block] = []
+        for task, (professor_id, course_id) in enumerate(assignments):
+            course = self.courses.get(course_id)
+            if course is None:
+                result.unplaced.append((professor_id, course_id, f"Course with ID {course_id} not found"))
+                continue
+            try:
+                hours = block_hours(course.weekly_hours)
+            except ValueError as exc:
+                result.unplaced.append((professor_id, course_id, str(exc)))
+                continue
+
+            rooms = [c for c in self.classrooms if c.has_equipment or not course.requires_equipment]
+            if not rooms:
+                result.unplaced.append(
+                    (professor_id, course_id, f"Course {course.name} requires equipment but no classroom has it")
+                )
+                continue
+
+            used_days = existing_days.get((professor_id, course_id), [])
+            missing = course.weekly_hours // hours - len(used_days)
+            if missing <= 0:
+                continue
+
+            first = len(blocks)
+            for _ in range(missing):
+                blocks.append(_Block(
+                    task=task,
+                    professor_id=professor_id,
+                    course=course,
+                    duration=hours * 60,
+                    room_ids=[room.id for room in rooms],
+                    blocked_days=set(used_days),
+                ))
+            siblings = list(range(first, len(blocks)))
+            for index in siblings:
+                blocks[index].siblings = [s for s in siblings if s != index]
+        return blocks
+
+    def _order_blocks(self, blocks: List[_Block]) -> List[int]:
+        """Most constrained blocks first: fewest allowed slots, then fewest eligible rooms."""
+        def allowed_slots(block: _Block) -> int:
+            restricted = self.restrictions.get(block.professor_id, 0)
+            return sum(
+                1
+                for weekday in WeekDay
+                if weekday not in block.blocked_days
+                for start in session_starts(block.duration, self.step_minutes)
+                if not is_restricted(restricted, weekday, from_minutes(start))
+            )
+
+        return sorted(
+            range(len(blocks)),
+            key=lambda i: (
+                allowed_slots(blocks[i]),
+                len(blocks[i].room_ids),
+                -blocks[i].duration,
+                blocks[i].task,
+            ),
+        )
+
+    def _candidates(
+        self,
+        block: _Block,
+        excluded_days: Set[WeekDay],
+    ) -> Iterator[Tuple[WeekDay, int, int]]:
+        """Yield (weekday, start, classroom_id) values legal for the block right now."""
+        restricted = self.restrictions.get(block.professor_id, 0)
+        # Prefer the professor's least loaded days so sessions spread over the week
+        weekdays = sorted(
+            (d for d in WeekDay if d not in block.blocked_days and d not in excluded_days),
+            key=lambda d: self.occupancy.professor_sessions(block.professor_id, d),
+        )
+        for weekday in weekdays:
+            for start in session_starts(block.duration, self.step_minutes):
+                if is_restricted(restricted, weekday, from_minutes(start)):
+                    continue
+                end = start + block.duration
+                if self.occupancy.professor_conflict(block.professor_id, weekday, start, end):
+                    continue
+                for classroom_id in self.occupancy.free_classrooms(block.room_ids, weekday, start, end):
+                    yield weekday, start, classroom_id
+
+    def _sibling_days(
+        self,
+        block: _Block,
+        placed: List[Optional[Tuple[WeekDay, int, int]]],
+        position: Dict[int, int],
+    ) -> Set[WeekDay]:
+        """Weekdays already taken by the placed blocks of the same assignment."""
+        return {
+            placed[position[s]][0] for s in block.siblings if placed[position[s]] is not None
+        }
+
+    def _next_consistent(
+        self,
+        index: int,
+        blocks: List[_Block],
+        placed: List[Optional[Tuple[WeekDay, int, int]]],
+        position: Dict[int, int],
+        pending_by_professor: Dict[int, List[int]],
+        candidates: Iterator[Tuple[WeekDay, int, int]],
+    ) -> Optional[Tuple[WeekDay, int, int]]:
+        """Take the next candidate that leaves every pending block of the professor a legal slot."""
+        block = blocks[index]
+        for weekday, start, classroom_id in candidates:
+            self.occupancy.add(
+                ("planned", index), block.professor_id, classroom_id, weekday,
+                start, start + block.duration, block.course.id
+            )
+            placed[position[index]] = (weekday, start, classroom_id)
+            if self._forward_check(block, blocks, placed, position, pending_by_professor):
+                return weekday, start, classroom_id
+            placed[position[index]] = None
+            self.occupancy.remove(("planned", index))
+        return None
+
+    def _forward_check(
+        self,
+        block: _Block,
+        blocks: List[_Block],
+        placed: List[Optional[Tuple[WeekDay, int, int]]],
+        position: Dict[int, int],
+        pending_by_professor: Dict[int, List[int]],
+    ) -> bool:
+        """Every pending block sharing the professor must still have at least one value."""
+        for other in pending_by_professor[block.professor_id]:
+            if placed[position[other]] is not None or blocks[other].task in self._dropped:
+                continue
+            pending = blocks[other]
+            excluded = self._sibling_days(pending, placed, position)
+            if next(self._candidates(pending, excluded), None) is None:
+                return False
+        return True
+
+    def _unplace(
+        self,
+        block_index: int,
+        placed: List[Optional[Tuple[WeekDay, int, int]]],
+        i: int,
+    ) -> None:
+        """Release the slot held by the block at position i."""
+        self.occupancy.remove(("planned", block_index))
+        placed[i] = None
+
+    def _previous_active(
+        self,
+        order: List[int],
+        blocks: List[_Block],
+        i: int,
+    ) -> Optional[int]:
+        """Position of the closest earlier block whose assignment is still in play."""
+        for j in range(i - 1, -1, -1):
+            if blocks[order[j]].task not in self._dropped:
+                return j
+        return None
+
@@ -0,0 +1,133 @@
+import bisect
+from typing import Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+import dearpygui.dearpygui as dpg
+
+Column = Tuple[str, Callable[[NamedTuple], str]]
+
+
+class PagedTable:
+    """
+    DearPyGui table over rows keyed by an id field (`id` by default). All rows stay in memory,
+    but widgets exist only for one page: a fixed pool of table rows whose text
+    is rewritten when the page, or a row on it, changes. Adding, updating or
+    removing an entity touches that row, not the whole table.
+    """
+
+    def __init__(self, tag: str, columns: List[Column], page_size: int = 50, key: str = "id"):
+        self.tag = tag
+        self.key = key
+        self.columns = columns
+        self.page_size = page_size
+        self.page = 0
+        self._rows: Dict[int, NamedTuple] = {}
+        self._ids: List[int] = []
+        self._slots: List[int] = []
+        self._cells: List[List[int]] = []
+
+    def build(self, **table_options) -> None:
+        """Create the table, its row pool and the pager in the current container."""
+        with dpg.group():
+            with dpg.table(tag=self.tag, header_row=True, **table_options):
+                for label, _ in self.columns:
+                    dpg.add_table_column(label=label)
+                for _ in range(self.page_size):
+                    with dpg.table_row(show=False) as slot:
+                        self._cells.append([dpg.add_text("") for _ in self.columns])
+                    self._slots.append(slot)
+            with dpg.group(horizontal=True):
+                dpg.add_button(label="<", callback=lambda: self.show_page(self.page - 1))
+                dpg.add_text("", tag=f"{self.tag}_pager")
+                dpg.add_button(label=">", callback=lambda: self.show_page(self.page + 1))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def rows(self) -> List[NamedTuple]:
+        """Every row, in key order."""
+        return [self._rows[row_id] for row_id in self._ids]
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self._ids) // self.page_size))
+
+    def set_rows(self, rows: Iterable[NamedTuple]) -> None:
+        """Replace every row (initial load or full reload)."""
+        self._rows = {getattr(row, self.key): row for row in rows}
+        self._ids = sorted(self._rows)
+        self.show_page(self.page)
+
+    def upsert(self, row: NamedTuple) -> None:
+        """Add a row or replace the row with the same id."""
+        row_id = getattr(row, self.key)
+        if row_id in self._rows:
+            self._rows[row_id] = row
+            self._render_position(bisect.bisect_left(self._ids, row_id))
+            return
+        self._rows[row_id] = row
+        position = bisect.bisect_left(self._ids, row_id)
+        self._ids.insert(position, row_id)
+        self._render_from(position)
+
+    def remove(self, row_id: int) -> None:
+        """Drop the row with this id, if shown."""
+        if self._rows.pop(row_id, None) is None:
+            return
+        position = bisect.bisect_left(self._ids, row_id)
+        del self._ids[position]
+        self._render_from(position)
+
+    def remove_where(self, predicate: Callable[[NamedTuple], bool]) -> None:
+        """Drop every row matching the predicate (rows that cascaded away)."""
+        doomed = {row_id for row_id, row in self._rows.items() if predicate(row)}
+        if not doomed:
+            return
+        first = bisect.bisect_left(self._ids, min(doomed))
+        for row_id in doomed:
+            del self._rows[row_id]
+        self._ids = [row_id for row_id in self._ids if row_id not in doomed]
+        self._render_from(first)
+
+    def replace_where(
+        self,
+        predicate: Callable[[NamedTuple], bool],
+        change: Callable[[NamedTuple], NamedTuple]
+    ) -> None:
+        """Rewrite every row matching the predicate, e.g. after a referenced name changed."""
+        for row in list(self._rows.values()):
+            if predicate(row):
+                self.upsert(change(row))
+
+    def show_page(self, page: int) -> None:
+        """Fill the row pool with the given page (clamped to the valid range)."""
+        self.page = min(max(page, 0), self.pages - 1)
+        self._render_from(self.page * self.page_size)
+
+    def _render_from(self, position: int) -> None:
+        """Redraw the visible slots at or after a row position; earlier slots are unchanged."""
+        first = self.page * self.page_size
+        if position >= first + self.page_size:
+            self._update_pager()
+            return
+        if first >= len(self._ids) and first > 0:
+            # The last page emptied, step back
+            self.show_page(self.page - 1)
+            return
+        for position in range(max(position, first), first + self.page_size):
+            self._render_position(position)
+        self._update_pager()
+
+    def _render_position(self, position: int) -> None:
+        slot = position - self.page * self.page_size
+        if not 0 <= slot < self.page_size:
+            return
+        if position >= len(self._ids):
+            dpg.configure_item(self._slots[slot], show=False)
+            return
+        row = self._rows[self._ids[position]]
+        for cell, (_, render) in zip(self._cells[slot], self.columns):
+            dpg.set_value(cell, render(row))
+        dpg.configure_item(self._slots[slot], show=True)
+
+    def _update_pager(self) -> None:
+        dpg.set_value(f"{self.tag}_pager", f"Page {self.page + 1}/{self.pages} ({len(self._ids)} rows)")
@@ -0,0 +1,100 @@
+from datetime import time
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from models import TimeBlock, WeekDay
+
+# Opening hours enforced by SchedulerService.schedule_course_session
+DAY_START = time(8, 0)
+DAY_END = time(22, 0)
+
+# Granularity of the in-memory time grid, in minutes
+SLOT_MINUTES = 15
+
+
+def to_minutes(value: time) -> int:
+    """Convert a time of day to minutes since midnight."""
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(minutes: int) -> time:
+    """Convert minutes since midnight back to a time of day."""
+    return time(minutes // 60, minutes % 60)
+
+
+DAY_START_MINUTES = to_minutes(DAY_START)
+DAY_END_MINUTES = to_minutes(DAY_END)
+SLOTS_PER_DAY = (DAY_END_MINUTES - DAY_START_MINUTES) // SLOT_MINUTES
+
+
+def determine_time_block(start_time: time) -> TimeBlock:
+    """Determine the time block based on the start time."""
+    if start_time < time(12, 0):
+        return TimeBlock.MORNING
+    elif start_time < time(18, 0):
+        return TimeBlock.AFTERNOON
+    else:
+        return TimeBlock.EVENING
+
+
+def block_hours(weekly_hours: int) -> int:
+    """Length in hours of each session for a course with the given weekly hours."""
+    if weekly_hours == 3:
+        return 3
+    if weekly_hours == 4:
+        return 2
+    raise ValueError("Weekly hours must be either 3 or 4")
+
+
+def session_starts(duration_minutes: int, step_minutes: int = 60) -> Iterator[int]:
+    """Yield every start (in minutes) at which a session fits inside opening hours."""
+    start = DAY_START_MINUTES
+    while start + duration_minutes <= DAY_END_MINUTES:
+        yield start
+        start += step_minutes
+
+
+def slot_mask(start_minutes: int, end_minutes: int) -> int:
+    """Bitmask of the grid slots touched by [start, end), rounding outwards."""
+    first = max(0, (start_minutes - DAY_START_MINUTES) // SLOT_MINUTES)
+    last = min(SLOTS_PER_DAY, -(-(end_minutes - DAY_START_MINUTES) // SLOT_MINUTES))
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+# Professor restrictions are an 18-bit mask, bit weekday * 3 + block for the
+# blocks determine_time_block returns. The layout is stored in
+# professors.restriction_mask, so it must never be reordered.
+RESTRICTION_BLOCKS = (TimeBlock.MORNING, TimeBlock.AFTERNOON, TimeBlock.EVENING)
+RESTRICTION_BITS: Dict[Tuple[WeekDay, TimeBlock], int] = {
+    (weekday, block): 1 << (day_index * len(RESTRICTION_BLOCKS) + block_index)
+    for day_index, weekday in enumerate(WeekDay)
+    for block_index, block in enumerate(RESTRICTION_BLOCKS)
+}
+ALL_RESTRICTIONS = (1 << len(RESTRICTION_BITS)) - 1
+
+
+def restriction_bit(weekday: WeekDay, time_block: TimeBlock) -> int:
+    """Bit of a (weekday, time block) restriction."""
+    bit = RESTRICTION_BITS.get((weekday, time_block))
+    if bit is None:
+        raise ValueError(f"Restrictions use the Morning, Afternoon and Evening blocks, not {time_block.value}")
+    return bit
+
+
+def restriction_mask(slots: Iterable[Tuple[WeekDay, TimeBlock]]) -> int:
+    """Mask of every (weekday, time block) in slots."""
+    mask = 0
+    for weekday, time_block in slots:
+        mask |= restriction_bit(weekday, time_block)
+    return mask
+
+
+def restricted_slots(mask: int) -> List[Tuple[WeekDay, TimeBlock]]:
+    """The (weekday, time block) pairs set in a mask, in weekday then block order."""
+    return [slot for slot, bit in RESTRICTION_BITS.items() if mask & bit]
+
+
+def is_restricted(mask: int, weekday: WeekDay, start_time: time) -> bool:
+    """Whether a session starting at start_time on weekday falls in a restricted block."""
+    return bool(mask & RESTRICTION_BITS[weekday, determine_time_block(start_time)])
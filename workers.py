@@ -0,0 +1,126 @@
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from database import get_session
+from metrics import metrics
+
+
+class _Completion(NamedTuple):
+    key: Optional[Hashable]
+    generation: int
+    future: Future
+    on_success: Optional[Callable]
+    on_error: Optional[Callable]
+
+
+class BackgroundExecutor:
+    """
+    Runs service calls on a worker pool so the GUI thread never waits on SQL.
+    Each task gets its own session. Completions are queued and handed back on
+    the GUI thread by drain(); a completion is dropped when a newer task was
+    submitted under the same key (usually the tag of the widget it updates).
+    Tasks submitted with key None, such as writes, are never dropped.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        session_factory: Callable[[], Session] = get_session
+    ):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scheduler-db")
+        self._session_factory = session_factory
+        self._completions: "queue.SimpleQueue[_Completion]" = queue.SimpleQueue()
+        self._generations: Dict[Hashable, int] = {}
+        # Submitted but not yet drained tasks per key
+        self._in_flight: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(
+        self,
+        key: Optional[Hashable],
+        task: Callable[..., object],
+        *args,
+        on_success: Optional[Callable[[object], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None
+    ) -> Future:
+        """
+        Run task(session, *args) on a worker. on_success(result) or
+        on_error(exception) is called from drain() unless it went stale.
+        """
+        with self._lock:
+            generation = 0
+            if key is not None:
+                generation = self._generations.get(key, 0) + 1
+                self._generations[key] = generation
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            self._pending += 1
+        future = self._pool.submit(self._run, task, args)
+        future.add_done_callback(
+            lambda done: self._completions.put(_Completion(key, generation, done, on_success, on_error))
+        )
+        return future
+
+    def drain(self, limit: Optional[int] = None) -> int:
+        """Apply finished tasks on the calling (GUI) thread. Returns how many were applied."""
+        applied = 0
+        while limit is None or applied < limit:
+            try:
+                completion = self._completions.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._pending -= 1
+                if completion.key is not None:
+                    self._in_flight[completion.key] -= 1
+                    if not self._in_flight[completion.key]:
+                        del self._in_flight[completion.key]
+                stale = completion.key is not None and self._generations.get(completion.key) != completion.generation
+            if stale:
+                continue
+            error = completion.future.exception()
+            if error is None and completion.on_success is not None:
+                try:
+                    with metrics.timed(f"gui.apply.{_name(completion.on_success)}"):
+                        completion.on_success(completion.future.result())
+                except Exception as exc:
+                    error = exc
+            if error is not None:
+                if completion.on_error is not None:
+                    completion.on_error(error)
+                else:
+                    print(error)
+            applied += 1
+        return applied
+
+    def running(self, key: Hashable) -> bool:
+        """True while a task submitted under key has not been drained yet."""
+        with self._lock:
+            return key in self._in_flight
+
+    @property
+    def busy(self) -> bool:
+        """True while a submitted task has not been drained yet."""
+        with self._lock:
+            return self._pending > 0
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting tasks; pending completions are discarded."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, task: Callable[..., object], args: tuple) -> object:
+        with metrics.timed(f"task.{_name(task)}"):
+            db = self._session_factory()
+            try:
+                return task(db, *args)
+            finally:
+                db.close()
+
+
+def _name(func: Callable) -> str:
+    """Readable name of a callback, e.g. add_course_callback.task."""
+    return getattr(func, "__qualname__", repr(func)).replace(".<locals>", "")